@@ -2,8 +2,14 @@
 fastapi dependencies for supabase JWT authentication.
 
 extracts the user_id from the supabase JWT in the Authorization header.
-uses supabase's built-in auth.get_user() to validate the token:
-this handles signature verification, expiry, etc.
+with AUTH_MODE="local" (the default) the token's signature, expiry and
+audience are checked in-process against the project's jwt secret / jwks
+(see app/auth/tokens.py), so most requests never leave the server.
+supabase's auth.get_user() is only called when a token can't be checked
+locally, or always with AUTH_MODE="remote".
+
+in local mode verified user_ids are cached by token hash until the token
+expires.
 
 usage in routes:
     @router.get("/my-stuff")
@@ -11,10 +17,24 @@ usage in routes:
         ...
 """
 
+import logging
+
+import jwt
 from fastapi import HTTPException, Header
 
+from app.auth.tokens import KeyUnavailableError, token_cache, unverified_exp, verify_token
+from app.core.config import settings
 from app.core.supabase import get_supabase
 
+logger = logging.getLogger(__name__)
+
+
+async def _get_user_remote(token: str) -> str:
+    """validate the token with the supabase auth server. one network round-trip."""
+    sb = get_supabase()
+    user_response = await sb.auth.get_user(token)
+    return user_response.user.id
+
 
 async def require_auth(authorization: str = Header(...)) -> str:
     """
@@ -28,9 +48,29 @@ async def require_auth(authorization: str = Header(...)) -> str:
 
     token = authorization.removeprefix("Bearer ")
 
+    if settings.AUTH_MODE != "local":
+        try:
+            return await _get_user_remote(token)
+        except Exception:
+            raise HTTPException(status_code=401, detail="invalid or expired token")
+
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
-        sb = get_supabase()
-        user_response = sb.auth.get_user(token)
-        return user_response.user.id
+        claims = await verify_token(token)
+        token_cache.put(token, claims["sub"], float(claims["exp"]))
+        return claims["sub"]
+    except KeyUnavailableError as e:
+        logger.debug("local jwt verification unavailable, using auth server: %s", e)
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="invalid or expired token")
+
+    try:
+        user_id = await _get_user_remote(token)
     except Exception:
         raise HTTPException(status_code=401, detail="invalid or expired token")
+
+    token_cache.put(token, user_id, unverified_exp(token))
+    return user_id
@@ -0,0 +1,176 @@
+"""
+local (offline) verification of supabase access tokens.
+
+supabase signs access tokens either with the project's legacy jwt secret
+(HS256) or with an asymmetric signing key published at
+{SUPABASE_URL}/auth/v1/.well-known/jwks.json (ES256/RS256). either way the
+signature, expiry and audience can be checked here without asking the auth
+server, which saves a network round-trip on every authenticated request.
+
+- the jwks is cached for AUTH_JWKS_TTL_SECONDS and refetched early (at most
+  once per _JWKS_MIN_REFRESH_SECONDS) when a token names an unknown kid,
+  so signing key rotation is picked up without a restart.
+- verified user_ids go into a small lru keyed by sha256(token), valid until
+  the token's own exp.
+
+verify_token() raises KeyUnavailableError when it cannot check a token
+locally (no secret configured, jwks unreachable, unknown kid). callers fall
+back to the remote auth.get_user() lookup in that case. a token that fails
+verification raises jwt.InvalidTokenError and should be rejected outright.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+import httpx
+import jwt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_ASYMMETRIC_ALGORITHMS = ["ES256", "RS256"]
+_JWKS_MIN_REFRESH_SECONDS = 30
+_LEEWAY_SECONDS = 10
+
+
+class KeyUnavailableError(RuntimeError):
+    """raised when there is no key to verify a token locally."""
+    pass
+
+
+class _JwksCache:
+    """supabase signing keys, refreshed on a ttl or when an unknown kid shows up."""
+
+    def __init__(self) -> None:
+        self._keys: jwt.PyJWKSet | None = None
+        self._fetched_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+
+    async def get_key(self, kid: str | None) -> jwt.PyJWK:
+        stale = self._keys is None or self._age() > settings.AUTH_JWKS_TTL_SECONDS
+        # an unknown kid probably means the signing key was rotated. refetch
+        # early, but rate limited so a flood of forged kids (or a jwks outage)
+        # can't hammer the auth server.
+        if (stale or kid not in self._kids()) and self._age() > _JWKS_MIN_REFRESH_SECONDS:
+            await self._refresh()
+
+        if self._keys is None:
+            raise KeyUnavailableError("jwks not available")
+        if kid is None and len(self._keys.keys) == 1:
+            return self._keys.keys[0]
+        try:
+            return self._keys[kid]
+        except KeyError:
+            raise KeyUnavailableError(f"no signing key with kid {kid!r}")
+
+    def clear(self) -> None:
+        self._keys = None
+        self._fetched_at = None
+
+    def _age(self) -> float:
+        if self._fetched_at is None:
+            return float("inf")
+        return time.monotonic() - self._fetched_at
+
+    def _kids(self) -> set[str | None]:
+        return {k.key_id for k in self._keys.keys} if self._keys else set()
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            # another request may have refreshed while we waited on the lock
+            if self._age() <= _JWKS_MIN_REFRESH_SECONDS:
+                return
+            try:
+                async with httpx.AsyncClient(timeout=5.0) as client:
+                    response = await client.get(self.url)
+                    response.raise_for_status()
+                    self._keys = jwt.PyJWKSet.from_dict(response.json())
+            except (httpx.HTTPError, jwt.PyJWKSetError, ValueError) as e:
+                # keep serving the previous keys if we had any
+                logger.warning("failed to refresh jwks from %s: %s", self.url, e)
+            finally:
+                self._fetched_at = time.monotonic()
+
+
+class _TokenCache:
+    """lru of sha256(token) -> (user_id, exp). entries die at the token's exp."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> str | None:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user_id, exp = entry
+        if exp <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user_id
+
+    def put(self, token: str, user_id: str, exp: float) -> None:
+        if self.maxsize <= 0:
+            return
+        key = self.key(token)
+        self._entries[key] = (user_id, exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+jwks_cache = _JwksCache()
+token_cache = _TokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+async def verify_token(token: str) -> dict:
+    """
+    verify signature, expiry and audience of a supabase access token locally.
+    returns the decoded claims.
+    """
+    header = jwt.get_unverified_header(token)
+    alg = header.get("alg")
+
+    if alg == "HS256":
+        if not settings.SUPABASE_JWT_SECRET:
+            raise KeyUnavailableError("SUPABASE_JWT_SECRET is not configured")
+        key = settings.SUPABASE_JWT_SECRET
+    elif alg in _ASYMMETRIC_ALGORITHMS:
+        key = await jwks_cache.get_key(header.get("kid"))
+    else:
+        raise jwt.InvalidAlgorithmError(f"unsupported alg {alg!r}")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[alg],
+        audience=settings.SUPABASE_JWT_AUDIENCE,
+        leeway=_LEEWAY_SECONDS,
+        options={"require": ["exp", "sub"]},
+    )
+
+
+def unverified_exp(token: str) -> float:
+    """read exp without checking the signature. only for sizing cache entries."""
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return float(claims["exp"])
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        return 0.0
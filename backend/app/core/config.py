@@ -8,6 +8,71 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = ""
     SUPABASE_SERVICE_KEY: str = ""
 
+    # shared supabase connection pool (see app/core/supabase.py)
+    SUPABASE_POOL_MAX_CONNECTIONS: int = 100
+    SUPABASE_POOL_MAX_KEEPALIVE: int = 20
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_HTTP_TIMEOUT: float = 30.0
+
+    # require_auth: "local" verifies jwts in-process (see app/auth/tokens.py)
+    # and only falls back to the auth server when no key is available.
+    # "remote" always calls auth.get_user().
+    AUTH_MODE: str = "local"
+    SUPABASE_JWT_SECRET: str = ""
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    AUTH_JWKS_TTL_SECONDS: int = 600
+    AUTH_TOKEN_CACHE_SIZE: int = 1024
+
+    # usda fdc client and food cache (see app/services/fdc_cache.py).
+    # FDC_CACHE_PATH="" keeps the cache in memory only.
+    FDC_HTTP_TIMEOUT: float = 15.0
+    FDC_BULK_CONCURRENCY: int = 4
+    FDC_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    FDC_CACHE_MAX_ENTRIES: int = 5000
+    FDC_CACHE_PATH: str = "data/fdc_cache.sqlite3"
+
+    # background scrape jobs (POST /scraper/run). each worker runs one job
+    # (one browser) at a time.
+    SCRAPER_JOB_WORKERS: int = 1
+
+    # in-memory typeahead index for /products?q= (see
+    # app/services/search_index.py). off by default: search uses the rpc.
+    SEARCH_INDEX_ENABLED: bool = False
+    SEARCH_INDEX_ROW_TTL_SECONDS: int = 300
+    SEARCH_INDEX_ROW_CACHE_SIZE: int = 5000
+
+    # nutrition enrichment (see app/services/nutrition.py). runs after each
+    # scrape job; products enriched within NUTRITION_MAX_AGE_DAYS are skipped.
+    NUTRITION_ENRICH_AFTER_SCRAPE: bool = True
+    NUTRITION_MAX_AGE_DAYS: int = 30
+    NUTRITION_SEARCH_CONCURRENCY: int = 4
+    # each product costs one fdc search and fdc allows 1,000 requests an
+    # hour per key: a run enriches at most this many products (0 = no cap)
+    NUTRITION_MAX_SEARCHES_PER_RUN: int = 500
+
+    # listing counts (see app/core/counts.py) are cached this long per
+    # category/store, at most COUNT_CACHE_MAX_ENTRIES of them; scraper
+    # writes invalidate them early. a ttl of 0 disables.
+    COUNT_CACHE_TTL_SECONDS: int = 60
+    COUNT_CACHE_MAX_ENTRIES: int = 1000
+
+    # product categories are held in memory (app/services/category_registry.py)
+    # and reloaded after this long; scrapes add new ones immediately.
+    CATEGORY_REGISTRY_TTL_SECONDS: int = 600
+
+    # catalog response cache (see app/core/response_cache.py): "memory",
+    # "redis" (needs the redis package) or "off". entries are invalidated
+    # by scraper writes; the ttl is a backstop.
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://127.0.0.1:6379/0"
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2000
+
+    # gzip responses at least this large. level 5 gets most of level 9's
+    # ratio on json for a fraction of the cpu.
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 5
+
     model_config = {"env_file": ".env", "case_sensitive": True}
 
 
@@ -0,0 +1,103 @@
+"""
+count strategies and a short-lived cache of listing counts.
+
+postgrest can count a listing three ways (the Prefer: count=... header):
+- exact:     COUNT(*) over the filtered rows. always right, scans them all.
+- planned:   the planner's row estimate. free, can be well off on filters.
+- estimated: exact below postgrest's db-max-rows threshold, planned above.
+
+whatever the strategy, a count only changes when the scraper writes, so
+counts are cached per listing (table + filter) for COUNT_CACHE_TTL_SECONDS.
+a client paging through a category pays for the count on the first page
+only. db_writer.upsert_products invalidates the category and store it just
+wrote, so a fresh scrape shows up without waiting for the ttl. the scope
+comes from the request (any well-formed store id makes a listing), so the
+cache is an lru of at most COUNT_CACHE_MAX_ENTRIES counts and drops
+expired ones as it meets them.
+
+the cached count is taken once, by strategy_for, and handed back to
+resolve: a write can invalidate the entry while the page query runs, and
+the count that query skipped must not come back as null.
+
+usage:
+    strategy, cached = count_cache.strategy_for(("products", category_id), mode)
+    q = sb.table("products").select("...", count=strategy)
+    ...
+    count = count_cache.resolve(("products", category_id), mode, result.count, cached)
+"""
+
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+
+ListingKey = tuple[str, str | None]
+
+_MODES = ("exact", "planned", "estimated")
+
+
+class CountCache:
+    """ttl + lru cache of listing counts keyed by (table, scope) and count mode."""
+
+    def __init__(self) -> None:
+        self._counts: OrderedDict[tuple[ListingKey, str], tuple[float, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: ListingKey, mode: str) -> int | None:
+        entry = self._counts.get((key, mode))
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._counts[(key, mode)]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._counts.move_to_end((key, mode))
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: ListingKey, mode: str, count: int | None) -> None:
+        if count is None or settings.COUNT_CACHE_TTL_SECONDS <= 0:
+            return
+        expires_at = time.monotonic() + settings.COUNT_CACHE_TTL_SECONDS
+        self._counts[(key, mode)] = (expires_at, count)
+        self._counts.move_to_end((key, mode))
+        now = time.monotonic()
+        while len(self._counts) > settings.COUNT_CACHE_MAX_ENTRIES:
+            oldest, (oldest_expiry, _) = next(iter(self._counts.items()))
+            del self._counts[oldest]
+            if oldest_expiry > now:
+                self.evictions += 1
+
+    def strategy_for(self, key: ListingKey, mode: str) -> tuple[str | None, int | None]:
+        """(count= to send to postgrest, cached count): count= is None when the cached one will be used."""
+        cached = self.get(key, mode)
+        return (None, cached) if cached is not None else (mode, None)
+
+    def resolve(
+        self, key: ListingKey, mode: str, fetched: int | None, cached: int | None
+    ) -> int | None:
+        """the count for a response: what postgrest returned (and cache it), else the one strategy_for gave."""
+        if fetched is not None:
+            self.set(key, mode, fetched)
+            return fetched
+        return cached
+
+    def invalidate(self, category_id: str | None = None, store_id: str | None = None) -> None:
+        """drop counts a scraper write to this category/store could have changed."""
+        stale = [("products", None), ("products", category_id), ("store_products", store_id)]
+        for key in stale:
+            for mode in _MODES:
+                self._counts.pop((key, mode), None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._counts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+count_cache = CountCache()
@@ -0,0 +1,43 @@
+"""
+etags and conditional GETs for json responses.
+
+clients that poll (the mobile apps refresh /products, /stores/{id}/products
+and the open grocery list) send back the ETag they were given in
+If-None-Match; when the data is unchanged they get an empty 304 instead of
+the same nested json again.
+
+the etag is a hash of the encoded body, so it changes exactly when the
+bytes do, whoever wrote the data. catalog bodies come out of the response
+cache (app.core.response_cache), so a 304 there costs no database call or
+serialization either.
+
+usage:
+    body = encode_json(data)
+    return conditional_json(request, body)
+"""
+
+import hashlib
+
+from fastapi import Request, Response
+
+
+def etag_for(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """whether If-None-Match already names etag (weak comparison, as for any GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    client_tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in client_tags or "*" in client_tags
+
+
+def conditional_json(request: Request, body: bytes, etag: str | None = None) -> Response:
+    """the json body with its etag, or a 304 if the client already has it."""
+    etag = etag or etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,85 @@
+"""
+keyset (cursor) pagination helpers.
+
+offset pagination (`range(offset, ...)`) makes postgres walk and discard
+every earlier row, so deep pages get slower in a straight line. keyset
+pagination remembers the sort key of the last row instead and asks for
+rows after it, which an index on the sort columns answers in constant time
+at any depth.
+
+a cursor is the last row's sort key, e.g. (name, id), as opaque urlsafe
+base64 json. the id tiebreaker keeps the order total when names repeat.
+
+usage:
+    q = sb.table("products").select("...").order("name").order("id")
+    if cursor:
+        name, last_id = decode_cursor(cursor, 2)
+        q = q.or_(after_filter("name", name, last_id))
+    rows = (await q.limit(page_size + 1).execute()).data
+    page, next_cursor = cursor_page(rows, page_size, lambda r: [r["name"], r["id"]])
+"""
+
+import base64
+import json
+from collections.abc import Callable
+
+
+class InvalidCursorError(ValueError):
+    """the cursor wasn't produced by encode_cursor (or is for another sort)."""
+    pass
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """the `size` sort key values packed into cursor. raises InvalidCursorError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError("malformed cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("cursor doesn't match this listing")
+    return values
+
+
+def _quote(value) -> str:
+    """a postgrest filter value, double-quoted so commas and parens are safe."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def after_filter(column: str, value, last_id: str, id_column: str = "id") -> str:
+    """postgrest or_() filter for rows sorting after (value, last_id), ascending."""
+    return (
+        f"{column}.gt.{_quote(value)},"
+        f"and({column}.eq.{_quote(value)},{id_column}.gt.{_quote(last_id)})"
+    )
+
+
+def cursor_page(
+    rows: list[dict],
+    page_size: int,
+    sort_key: Callable[[dict], list],
+) -> tuple[list[dict], str | None]:
+    """
+    split a page_size + 1 fetch into the page and the cursor for the next one
+    (None on the last page).
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    page = rows[:page_size]
+    return page, encode_cursor(sort_key(page[-1]))
+
+
+def offset_has_more(offset: int, returned: int, page_size: int, count: int | None, count_mode: str) -> bool:
+    """
+    whether rows follow an offset page. only an exact count is trusted; a
+    planned/estimated one can undershoot, so any full page may have more.
+    """
+    if count_mode == "exact" and count is not None:
+        return offset + returned < count
+    return returned == page_size
@@ -0,0 +1,327 @@
+"""
+read-through response cache for the catalog endpoints.
+
+/products, /products/{id}, /products/{id}/prices, /stores and
+/stores/{id}/products only change when the scraper writes, so their
+encoded json bodies are cached and reused until a write invalidates them
+(or RESPONSE_CACHE_TTL_SECONDS passes, as a backstop).
+
+- the key is the route path plus its sorted query parameters.
+- each entry carries tags naming the data it was built from:
+    products          any product listing/search (embeds every store's price)
+    category:<id>     /products?category=...
+    product:<id>      /products/{id} and /products/{id}/prices
+    store:<id>        /stores/{id}/products
+    stores            /stores
+  db_writer.upsert_products invalidates the written category, store and
+  products; ensure_store_exists invalidates "stores".
+- misses are single-flight, so a burst of identical requests after an
+  invalidation makes one upstream call.
+- every invalidation bumps an epoch kept in the backend (in redis for the
+  redis backend, so it is shared by every process). a fill reads it before
+  fetching and only stores its body if it is unchanged, so a read that
+  overlapped a write - in any process - never caches the old data.
+- RESPONSE_CACHE_BACKEND picks the store: "memory" (per-process lru, the
+  default), "redis" (RESPONSE_CACHE_REDIS_URL, shared by workers and by
+  scripts/scrape_shoprite.py --db so its writes invalidate too; needs the
+  `redis` package) or "off".
+
+/categories isn't listed: it is already served from memory by
+app.services.category_registry, with its own etag.
+
+usage in a route:
+    @router.get("/{store_id}/products")
+    async def get_store_products(request: Request, store_id: str):
+        return await response_cache.cached_json(
+            request, [f"store:{store_id}"], lambda: store_service.get_store_products(store_id),
+        )
+
+hit/miss/invalidation counters are exposed at GET /metrics.
+"""
+
+import logging
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from functools import cache
+from typing import Any
+from urllib.parse import urlencode
+
+import pydantic_core
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.etag import conditional_json
+from app.core.singleflight import SingleFlight
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional: only needed for RESPONSE_CACHE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def encode_json(data: Any, model: Any = None) -> bytes:
+    """
+    data as a json body, encoded by pydantic's rust core. with a response
+    model (see app.schemas) data is validated against it first, so the body
+    matches the documented schema. fields the rows didn't have are left out
+    rather than sent as defaults, so the shape follows the select string.
+    """
+    if model is None:
+        return pydantic_core.to_json(data)
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(data), exclude_unset=True)
+
+
+class MemoryBackend:
+    """per-process lru of bodies with a tag -> keys index."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes, tuple[str, ...]]] = OrderedDict()
+        self._tagged: dict[str, set[str]] = {}
+        self._epoch = 0
+        self.evictions = 0
+
+    async def epoch(self) -> int:
+        return self._epoch
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, body: bytes, tags: tuple[str, ...], ttl: float, epoch: int) -> bool:
+        """store body unless an invalidation happened since `epoch` was read."""
+        if epoch != self._epoch:
+            return False
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + ttl, body, tags)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        return True
+
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        self._epoch += 1
+        keys = set().union(*(self._tagged.pop(tag, ()) for tag in tags))
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    async def close(self) -> None:
+        self._entries.clear()
+        self._tagged.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "tags": len(self._tagged), "evictions": self.evictions}
+
+
+# KEYS: epoch, body, tag sets. ARGV: epoch the fill read, body, ttl, key
+_SET_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+  return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+for i = 3, #KEYS do
+  redis.call('SADD', KEYS[i], ARGV[4])
+  redis.call('EXPIRE', KEYS[i], tonumber(ARGV[3]) * 2)
+end
+return 1
+"""
+
+
+class RedisBackend:
+    """
+    bodies in redis under <prefix>body:<key>, with a set of keys per tag
+    at <prefix>tag:<tag>. entries expire on their own; tag sets outlive
+    them and are deleted when invalidated. <prefix>epoch is INCRed by every
+    invalidation, and a body is only stored (by _SET_SCRIPT, atomically)
+    while it still holds the value its fill started with.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "neighborly:responses:") -> None:
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the `redis` package installed")
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+        self._epoch_key = f"{prefix}epoch"
+        self._set_script = self._redis.register_script(_SET_SCRIPT)
+
+    async def epoch(self) -> int:
+        return int(await self._redis.get(self._epoch_key) or 0)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(f"{self._prefix}body:{key}")
+
+    async def set(self, key: str, body: bytes, tags: tuple[str, ...], ttl: float, epoch: int) -> bool:
+        """store body unless an invalidation (from any process) happened since `epoch` was read."""
+        stored = await self._set_script(
+            keys=[self._epoch_key, f"{self._prefix}body:{key}", *(f"{self._prefix}tag:{tag}" for tag in tags)],
+            args=[epoch, body, max(1, int(ttl)), key],
+        )
+        return bool(stored)
+
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        tag_keys = [f"{self._prefix}tag:{tag}" for tag in tags]
+        # before the deletes: a fill that read the old epoch can't store
+        # once they're done
+        await self._redis.incr(self._epoch_key)
+        if not tag_keys:
+            return 0
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = await pipe.execute()
+        keys = {m.decode() if isinstance(m, bytes) else m for found in members for m in found}
+        await self._redis.delete(*tag_keys, *(f"{self._prefix}body:{key}" for key in keys))
+        return len(keys)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    def stats(self) -> dict:
+        return {}
+
+
+class ResponseCache:
+    """read-through cache of json bodies in front of a backend (None = off)."""
+
+    def __init__(self) -> None:
+        self.backend: MemoryBackend | RedisBackend | None = None
+        self.counters: Counter[str] = Counter()
+        self._flight = SingleFlight("responses")
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        query = urlencode(sorted(request.query_params.multi_items()))
+        return f"{request.url.path}?{query}"
+
+    async def cached_json(
+        self,
+        request: Request,
+        tags: Iterable[str],
+        fetch: Callable[[], Awaitable[Any]],
+        model: Any = None,
+    ) -> Response:
+        """
+        the cached body for this request, or fetch() encoded and cached under
+        tags, sent with an etag (304 on a matching If-None-Match). model is
+        the response model the body is encoded with (encode_json).
+        exceptions from fetch (an HTTPException 404, say) pass through and
+        are not cached.
+        """
+        if self.backend is None:
+            return conditional_json(request, encode_json(await fetch(), model))
+
+        key = self.key_for(request)
+        body = await self._get(key)
+        if body is not None:
+            self.counters["hits"] += 1
+            return conditional_json(request, body)
+
+        self.counters["misses"] += 1
+        body = await self._flight.do(key, lambda: self._fill(key, tuple(sorted(set(tags))), fetch, model))
+        return conditional_json(request, body)
+
+    async def _get(self, key: str) -> bytes | None:
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            self.counters["errors"] += 1
+            logger.exception("response cache read failed for %s", key)
+            return None
+
+    async def _fill(
+        self, key: str, tags: tuple[str, ...], fetch: Callable[[], Awaitable[Any]], model: Any,
+    ) -> bytes:
+        try:
+            epoch = await self.backend.epoch()
+        except Exception:
+            self.counters["errors"] += 1
+            logger.exception("response cache epoch read failed for %s", key)
+            epoch = None
+        body = encode_json(await fetch(), model)
+        if epoch is None:
+            return body
+        try:
+            if await self.backend.set(key, body, tags, settings.RESPONSE_CACHE_TTL_SECONDS, epoch):
+                self.counters["stores"] += 1
+            else:
+                # a write landed while this was being read; the body may predate it
+                self.counters["stale_skipped"] += 1
+        except Exception:
+            self.counters["errors"] += 1
+            logger.exception("response cache write failed for %s", key)
+        return body
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        """drop every entry tagged with any of tags. never raises: a failure is logged."""
+        tags = list(tags)
+        if self.backend is None or not tags:
+            return
+        try:
+            dropped = await self.backend.invalidate(tags)
+        except Exception:
+            self.counters["errors"] += 1
+            logger.exception("response cache invalidation failed for %s", tags[:5])
+            return
+        self.counters["invalidations"] += 1
+        self.counters["invalidated_entries"] += dropped
+
+    def stats(self) -> dict:
+        backend = self.backend.name if self.backend is not None else "off"
+        extra = self.backend.stats() if self.backend is not None else {}
+        return {"backend": backend, **dict(self.counters), **extra}
+
+
+response_cache = ResponseCache()
+
+
+def init_response_cache() -> None:
+    """pick the backend from RESPONSE_CACHE_BACKEND. called from the app lifespan."""
+    kind = settings.RESPONSE_CACHE_BACKEND
+    if kind == "memory":
+        response_cache.backend = MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    elif kind == "redis":
+        response_cache.backend = RedisBackend(settings.RESPONSE_CACHE_REDIS_URL)
+    elif kind == "off":
+        response_cache.backend = None
+    else:
+        raise ValueError(f"unknown RESPONSE_CACHE_BACKEND {kind!r} (memory, redis or off)")
+
+
+async def close_response_cache() -> None:
+    backend, response_cache.backend = response_cache.backend, None
+    if backend is not None:
+        await backend.close()
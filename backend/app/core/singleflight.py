@@ -0,0 +1,72 @@
+"""
+request coalescing ("single-flight") for hot upstream lookups.
+
+when many clients ask for the same thing at once (everyone opening the same
+product page), only the first caller runs the upstream call; everyone who
+arrives while it is in flight awaits that same call and gets its result (or
+its exception). nothing is cached once the call finishes - pair this with a
+cache where results may be reused.
+
+the shared call runs in its own task, so one caller disconnecting (and being
+cancelled) doesn't cancel the call for the others. if every caller is gone
+by the time it fails, the error is still retrieved (and counted), so asyncio
+doesn't log "Task exception was never retrieved".
+
+usage:
+    _flight = SingleFlight("fdc")
+
+    async def get_food(fdc_id: int) -> dict:
+        return await _flight.do(("food", fdc_id), lambda: _fetch_food(fdc_id))
+
+per-group counters are exposed at GET /metrics.
+"""
+
+import asyncio
+from collections import Counter
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+_groups: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """one in-flight call per key; concurrent callers with the same key share it."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.counters: Counter[str] = Counter()
+        _groups[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.counters["calls"] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # marks the exception retrieved; callers still awaiting get it raised
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["errors"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.counters["calls"],
+            "coalesced": self.counters["coalesced"],
+            "errors": self.counters["errors"],
+            "in_flight": len(self._calls),
+        }
+
+
+def stats() -> dict:
+    """counters for every single-flight group, keyed by group name."""
+    return {name: group.stats() for name, group in _groups.items()}
@@ -6,13 +6,75 @@ it needs to bypass row level security for operations like upserting scraped
 products and reading across all users' grocery lists.
 
 the anon key is what ios/android clients use directly for auth.
+
+one client is shared by the whole process. it sits on a single httpx
+connection pool so postgrest/auth calls reuse keep-alive connections instead
+of paying a tcp + tls handshake per request. the client is the async one,
+so awaiting .execute() yields to the event loop and concurrent requests
+overlap instead of queueing behind a blocking call. the fastapi lifespan in
+app.main opens it on startup and closes the pool on shutdown; scripts that
+run outside the app get it lazily on first use.
+
+usage in routes:
+    @router.get("/things")
+    async def things(sb: AsyncClient = Depends(get_supabase)):
+        result = await sb.table("things").select("*").execute()
 """
 
-from supabase import create_client, Client
+import httpx
+from supabase import AsyncClient, AsyncClientOptions
 
 from app.core.config import settings
 
+_client: AsyncClient | None = None
+_http_client: httpx.AsyncClient | None = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """httpx client with the pool limits from settings."""
+    return httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        timeout=settings.SUPABASE_HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def init_supabase() -> AsyncClient:
+    """create the shared client and its connection pool. no-op if already open."""
+    global _client, _http_client
+
+    if _client is not None:
+        return _client
+
+    _http_client = _build_http_client()
+    # server-side client: no session to persist or refresh, every call
+    # runs as the service role.
+    options = AsyncClientOptions(
+        auto_refresh_token=False,
+        persist_session=False,
+        httpx_client=_http_client,
+    )
+    _client = AsyncClient(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY, options)
+    return _client
+
+
+def get_supabase() -> AsyncClient:
+    """return the shared supabase client. also usable as a fastapi dependency."""
+    if _client is None:
+        return init_supabase()
+    return _client
+
+
+async def close_supabase() -> None:
+    """close the connection pool. the next get_supabase() call reopens it."""
+    global _client, _http_client
 
-def get_supabase() -> Client:
-    """return a supabase client. creates a new instance each call."""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+    if _http_client is not None:
+        await _http_client.aclose()
+    _client = None
+    _http_client = None
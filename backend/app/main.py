@@ -1,12 +1,49 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
+from app.core import singleflight
+from app.core.counts import count_cache
+from app.core.response_cache import close_response_cache, init_response_cache, response_cache
 from app.core.config import settings
+from app.core.supabase import init_supabase, close_supabase
+from app.services.category_registry import category_registry, load_categories
+from app.services.search_index import product_index, start_index_load
+from app.services.fdc import init_fdc_client, close_fdc_client
+from app.scraper.jobs import job_queue
 from app.routes import fdc, products, stores, categories, grocery_lists, scraper
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sb = init_supabase()
+    init_fdc_client()
+    init_response_cache()
+    await load_categories()
+    index_load = start_index_load(sb)
+    job_queue.workers = settings.SCRAPER_JOB_WORKERS
+    job_queue.start()
+    yield
+    if index_load is not None:
+        index_load.cancel()
+    await job_queue.stop()
+    await close_supabase()
+    await close_fdc_client()
+    await close_response_cache()
+
+
 app = FastAPI(
     title="Neighborly API",
     version="0.2.0",
+    lifespan=lifespan,
+)
+
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL,
 )
 
 app.add_middleware(
@@ -28,3 +65,15 @@ app.include_router(scraper.router)
 @app.get("/health", tags=["health"])
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", tags=["health"])
+def metrics():
+    """in-process counters: request coalescing per single-flight group, search index size, count cache, categories, response cache."""
+    return {
+        "singleflight": singleflight.stats(),
+        "search_index": product_index.stats(),
+        "counts": count_cache.stats(),
+        "categories": category_registry.stats(),
+        "response_cache": response_cache.stats(),
+    }
@@ -1,17 +1,23 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
-from app.core.supabase import get_supabase
+from app.core.etag import not_modified
+from app.services.category_registry import category_registry
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.get("")
-async def list_categories():
-    """list all product categories."""
-    sb = get_supabase()
+async def list_categories(request: Request, response: Response):
+    """
+    list all product categories.
 
-    result = sb.table("product_categories").select(
-        "id, name, slug"
-    ).order("name").execute()
+    served from the in-memory category registry. the ETag changes only when
+    the categories do, so clients can revalidate with If-None-Match.
+    """
+    rows, etag = await category_registry.snapshot()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
 
-    return result.data
+    response.headers.update(headers)
+    return rows
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.services import fdc as fdc_service
+from app.services.fdc_cache import food_cache
 
 router = APIRouter(prefix="/fdc", tags=["fdc"])
 
+# get_foods_bulk chunks these into upstream-sized requests
+_MAX_BULK_IDS = 5000
+
 
 @router.get("/search")
 async def search_foods(
@@ -33,7 +37,8 @@ async def get_food(fdc_id: int):
 
 
 class BulkFoodRequest(BaseModel):
-    fdc_ids: list[int]
+    fdc_ids: list[int] = Field(..., min_length=1, max_length=_MAX_BULK_IDS)
+    nutrients: list[int] | None = None
 
     model_config = {
         "json_schema_extra": {
@@ -44,5 +49,14 @@ class BulkFoodRequest(BaseModel):
 
 @router.post("/foods/bulk")
 async def get_foods_bulk(body: BulkFoodRequest):
-    """fetch nutrition details for multiple foods in one request."""
-    return await fdc_service.get_foods_bulk(body.fdc_ids)
+    """
+    fetch nutrition details for multiple foods in one request. duplicate ids
+    are dropped and results keep the order of fdc_ids.
+    """
+    return await fdc_service.get_foods_bulk(body.fdc_ids, nutrients=body.nutrients)
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """hit/miss counters and size of the fdc food cache."""
+    return food_cache.stats()
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import asyncio
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
 
 from app.auth.deps import require_auth
-from app.services import grocery_list_service
+from app.core.etag import conditional_json
+from app.core.response_cache import encode_json
+from app.schemas import BasketPlan, GroceryListDetail, ItemBatchResult, ListTotals
+from app.services import basket_optimizer, grocery_list_service
 
 router = APIRouter(prefix="/grocery-lists", tags=["grocery-lists"])
 
+# most stores a split plan may send the shopper to
+_MAX_SPLIT_STORES = 5
+
+# most operations in one POST /{list_id}/items:batch
+_MAX_BATCH_OPS = 200
+
 
 class CreateListRequest(BaseModel):
     name: str
@@ -29,6 +41,19 @@ class UpdateItemRequest(BaseModel):
     is_checked: bool | None = None
 
 
+class ItemOp(BaseModel):
+    op: Literal["add", "update", "check", "uncheck", "delete"]
+    item_id: str | None = None
+    product_id: str | None = None
+    custom_item_name: str | None = None
+    quantity: int | None = None
+    is_checked: bool | None = None
+
+
+class ItemBatchRequest(BaseModel):
+    ops: list[ItemOp] = Field(min_length=1, max_length=_MAX_BATCH_OPS)
+
+
 @router.get("")
 async def get_lists(user_id: str = Depends(require_auth)):
     """get all grocery lists for the authenticated user."""
@@ -45,13 +70,50 @@ async def create_list(body: CreateListRequest, user_id: str = Depends(require_au
     )
 
 
-@router.get("/{list_id}")
-async def get_list(list_id: str, user_id: str = Depends(require_auth)):
-    """get a grocery list with all items and product details."""
+@router.get("/{list_id}", response_model=GroceryListDetail)
+async def get_list(request: Request, list_id: str, user_id: str = Depends(require_auth)):
+    """
+    get a grocery list with all items and product details.
+
+    sent with an ETag; polling clients get a 304 while neither the list nor
+    its prices have changed.
+    """
     result = await grocery_list_service.get_list_detail(list_id, user_id)
     if not result:
         raise HTTPException(status_code=404, detail="list not found")
-    return result
+    return conditional_json(request, encode_json(result, GroceryListDetail))
+
+
+@router.get("/{list_id}/totals", response_model=ListTotals)
+async def get_list_totals(request: Request, list_id: str, user_id: str = Depends(require_auth)):
+    """
+    what this list costs at each store: total, lines priced and lines
+    missing, fewest missing then cheapest first. kept up to date in the
+    database as items and prices change, so this is one small read.
+    """
+    result = await grocery_list_service.get_list_totals(list_id, user_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="list not found")
+    return conditional_json(request, encode_json(result, ListTotals))
+
+
+@router.get("/{list_id}/optimize", response_model=BasketPlan)
+async def optimize_list(
+    list_id: str,
+    max_stores: int = Query(default=2, ge=1, le=_MAX_SPLIT_STORES, description="most stores to split the list across"),
+    include_checked: bool = Query(default=False, description="also price items already checked off"),
+    user_id: str = Depends(require_auth),
+):
+    """
+    where to shop for this list: every store's total, the cheapest single
+    store, and the cheapest split across up to max_stores stores. sale
+    prices are used when lower; plans report whether they fit budget_limit.
+    """
+    detail = await grocery_list_service.get_list_detail(list_id, user_id)
+    if not detail:
+        raise HTTPException(status_code=404, detail="list not found")
+    # numpy work, off the event loop
+    return await asyncio.to_thread(basket_optimizer.optimize_basket, detail, max_stores, include_checked)
 
 
 @router.patch("/{list_id}")
@@ -112,3 +174,22 @@ async def delete_item(
     deleted = await grocery_list_service.delete_item(item_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="item not found")
+
+
+@router.post("/{list_id}/items:batch", response_model=ItemBatchResult)
+async def batch_items(
+    list_id: str, body: ItemBatchRequest, user_id: str = Depends(require_auth),
+):
+    """
+    add, update, check/uncheck and delete many items in one request.
+
+    ops run as a few bulk writes, not one request each; every op gets a
+    result (status, the written item or an error) in the order sent. the
+    batch is not atomic - one op failing doesn't undo the others.
+    """
+    results = await grocery_list_service.apply_item_ops(
+        list_id, user_id, [op.model_dump(exclude_none=True) for op in body.ops],
+    )
+    if results is None:
+        raise HTTPException(status_code=404, detail="list not found")
+    return {"results": results}
@@ -1,38 +1,70 @@
-from fastapi import APIRouter, HTTPException, Query
+from typing import Literal
 
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.core.pagination import InvalidCursorError
+from app.core.response_cache import response_cache
+from app.schemas import Product, ProductPage, StorePrice
 from app.services import product_service
+from app.services.category_registry import category_registry
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
-@router.get("")
+@router.get("", response_model=ProductPage)
 async def list_products(
+    request: Request,
     q: str | None = Query(default=None, description="search by product name"),
     category: str | None = Query(default=None, description="filter by category slug"),
     store: str | None = Query(default=None, description="filter by store uuid"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None, description="keyset pagination: empty for the first page, then next_cursor"),
+    with_count: bool = Query(default=False, description="include the total count in cursor pages"),
+    count_mode: Literal["exact", "planned", "estimated"] = Query(
+        default="exact", description="how the total is counted: exact, planned (estimate) or estimated"
+    ),
 ):
-    """search and filter products. returns paginated results with store prices."""
-    return await product_service.search_products(
-        query=q,
-        category_slug=category,
-        store_id=store,
-        page=page,
-        page_size=page_size,
-    )
+    """
+    search and filter products. returns paginated results with store prices.
+
+    page is offset pagination (kept for older clients). passing cursor
+    switches to keyset pagination, which stays fast on deep pages.
+    """
+    category_id = await category_registry.resolve(category) if category else None
+    tags = [f"category:{category_id}"] if category_id and not q else ["products"]
+    try:
+        return await response_cache.cached_json(request, tags, lambda: product_service.search_products(
+            query=q,
+            category_slug=category,
+            store_id=store,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            with_count=with_count,
+            count_mode=count_mode,
+        ), ProductPage)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{product_id}")
-async def get_product(product_id: str):
+@router.get("/{product_id}", response_model=Product)
+async def get_product(request: Request, product_id: str):
     """get product detail with prices at all stores."""
-    product = await product_service.get_product(product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="product not found")
-    return product
 
+    async def fetch() -> dict:
+        product = await product_service.get_product(product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="product not found")
+        return product
 
-@router.get("/{product_id}/prices")
-async def get_product_prices(product_id: str):
+    return await response_cache.cached_json(request, [f"product:{product_id}"], fetch, Product)
+
+
+@router.get("/{product_id}/prices", response_model=list[StorePrice])
+async def get_product_prices(request: Request, product_id: str):
     """get price comparison across all stores for a product, sorted cheapest first."""
-    return await product_service.get_product_prices(product_id)
+    return await response_cache.cached_json(
+        request, [f"product:{product_id}"], lambda: product_service.get_product_prices(product_id),
+        list[StorePrice],
+    )
@@ -4,55 +4,36 @@ admin endpoint to trigger scraping.
 in production this would use proper role-based auth.
 """
 
-from pathlib import Path
-
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 
-from app.scraper.config import STORES, CATEGORIES, build_browse_url, StoreInfo, CategoryConfig
-from app.scraper.shoprite import StoreConfig, scrape_store
-from app.scraper.db_writer import ensure_store_exists, ensure_category_exists, upsert_products
+from app.scraper.config import STORES, CATEGORIES
+from app.scraper.db_writer import history_counters
+from app.scraper.jobs import job_queue
+from app.scraper.scheduler import DEFAULT_CONCURRENCY
 
 router = APIRouter(prefix="/scraper", tags=["scraper"])
 
+# how long DELETE /jobs/{id} waits for a running job to stop
+_CANCEL_WAIT_SECONDS = 10.0
+
 
 class ScrapeRequest(BaseModel):
     store_id: str | None = None
     category_slug: str | None = None
+    concurrency: int = Field(default=DEFAULT_CONCURRENCY, ge=1, le=8)
+    fast: bool = Field(default=False, description="block images/fonts/trackers and skip the fixed page settle delay")
+    page_fanout: int = Field(default=1, ge=1, le=6, description="tabs used to fetch pages 2..N of a category concurrently")
 
 
-class ScrapeResult(BaseModel):
-    store: str
-    category: str
-    products: int
-
-
-async def _run_scrape(store: StoreInfo, category: CategoryConfig) -> ScrapeResult:
-    """scrape one store+category and write to supabase."""
-    session_path = Path("data/shoprite_session.json")
-    config = StoreConfig(
-        store_id=store.store_id,
-        zip_code=store.zip_code,
-        browse_url=build_browse_url(store, category),
-    )
-
-    products = await scrape_store(
-        config,
-        session_state=session_path if session_path.exists() else None,
-    )
-
-    store_uuid = await ensure_store_exists(store)
-    cat_uuid = await ensure_category_exists(category)
-    await upsert_products(products, store_uuid, cat_uuid)
-
-    return ScrapeResult(store=store.name, category=category.name, products=len(products))
-
-
-@router.post("/run")
+@router.post("/run", status_code=202)
 async def trigger_scrape(body: ScrapeRequest = ScrapeRequest()):
     """
-    trigger a scrape run. optionally filter by store_id or category_slug.
-    scrapes all matching store x category combinations and writes to supabase.
+    queue a scrape run. optionally filter by store_id or category_slug.
+    returns a job id right away; poll GET /scraper/jobs/{job_id} for progress.
+    the job scrapes all matching store x category combinations and writes
+    each to supabase as it finishes.
     """
     stores = STORES
     categories = CATEGORIES
@@ -67,18 +48,53 @@ async def trigger_scrape(body: ScrapeRequest = ScrapeRequest()):
         if not categories:
             raise HTTPException(status_code=400, detail=f"unknown category: {body.category_slug}")
 
-    results = []
-    for store in stores:
-        for category in categories:
-            try:
-                result = await _run_scrape(store, category)
-                results.append(result.model_dump())
-            except Exception as e:
-                results.append({
-                    "store": store.name,
-                    "category": category.name,
-                    "products": 0,
-                    "error": str(e),
-                })
-
-    return {"results": results}
+    job = job_queue.submit(
+        combos=[(store, category) for store in stores for category in categories],
+        concurrency=body.concurrency,
+        fast=body.fast,
+        page_fanout=body.page_fanout,
+    )
+    return job.to_dict()
+
+
+@router.get("/jobs")
+async def list_jobs():
+    """recent scrape jobs, newest first (without per-combo results)."""
+    return [
+        {k: v for k, v in job.to_dict().items() if k != "results"}
+        for job in job_queue.recent()
+    ]
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """status, progress and per-combo results/durations of a scrape job."""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job.to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    cancel a queued or running scrape job. combos already written stay written.
+
+    a running job is given a few seconds to stop, so the response shows it
+    cancelled; if it is still unwinding, 202 with its id - poll
+    GET /scraper/jobs/{job_id} for the final status.
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"job already {job.status}")
+    if not await job_queue.wait_stopped(job_id, _CANCEL_WAIT_SECONDS):
+        return JSONResponse(status_code=202, content={"job_id": job.id, "status": "cancelling"})
+    return job.to_dict()
+
+
+@router.get("/stats")
+async def scraper_stats():
+    """price history write counters since the api process started."""
+    return dict(history_counters)
@@ -1,30 +1,50 @@
-from fastapi import APIRouter, Query
+from typing import Literal
 
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.core.pagination import InvalidCursorError
+from app.core.response_cache import response_cache
+from app.schemas import Store, StoreProductPage
 from app.services import store_service
 
 router = APIRouter(prefix="/stores", tags=["stores"])
 
 
-@router.get("")
+@router.get("", response_model=list[Store])
 async def list_stores(
+    request: Request,
     chain: str | None = Query(default=None, description="filter by chain (e.g. shoprite)"),
     zip_code: str | None = Query(default=None, description="filter by zip code"),
 ):
     """list all stores."""
-    return await store_service.list_stores(chain=chain, zip_code=zip_code)
+    return await response_cache.cached_json(
+        request, ["stores"], lambda: store_service.list_stores(chain=chain, zip_code=zip_code), list[Store],
+    )
 
 
-@router.get("/{store_id}/products")
+@router.get("/{store_id}/products", response_model=StoreProductPage)
 async def get_store_products(
+    request: Request,
     store_id: str,
     category: str | None = Query(default=None, description="filter by category slug"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = Query(default=None, description="keyset pagination: empty for the first page, then next_cursor"),
+    with_count: bool = Query(default=False, description="include the total count in cursor pages"),
+    count_mode: Literal["exact", "planned", "estimated"] = Query(
+        default="exact", description="how the total is counted: exact, planned (estimate) or estimated"
+    ),
 ):
-    """get products available at a specific store with prices."""
-    return await store_service.get_store_products(
-        store_id=store_id,
-        category_slug=category,
-        page=page,
-        page_size=page_size,
-    )
+    """get products available at a specific store with prices, cheapest first."""
+    try:
+        return await response_cache.cached_json(request, [f"store:{store_id}"], lambda: store_service.get_store_products(
+            store_id=store_id,
+            category_slug=category,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            with_count=with_count,
+            count_mode=count_mode,
+        ), StoreProductPage)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
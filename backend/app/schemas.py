@@ -0,0 +1,196 @@
+"""
+response models for the large catalog and grocery list responses, and the
+grocery list shopping plan.
+
+the services return supabase rows as plain dicts; these models describe
+them for the openapi docs and let responses be encoded by pydantic's rust
+core (TypeAdapter.dump_json) instead of jsonable_encoder + json.dumps,
+which was the bulk of the cpu on a 200-product page.
+
+the rows come from our own select strings, so the models are lenient:
+embedded rows may be null, unknown columns are kept (extra="allow") and
+numeric store numbers are accepted as strings. adding a column to a select
+doesn't need a model change to reach clients, only to be documented.
+
+encode a response with app.core.response_cache.encode_json(data, Model).
+validation runs once per encode, and catalog bodies are encoded once per
+cache fill.
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+
+class _Row(BaseModel):
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+
+class CategoryRef(_Row):
+    id: str | None = None
+    name: str
+    slug: str
+
+
+class StoreRef(_Row):
+    id: str | None = None
+    name: str
+    chain: str | None = None
+    store_number: str | None = None
+    zip_code: str | None = None
+
+
+class Store(StoreRef):
+    id: str
+    address: str | None = None
+
+
+class StorePrice(_Row):
+    price: float | None = None
+    sale_price: float | None = None
+    in_stock: bool | None = None
+    store_id: str | None = None
+    updated_at: str | None = None
+    stores: StoreRef | None = None
+
+
+class Nutrition(_Row):
+    fdc_id: int | None = None
+    calories_kcal: float | None = None
+    protein_g: float | None = None
+    fat_g: float | None = None
+    carbs_g: float | None = None
+    fiber_g: float | None = None
+    sodium_mg: float | None = None
+    cholesterol_mg: float | None = None
+    sugar_g: float | None = None
+
+
+class ProductSummary(_Row):
+    id: str
+    name: str
+    brand: str | None = None
+    image_url: str | None = None
+    unit_size: str | None = None
+    upc: str | None = None
+    product_categories: CategoryRef | None = None
+
+
+class Product(ProductSummary):
+    """a product with its price at every store (list rows and the detail page)."""
+    store_products: list[StorePrice] = []
+    product_nutrition: Nutrition | None = None
+
+
+class ProductPage(_Row):
+    data: list[Product]
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+class StoreProduct(_Row):
+    id: str
+    price: float | None = None
+    sale_price: float | None = None
+    in_stock: bool | None = None
+    products: ProductSummary | None = None
+
+
+class StoreProductPage(_Row):
+    data: list[StoreProduct]
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+class GroceryListItem(_Row):
+    id: str
+    quantity: int = 1
+    is_checked: bool = False
+    custom_item_name: str | None = None
+    products: Product | None = None
+
+
+class GroceryListDetail(_Row):
+    id: str
+    name: str
+    status: str | None = None
+    budget_limit: float | None = None
+    created_at: str | None = None
+    updated_at: str | None = None
+    grocery_list_items: list[GroceryListItem] = []
+
+
+class PlanStore(_Row):
+    id: str
+    name: str | None = None
+    chain: str | None = None
+
+
+class StoreTotal(_Row):
+    store: PlanStore
+    total: float
+    missing_items: list[str] = []
+
+
+class SingleStorePlan(StoreTotal):
+    within_budget: bool | None = None
+    over_budget_by: float | None = None
+
+
+class SplitBasket(_Row):
+    store: PlanStore
+    subtotal: float
+    items: list[str]
+
+
+class SplitPlan(_Row):
+    stores: list[SplitBasket]
+    total: float
+    savings_vs_single_store: float | None = None
+    missing_items: list[str] = []
+    exact: bool
+    within_budget: bool | None = None
+    over_budget_by: float | None = None
+
+
+class BasketPlan(_Row):
+    """GET /grocery-lists/{id}/optimize (app.services.basket_optimizer)."""
+    list_id: str
+    budget_limit: float | None = None
+    items_priced: int
+    unpriced_items: list[str] = []
+    stores: list[StoreTotal] = []
+    single_store: SingleStorePlan | None = None
+    split: SplitPlan | None = None
+
+
+class StoreListTotal(_Row):
+    store_id: str
+    name: str | None = None
+    chain: str | None = None
+    store_number: str | None = None
+    total: float
+    items_priced: int
+    missing_items: int
+    within_budget: bool | None = None
+    updated_at: str | None = None
+
+
+class ListTotals(_Row):
+    """GET /grocery-lists/{id}/totals (grocery_list_service.get_list_totals)."""
+    list_id: str
+    name: str
+    budget_limit: float | None = None
+    product_lines: int
+    stores: list[StoreListTotal] = []
+
+
+class ItemOpResult(_Row):
+    index: int
+    op: str
+    status: int
+    item: dict | None = None
+    error: str | None = None
+
+
+class ItemBatchResult(_Row):
+    """POST /grocery-lists/{id}/items:batch (grocery_list_service.apply_item_ops)."""
+    results: list[ItemOpResult]
@@ -7,18 +7,58 @@ handles the full pipeline:
 3. upsert store_products (current price at store)
 4. insert store_product_price_history (track price changes)
 
+steps 2-4 are set-based: a whole category is written in a few bulk
+postgrest calls. the store_products upsert relies on the unique
+(store_id, product_id) index from migrations/0001_store_products_unique.sql.
+
+by default price history is change-only: a history row is written when
+price or sale_price differ from the current store_products row, plus a
+periodic heartbeat row so an unchanged price still shows up in the log
+(store_products.last_history_at, migrations/0002_store_products_last_history_at.sql).
+
+write_category() takes a finished scrape. write_category_stream() takes the
+batches from shoprite.stream_store() and writes each one while the scraper
+keeps loading pages, so writes overlap the scrape and a scrape that fails
+halfway still leaves its earlier pages in the database.
+
+both then reconcile the per-store grocery list totals for the products
+whose price changed (reconcile_list_totals, migrations/0006).
+
 uses the supabase service key for full DB access (bypasses RLS).
 """
 
+import asyncio
 import logging
-from datetime import datetime, timezone
-
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from app.core.counts import count_cache
+from app.core.response_cache import response_cache
 from app.core.supabase import get_supabase
-from app.scraper.shoprite import ShopRiteProduct
+from app.scraper.shoprite import ShopRiteProduct, _dedup_products
 from app.scraper.config import StoreInfo, CategoryConfig
+from app.services.category_registry import category_registry
+from app.services.search_index import refresh_products
 
 logger = logging.getLogger(__name__)
 
+# values per `in` filter (keeps the request url short) and rows per bulk write
+_IN_CHUNK = 100
+_WRITE_CHUNK = 500
+
+# scraped batches buffered between the scraper and the writer
+_STREAM_BUFFER = 4
+
+# how often an unchanged price still gets a history row in "changes" mode
+HISTORY_HEARTBEAT = timedelta(days=7)
+
+# running totals since process start, exposed at GET /scraper/stats
+history_counters: Counter[str] = Counter()
+
 
 async def ensure_store_exists(store: StoreInfo) -> str:
     """
@@ -27,14 +67,14 @@ async def ensure_store_exists(store: StoreInfo) -> str:
     """
     sb = get_supabase()
 
-    result = sb.table("stores").select("id").eq(
+    result = await sb.table("stores").select("id").eq(
         "store_number", store.store_id
     ).eq("chain", store.chain).execute()
 
     if result.data:
         return result.data[0]["id"]
 
-    result = sb.table("stores").insert({
+    result = await sb.table("stores").insert({
         "name": store.name,
         "chain": store.chain,
         "store_number": store.store_id,
@@ -46,6 +86,7 @@ async def ensure_store_exists(store: StoreInfo) -> str:
 
     store_uuid = result.data[0]["id"]
     logger.info("created store %s with uuid %s", store.name, store_uuid)
+    await response_cache.invalidate(["stores"])
     return store_uuid
 
 
@@ -56,117 +97,429 @@ async def ensure_category_exists(category: CategoryConfig) -> str:
     """
     sb = get_supabase()
 
-    result = sb.table("product_categories").select("id").eq(
+    result = await sb.table("product_categories").select("id").eq(
         "slug", category.slug
     ).execute()
 
     if result.data:
         return result.data[0]["id"]
 
-    result = sb.table("product_categories").insert({
+    result = await sb.table("product_categories").insert({
         "name": category.name,
         "slug": category.slug,
     }).execute()
 
     cat_uuid = result.data[0]["id"]
     logger.info("created category %s with uuid %s", category.name, cat_uuid)
+    category_registry.add({"id": cat_uuid, "name": category.name, "slug": category.slug})
     return cat_uuid
 
 
+def _chunks(items: list, size: int) -> list[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _product_key(product: ShopRiteProduct) -> str:
+    """identity of a scraped product within a batch: upc when present, else name."""
+    return product.upc or product.name
+
+
+async def _resolve_existing_products(sb, products: list[ShopRiteProduct]) -> dict[str, str]:
+    """
+    find products that already exist, in a few `in` queries instead of one
+    lookup per product. matches on upc first, then on name (+ brand when the
+    scraped product has one). returns product key -> product uuid.
+    """
+    by_upc: dict[str, str] = {}
+    upcs = sorted({p.upc for p in products if p.upc})
+    for chunk in _chunks(upcs, _IN_CHUNK):
+        result = await sb.table("products").select("id, upc").in_("upc", chunk).execute()
+        by_upc.update({row["upc"]: row["id"] for row in result.data})
+
+    unmatched = [p for p in products if not (p.upc and p.upc in by_upc)]
+    by_name: dict[str, list[dict]] = {}
+    names = sorted({p.name for p in unmatched})
+    for chunk in _chunks(names, _IN_CHUNK):
+        result = await sb.table("products").select("id, name, brand").in_("name", chunk).execute()
+        for row in result.data:
+            by_name.setdefault(row["name"], []).append(row)
+
+    existing: dict[str, str] = {}
+    for product in products:
+        if product.upc and product.upc in by_upc:
+            existing[_product_key(product)] = by_upc[product.upc]
+            continue
+        candidates = by_name.get(product.name, [])
+        if product.brand:
+            candidates = [c for c in candidates if c["brand"] == product.brand]
+        if candidates:
+            existing[_product_key(product)] = candidates[0]["id"]
+    return existing
+
+
+async def _current_store_prices(sb, store_uuid: str, product_uuids: list[str]) -> dict[str, dict]:
+    """current store_products rows for these products at this store, keyed by product_id."""
+    current: dict[str, dict] = {}
+    for chunk in _chunks(product_uuids, _IN_CHUNK):
+        result = await sb.table("store_products").select(
+            "product_id, price, sale_price, last_history_at"
+        ).eq("store_id", store_uuid).in_("product_id", chunk).execute()
+        current.update({row["product_id"]: row for row in result.data})
+    return current
+
+
+def _same_price(a: float | None, b: float | None) -> bool:
+    if a is None or b is None:
+        return a is b
+    return round(float(a), 2) == round(float(b), 2)
+
+
+def _history_due(
+    product: ShopRiteProduct,
+    current: dict | None,
+    now: datetime,
+    heartbeat: timedelta | None,
+) -> tuple[bool, str]:
+    """whether this scrape needs a price history row, and why."""
+    if current is None:
+        return True, "new"
+    if not _same_price(product.price, current["price"]) or not _same_price(product.sale_price, current["sale_price"]):
+        return True, "changed"
+    last = current.get("last_history_at")
+    if last is None:
+        # never recorded, or the last history insert for it failed
+        return True, "heartbeat"
+    if heartbeat is not None and datetime.fromisoformat(last) <= now - heartbeat:
+        return True, "heartbeat"
+    return False, "unchanged"
+
+
+async def _write_rows(
+    stage: str,
+    rows: list[dict],
+    write: Callable[[list[dict]], Any],
+    describe: Callable[[dict], str],
+    failed: list[dict],
+) -> list[dict]:
+    """
+    run write(chunk).execute() for each chunk of rows and return the written rows.
+
+    if a bulk call fails, the chunk is retried row by row so one bad row only
+    costs itself. rows that still fail are appended to `failed`.
+    """
+    written: list[dict] = []
+    for chunk in _chunks(rows, _WRITE_CHUNK):
+        try:
+            result = await write(chunk).execute()
+            written.extend(result.data)
+            continue
+        except Exception as e:
+            logger.warning("bulk %s write of %d rows failed, retrying row by row: %s", stage, len(chunk), e)
+
+        for row in chunk:
+            try:
+                result = await write([row]).execute()
+                written.extend(result.data)
+            except Exception as e:
+                logger.error("failed to write %s row for %s: %s", stage, describe(row), e)
+                failed.append({"product": describe(row), "stage": stage, "error": str(e)})
+    return written
+
+
 async def upsert_products(
     products: list[ShopRiteProduct],
     store_uuid: str,
     category_uuid: str,
+    history_mode: str = "changes",
+    heartbeat: timedelta | None = HISTORY_HEARTBEAT,
+    price_changed: set[str] | None = None,
 ) -> dict:
     """
     upsert a batch of scraped products into supabase.
 
-    returns summary: {"products_upserted": int, "prices_upserted": int}
-
-    strategy:
-    - products with UPC: upsert matching on upc
-    - products without UPC: upsert matching on name (less reliable)
-    - store_products: upsert matching on (store_id, product_id)
-    - price_history: always insert (append-only log)
+    returns summary: {"products_upserted": int, "prices_upserted": int,
+    "history_inserted": int, "history_skipped": int,
+    "failed": [{"product", "stage", "error"}, ...]}
+
+    works set-based, in a handful of bulk calls per category rather than
+    several round-trips per product:
+    - existing products are resolved by upc, then name+brand, in `in` queries
+    - existing products are upserted on id, new ones bulk-inserted
+    - store_products: bulk upsert on (store_id, product_id)
+    - price_history: bulk insert (append-only log). with history_mode="changes"
+      only for new products, changed prices and heartbeats (every `heartbeat`,
+      None to disable); history_mode="all" writes a row for every product.
+      last_history_at is stamped afterwards, only on the rows whose history
+      row was written, so a failed insert is retried by the next scrape.
+
+    a failing row is reported in "failed" without dropping the rest of the batch.
+    the ids of products whose price at this store is new or changed are added
+    to `price_changed`, if given (see reconcile_list_totals).
     """
-    sb = get_supabase()
-    products_upserted = 0
-    prices_upserted = 0
+    if history_mode not in ("changes", "all"):
+        raise ValueError(f"unknown history_mode: {history_mode!r}")
 
+    sb = get_supabase()
+    now_dt = datetime.now(timezone.utc)
+    now = now_dt.isoformat()
+    products = _dedup_products(products)
+    failed: list[dict] = []
+
+    existing = await _resolve_existing_products(sb, products)
+
+    # 1. products. rows are grouped by column set: a bulk upsert writes every
+    # listed column, so mixing rows with and without upc would null out the
+    # upc of matched products that were scraped without one.
+    updates: dict[bool, list[dict]] = {True: [], False: []}
+    inserts: dict[bool, list[dict]] = {True: [], False: []}
     for product in products:
+        product_data = {
+            "name": product.name,
+            "brand": product.brand,
+            "image_url": product.image_url,
+            "unit_size": product.unit_size,
+            "category_id": category_uuid,
+            "updated_at": now,
+        }
+        if product.upc:
+            product_data["upc"] = product.upc
+
+        product_uuid = existing.get(_product_key(product))
+        if product_uuid:
+            updates[bool(product.upc)].append({"id": product_uuid, **product_data})
+        else:
+            inserts[bool(product.upc)].append({**product_data, "created_at": now})
+
+    def product_label(row: dict) -> str:
+        return row.get("upc") or row["name"]
+
+    product_ids: dict[str, str] = {}
+    written_products: list[dict] = []
+    for has_upc in (True, False):
+        written = await _write_rows(
+            "products", updates[has_upc],
+            lambda chunk: sb.table("products").upsert(chunk, on_conflict="id", default_to_null=False),
+            product_label, failed,
+        )
+        written += await _write_rows(
+            "products", inserts[has_upc],
+            lambda chunk: sb.table("products").insert(chunk, default_to_null=False),
+            product_label, failed,
+        )
+        for row in written:
+            product_ids[row["upc"] if has_upc else row["name"]] = row["id"]
+        written_products += written
+
+    # 2. store_products (current price at this store). current prices are
+    # read first, in bulk, to decide which products need a history row.
+    labels = {product_ids[key]: key for key in map(_product_key, products) if key in product_ids}
+    current = await _current_store_prices(sb, store_uuid, list(labels))
+
+    store_product_rows = []
+    history_due: set[str] = set()
+    reasons: Counter[str] = Counter()
+    reasons_by_id: dict[str, str] = {}
+    for p in products:
+        product_uuid = product_ids.get(_product_key(p))
+        if product_uuid is None:
+            continue
+        due, reason = _history_due(p, current.get(product_uuid), now_dt, heartbeat)
+        if history_mode == "all":
+            due = True
+        reasons[reason] += 1
+        reasons_by_id[product_uuid] = reason
+        if due:
+            history_due.add(product_uuid)
+
+        existing_sp = current.get(product_uuid)
+        store_product_rows.append({
+            "store_id": store_uuid,
+            "product_id": product_uuid,
+            "price": p.price,
+            "sale_price": p.sale_price,
+            "in_stock": True,
+            "data_source": "scraper",
+            "updated_at": now,
+            # set once its history row is in (step 4); null until then, so a
+            # failed history insert is retried on the next scrape
+            "last_history_at": None if due else (existing_sp or {}).get("last_history_at"),
+        })
+    store_products = await _write_rows(
+        "store_products", store_product_rows,
+        lambda chunk: sb.table("store_products").upsert(chunk, on_conflict="store_id,product_id"),
+        lambda row: labels[row["product_id"]], failed,
+    )
+
+    if price_changed is not None:
+        price_changed.update(
+            row["product_id"] for row in store_products if reasons_by_id.get(row["product_id"]) in ("new", "changed")
+        )
+
+    # 3. price history (append-only)
+    history_rows = [
+        {"store_product_id": row["id"], "price": row["price"], "sale_price": row["sale_price"]}
+        for row in store_products
+        if row["product_id"] in history_due
+    ]
+    sp_labels = {row["id"]: labels[row["product_id"]] for row in store_products}
+    history = await _write_rows(
+        "store_product_price_history", history_rows,
+        lambda chunk: sb.table("store_product_price_history").insert(chunk),
+        lambda row: sp_labels[row["store_product_id"]], failed,
+    )
+
+    # 4. stamp last_history_at on the rows whose history row was written
+    recorded = [row["store_product_id"] for row in history]
+    for chunk in _chunks(recorded, _IN_CHUNK):
         try:
-            # 1. upsert into products table
-            product_data = {
-                "name": product.name,
-                "brand": product.brand,
-                "image_url": product.image_url,
-                "unit_size": product.unit_size,
-                "category_id": category_uuid,
-                "updated_at": datetime.now(timezone.utc).isoformat(),
-            }
-            if product.upc:
-                product_data["upc"] = product.upc
-
-            # try to find existing product by UPC first, then by name+brand
-            existing = None
-            if product.upc:
-                result = sb.table("products").select("id").eq("upc", product.upc).execute()
-                if result.data:
-                    existing = result.data[0]
-
-            if not existing:
-                query = sb.table("products").select("id").eq("name", product.name)
-                if product.brand:
-                    query = query.eq("brand", product.brand)
-                result = query.execute()
-                if result.data:
-                    existing = result.data[0]
-
-            if existing:
-                product_uuid = existing["id"]
-                sb.table("products").update(product_data).eq("id", product_uuid).execute()
-            else:
-                product_data["created_at"] = datetime.now(timezone.utc).isoformat()
-                result = sb.table("products").insert(product_data).execute()
-                product_uuid = result.data[0]["id"]
-
-            products_upserted += 1
-
-            # 2. upsert into store_products (current price at this store)
-            store_product_data = {
-                "store_id": store_uuid,
-                "product_id": product_uuid,
-                "price": product.price,
-                "sale_price": product.sale_price,
-                "in_stock": True,
-                "data_source": "scraper",
-                "updated_at": datetime.now(timezone.utc).isoformat(),
-            }
-
-            sp_result = sb.table("store_products").select("id").eq(
-                "store_id", store_uuid
-            ).eq("product_id", product_uuid).execute()
-
-            if sp_result.data:
-                store_product_id = sp_result.data[0]["id"]
-                sb.table("store_products").update(store_product_data).eq(
-                    "id", store_product_id
-                ).execute()
-            else:
-                sp_insert = sb.table("store_products").insert(store_product_data).execute()
-                store_product_id = sp_insert.data[0]["id"]
-
-            prices_upserted += 1
-
-            # 3. insert price history (append-only)
-            sb.table("store_product_price_history").insert({
-                "store_product_id": store_product_id,
-                "price": product.price,
-                "sale_price": product.sale_price,
-            }).execute()
-
+            await sb.table("store_products").update({"last_history_at": now}).in_("id", chunk).execute()
         except Exception as e:
-            logger.error("failed to upsert product %s: %s", product.name, e)
-            continue
+            # left null: these get one more history row on the next scrape
+            logger.warning("failed to stamp last_history_at on %d store_products rows: %s", len(chunk), e)
+
+    # keep the in-process search index (if loaded) in step with the new
+    # names and prices
+    refresh_products(written_products)
+    # and drop cached listing counts and responses this write may have changed
+    count_cache.invalidate(category_id=category_uuid, store_id=store_uuid)
+    await response_cache.invalidate([
+        "products", f"category:{category_uuid}", f"store:{store_uuid}",
+        *(f"product:{product_uuid}" for product_uuid in product_ids.values()),
+    ])
+
+    history_counters["history_inserted"] += len(history)
+    history_counters["history_skipped"] += len(store_products) - len(history_rows)
+    for reason, n in reasons.items():
+        history_counters[f"history_{reason}"] += n
+
+    return {
+        "products_upserted": len(product_ids),
+        "prices_upserted": len(store_products),
+        "history_inserted": len(history),
+        "history_skipped": len(store_products) - len(history_rows),
+        "failed": failed,
+    }
+
+
+async def reconcile_list_totals(product_uuids: set[str]) -> int:
+    """
+    recompute the per-store grocery list totals (migrations/0006) of every
+    list holding these products; returns how many lists.
+
+    the totals triggers apply deltas from their own transaction's snapshot,
+    so a list item added while this scrape changed its product's price can
+    be left on the old price. called once a scrape's writes are done, for
+    the products whose price changed. failures are logged, not raised: the
+    prices are already written, and a list can be repaired later with
+    refresh_list_store_totals(list_id).
+    """
+    sb = get_supabase()
+    refreshed = 0
+    for chunk in _chunks(sorted(product_uuids), _WRITE_CHUNK):
+        try:
+            result = await sb.rpc("refresh_list_store_totals_for_products", {"p_products": chunk}).execute()
+            refreshed += result.data or 0
+        except Exception as e:
+            logger.warning("reconciling grocery list totals for %d products failed: %s", len(chunk), e)
+    return refreshed
 
-    return {"products_upserted": products_upserted, "prices_upserted": prices_upserted}
+
+async def write_category(
+    store: StoreInfo,
+    category: CategoryConfig,
+    products: list[ShopRiteProduct],
+) -> dict:
+    """
+    write one scraped store + category: make sure the store and category rows
+    exist, then upsert the products and reconcile the grocery list totals
+    they touched. usable as a scheduler.run_scrapes handle.
+    """
+    store_uuid = await ensure_store_exists(store)
+    cat_uuid = await ensure_category_exists(category)
+    price_changed: set[str] = set()
+    summary = await upsert_products(products, store_uuid, cat_uuid, price_changed=price_changed)
+    summary["lists_reconciled"] = await reconcile_list_totals(price_changed)
+    return summary
+
+
+async def write_category_stream(
+    store: StoreInfo,
+    category: CategoryConfig,
+    batches: AsyncIterator[list[ShopRiteProduct]],
+) -> dict:
+    """
+    write one store + category from a stream of product batches (see
+    shoprite.stream_store). usable as a scheduler.run_scrapes handle_stream.
+
+    the scraper runs in its own task and hands batches over through a small
+    queue, so the next pages keep loading while a batch is written. batches
+    are deduplicated against everything already written in this call.
+
+    returns the upsert_products summary summed over all batches, plus
+    "products_scraped", "batches", "write_seconds" and "lists_reconciled"
+    (see reconcile_list_totals). if the scrape fails, every batch it
+    produced is still written, and its lists reconciled, before the error
+    is re-raised.
+    """
+    store_uuid = await ensure_store_exists(store)
+    cat_uuid = await ensure_category_exists(category)
+
+    queue: asyncio.Queue[list[ShopRiteProduct] | None] = asyncio.Queue(maxsize=_STREAM_BUFFER)
+
+    async def pump() -> None:
+        try:
+            async with aclosing(batches):
+                async for batch in batches:
+                    await queue.put(batch)
+        finally:
+            # on cancel the writer has failed and nobody drains the queue
+            if not asyncio.current_task().cancelling():
+                await queue.put(None)
+
+    scraper = asyncio.create_task(pump())
+    summary: dict = {
+        "products_scraped": 0,
+        "batches": 0,
+        "products_upserted": 0,
+        "prices_upserted": 0,
+        "history_inserted": 0,
+        "history_skipped": 0,
+        "failed": [],
+        "write_seconds": 0.0,
+    }
+    seen: set[str] = set()
+    price_changed: set[str] = set()
+    try:
+        while (batch := await queue.get()) is not None:
+            batch = [p for p in _dedup_products(batch) if _product_key(p) not in seen]
+            seen.update(map(_product_key, batch))
+            if not batch:
+                continue
+
+            write_start = time.monotonic()
+            result = await upsert_products(batch, store_uuid, cat_uuid, price_changed=price_changed)
+            summary["write_seconds"] += time.monotonic() - write_start
+            summary["products_scraped"] += len(batch)
+            summary["batches"] += 1
+            for key in ("products_upserted", "prices_upserted", "history_inserted", "history_skipped"):
+                summary[key] += result[key]
+            summary["failed"].extend(result["failed"])
+    finally:
+        if not scraper.done():
+            scraper.cancel()
+        try:
+            await scraper
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            logger.warning(
+                "scrape of %s / %s failed after %d products in %d batches were written",
+                store.name, category.name, summary["products_scraped"], summary["batches"],
+            )
+            raise
+        finally:
+            # also after a failed scrape: its earlier batches were written
+            summary["lists_reconciled"] = await reconcile_list_totals(price_changed)
+
+    summary["write_seconds"] = round(summary["write_seconds"], 2)
+    return summary
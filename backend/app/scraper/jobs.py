@@ -0,0 +1,238 @@
+"""
+in-process background queue for scrape runs.
+
+POST /scraper/run used to scrape inline and hold the http request open for
+the whole run. now it submits a ScrapeJob here and returns the job id right
+away; a small pool of asyncio worker tasks (started by the app lifespan)
+takes jobs off the queue and runs them through scheduler.run_scrapes.
+each combo is written with db_writer.write_category_stream, so pages reach
+the database while the rest of the category is still loading. when the
+scrape succeeds, newly scraped products are matched to fdc nutrition data
+(services.nutrition.enrich_products) as part of the same job.
+
+job state lives in memory only: it is lost on restart, and only the most
+recent _MAX_FINISHED_JOBS finished jobs are kept for polling.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.scraper.config import StoreInfo, CategoryConfig
+from app.core.config import settings
+from app.scraper.db_writer import write_category_stream
+from app.services.nutrition import enrich_products
+from app.scraper.scheduler import ComboResult, run_scrapes, DEFAULT_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+SESSION_PATH = Path("data/shoprite_session.json")
+
+_MAX_FINISHED_JOBS = 50
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+_FINISHED = {SUCCEEDED, FAILED, CANCELLED}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class ScrapeJob:
+    """one queued or running scrape run and its per-combo results so far."""
+    id: str
+    combos: list[tuple[StoreInfo, CategoryConfig]]
+    concurrency: int = DEFAULT_CONCURRENCY
+    fast: bool = False
+    page_fanout: int = 1
+    status: str = QUEUED
+    created_at: str = field(default_factory=_now)
+    started_at: str | None = None
+    finished_at: str | None = None
+    error: str | None = None
+    results: list[ComboResult] = field(default_factory=list)
+    enrichment: dict | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "progress": {
+                "done": len(self.results),
+                "failed": sum(1 for r in self.results if r.error),
+                "total": len(self.combos),
+                "products": sum(r.products for r in self.results),
+            },
+            "results": [r.to_dict() for r in self.results],
+            "enrichment": self.enrichment,
+        }
+
+
+def _mark_cancelled(job: ScrapeJob) -> None:
+    """
+    record a cancellation _run didn't: a task cancelled before its first
+    step never runs _run, so nothing else would move the job out of queued.
+    """
+    if job.status not in _FINISHED:
+        job.status = CANCELLED
+        job.finished_at = _now()
+
+
+class JobQueue:
+    """asyncio queue of ScrapeJobs drained by `workers` background tasks."""
+
+    def __init__(self, workers: int = 1) -> None:
+        self.workers = workers
+        self._queue: asyncio.Queue[ScrapeJob] | None = None
+        self._jobs: OrderedDict[str, ScrapeJob] = OrderedDict()
+        self._worker_tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i), name=f"scrape-worker-{i}")
+            for i in range(max(1, self.workers))
+        ]
+
+    async def stop(self) -> None:
+        for job in self._jobs.values():
+            if job.status not in _FINISHED:
+                self.cancel(job.id)
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+
+    def submit(
+        self,
+        combos: list[tuple[StoreInfo, CategoryConfig]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        fast: bool = False,
+        page_fanout: int = 1,
+    ) -> ScrapeJob:
+        if self._queue is None:
+            raise RuntimeError("job queue is not running")
+        job = ScrapeJob(
+            id=str(uuid.uuid4()),
+            combos=combos,
+            concurrency=concurrency,
+            fast=fast,
+            page_fanout=page_fanout,
+        )
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> ScrapeJob | None:
+        return self._jobs.get(job_id)
+
+    def recent(self) -> list[ScrapeJob]:
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        """cancel a queued or running job. returns False if it already finished."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in _FINISHED:
+            return False
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            # still queued: the worker skips it when it comes up
+            job.status = CANCELLED
+            job.finished_at = _now()
+        return True
+
+    async def wait_stopped(self, job_id: str, timeout: float) -> bool:
+        """
+        after cancel(): wait up to `timeout` seconds for a running job to
+        unwind (close its browser, finish the batch being written). returns
+        whether it has stopped.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.task is None:
+            return True
+        done, _ = await asyncio.wait({job.task}, timeout=timeout)
+        if done:
+            _mark_cancelled(job)
+        return bool(done)
+
+    def _prune(self) -> None:
+        finished = [j.id for j in self._jobs.values() if j.status in _FINISHED]
+        for job_id in finished[:max(0, len(finished) - _MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == CANCELLED:
+                    continue
+                job.task = asyncio.create_task(self._run(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    _mark_cancelled(job)
+                    logger.info("scrape job %s cancelled after %d combos", job.id, len(job.results))
+                    if asyncio.current_task().cancelling():
+                        raise  # the worker itself is being stopped
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ScrapeJob) -> None:
+        job.status = RUNNING
+        job.started_at = _now()
+        logger.info("scrape job %s started: %d combos", job.id, len(job.combos))
+        try:
+            await run_scrapes(
+                combos=job.combos,
+                handle_stream=write_category_stream,
+                session_path=SESSION_PATH,
+                concurrency=job.concurrency,
+                fast=job.fast,
+                page_fanout=job.page_fanout,
+                on_result=job.results.append,
+            )
+        except asyncio.CancelledError:
+            # set here rather than in the worker, so it is in place as soon
+            # as the task is done (see wait_stopped)
+            job.status = CANCELLED
+            job.finished_at = _now()
+            raise
+        except Exception as e:
+            logger.exception("scrape job %s failed", job.id)
+            job.status = FAILED
+            job.error = str(e)
+            job.finished_at = _now()
+            return
+
+        if settings.NUTRITION_ENRICH_AFTER_SCRAPE and any(not r.error for r in job.results):
+            # a failed enrichment doesn't fail the scrape; stale products are
+            # picked up again by the next run
+            try:
+                job.enrichment = await enrich_products()
+            except Exception as e:
+                logger.exception("nutrition enrichment after scrape job %s failed", job.id)
+                job.enrichment = {"error": str(e)}
+        job.status = SUCCEEDED
+        job.finished_at = _now()
+
+
+job_queue = JobQueue()
@@ -0,0 +1,33 @@
+"""
+per-host request pacing for the scraper.
+
+concurrent scrapes share one HostRateLimiter so that, however many pages
+are open, requests to a given host are spaced at least min_interval apart.
+this keeps a parallel run from looking like a burst to cloudflare.
+"""
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class HostRateLimiter:
+    """spaces requests to the same host at least min_interval seconds apart."""
+
+    def __init__(self, min_interval: float = 1.0) -> None:
+        self.min_interval = min_interval
+        self._next_slot: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url: str) -> None:
+        """sleep until this host's next free slot, and claim it."""
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,210 @@
+"""
+concurrent store x category scrape scheduler.
+
+runs many scrape combos on one shared chromium instead of launching a
+browser per combo. each combo gets its own browser context (cookies and
+pages are isolated), and at most `concurrency` combos run at once.
+page loads are paced per host by a shared HostRateLimiter.
+
+a failed combo is retried with exponential backoff. a cloudflare block
+calls the optional on_blocked() hook once (e.g. to refresh the session
+file) while other combos wait, then the combo is retried.
+
+each combo's products are handed to `handle` (write to supabase, dump to
+json, ...) as soon as that combo finishes, and per-combo timing is
+reported in the results. alternatively `handle_stream` gets the combo's
+stream_store() generator and consumes pages as they are scraped.
+
+usage:
+    results = await run_scrapes(
+        combos=[(store, category) for store in STORES for category in CATEGORIES],
+        handle=write_to_db,
+        session_path=Path("data/shoprite_session.json"),
+        concurrency=4,
+    )
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+
+from app.scraper.config import StoreInfo, CategoryConfig, build_browse_url
+from app.scraper.rate_limit import HostRateLimiter
+from app.scraper.shoprite import (
+    StoreConfig,
+    ShopRiteProduct,
+    CloudflareBlockedError,
+    launch_browser,
+    scrape_store,
+    stream_store,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 3
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF = 2.0
+
+ComboHandler = Callable[[StoreInfo, CategoryConfig, list[ShopRiteProduct]], Awaitable[dict | None]]
+ComboStreamHandler = Callable[
+    [StoreInfo, CategoryConfig, AsyncIterator[list[ShopRiteProduct]]], Awaitable[dict | None]
+]
+
+
+@dataclass
+class ComboResult:
+    """outcome and timing of one store + category scrape."""
+    store: str
+    category: str
+    products: int = 0
+    attempts: int = 0
+    scrape_seconds: float = 0.0
+    handle_seconds: float = 0.0
+    duration: float = 0.0
+    error: str | None = None
+    details: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        if result["error"] is None:
+            del result["error"]
+        return result
+
+
+async def run_scrapes(
+    combos: list[tuple[StoreInfo, CategoryConfig]],
+    handle: ComboHandler | None = None,
+    handle_stream: ComboStreamHandler | None = None,
+    session_path: Path | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    backoff: float = DEFAULT_BACKOFF,
+    headless: bool = False,
+    fast: bool = False,
+    page_fanout: int = 1,
+    on_blocked: Callable[[], Awaitable[None]] | None = None,
+    on_result: Callable[[ComboResult], None] | None = None,
+) -> list[ComboResult]:
+    """
+    scrape every (store, category) combo and return one ComboResult each,
+    in the same order as `combos`. never raises for a single combo failing.
+
+    session_path is re-checked before every attempt, so a session refreshed
+    by on_blocked() is picked up by the retry.
+
+    fast enables scrape_store's fast-load mode (resource blocking, no fixed
+    settle delay). page_fanout is passed to scrape_store: pages 2..N of each
+    combo are fetched in up to that many tabs. every tab still goes through
+    the shared rate limiter, so per-host pacing holds.
+
+    handle_stream(store, category, batches) replaces handle when given: it
+    receives stream_store()'s batch generator instead of a finished list, so
+    scraping and handling overlap. it should return a dict with
+    "products_scraped" (and optionally "write_seconds"); scrape_seconds then
+    covers the whole overlapped run.
+
+    on_result(result) is called as each combo finishes, for progress reporting.
+    """
+    from playwright.async_api import async_playwright
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    rate_limiter = HostRateLimiter(min_interval)
+    blocked_lock = asyncio.Lock()
+    blocked_generation = 0
+
+    async def run_combo(browser, store: StoreInfo, category: CategoryConfig) -> ComboResult:
+        nonlocal blocked_generation
+        result = ComboResult(store=store.name, category=category.name)
+        config = StoreConfig(
+            store_id=store.store_id,
+            zip_code=store.zip_code,
+            browse_url=build_browse_url(store, category),
+        )
+
+        async with semaphore:
+            combo_start = time.monotonic()
+            while True:
+                result.attempts += 1
+                generation = blocked_generation
+                try:
+                    scrape_start = time.monotonic()
+                    if handle_stream is not None:
+                        batches = stream_store(
+                            config,
+                            session_state=session_path if session_path and session_path.exists() else None,
+                            browser=browser,
+                            rate_limiter=rate_limiter,
+                            fast=fast,
+                            page_fanout=page_fanout,
+                        )
+                        result.details = await handle_stream(store, category, batches) or {}
+                        result.scrape_seconds = round(time.monotonic() - scrape_start, 2)
+                        result.handle_seconds = round(result.details.get("write_seconds", 0.0), 2)
+                        result.products = result.details.get("products_scraped", 0)
+                        result.error = None
+                        break
+
+                    products = await scrape_store(
+                        config,
+                        session_state=session_path if session_path and session_path.exists() else None,
+                        browser=browser,
+                        rate_limiter=rate_limiter,
+                        fast=fast,
+                        page_fanout=page_fanout,
+                    )
+                    result.scrape_seconds = round(time.monotonic() - scrape_start, 2)
+
+                    if handle is not None:
+                        handle_start = time.monotonic()
+                        result.details = await handle(store, category, products) or {}
+                        result.handle_seconds = round(time.monotonic() - handle_start, 2)
+                    result.products = len(products)
+                    result.error = None
+                    break
+                except Exception as e:
+                    result.error = str(e)
+                    if result.attempts >= max_attempts:
+                        logger.error("FAILED %s / %s after %d attempts: %s",
+                                     store.name, category.name, result.attempts, e)
+                        break
+
+                    if isinstance(e, CloudflareBlockedError) and on_blocked is not None:
+                        async with blocked_lock:
+                            # only the first blocked combo refreshes; the rest
+                            # just retry with the session it produced.
+                            if generation == blocked_generation:
+                                logger.warning("cloudflare blocked %s / %s - refreshing session...",
+                                               store.name, category.name)
+                                try:
+                                    await on_blocked()
+                                except Exception as refresh_err:
+                                    logger.error("session refresh failed: %s", refresh_err)
+                                blocked_generation += 1
+                        continue
+
+                    delay = backoff * 2 ** (result.attempts - 1) * random.uniform(0.8, 1.2)
+                    logger.warning("%s / %s attempt %d failed (%s), retrying in %.1fs",
+                                   store.name, category.name, result.attempts, e, delay)
+                    await asyncio.sleep(delay)
+
+            result.duration = round(time.monotonic() - combo_start, 2)
+            logger.info("%s / %s: %d products in %.1fs (%d attempt(s))",
+                        store.name, category.name, result.products, result.duration, result.attempts)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p, headless=headless)
+        try:
+            return list(await asyncio.gather(
+                *(run_combo(browser, store, category) for store, category in combos)
+            ))
+        finally:
+            await browser.close()
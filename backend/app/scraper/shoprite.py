@@ -16,17 +16,58 @@ scripts/save_session.py, then pass the saved session file to scrape_store().
 
 pagination is handled by navigating to successive page urls increment accordingly and extracting
 fresh state from each page load.
+
+scrape_store() returns the whole category once every page is loaded.
+stream_store() yields each page's products as soon as it is parsed, so a
+writer can start on page 1 while later pages are still loading:
+
+    async for batch in stream_store(config, session_state=path):
+        await write(batch)
 """
 
+import asyncio
 import logging
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlsplit
+
+from app.scraper.rate_limit import HostRateLimiter
 
 logger = logging.getLogger(__name__)
 
 _PAGE_SIZE = 30
 
+# fast-load mode (see _load_page_state): resource types and third-party hosts
+# that play no part in rendering __PRELOADED_STATE__. cloudflare's own
+# challenge hosts must never be on this list.
+_BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+_BLOCKED_HOST_FRAGMENTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "nr-data.net",
+    "newrelic.com",
+    "criteo.com",
+    "adsrvr.org",
+    "bat.bing.com",
+    "pinterest.com",
+    "tiktok.com",
+    "quantummetric.com",
+    "qualtrics.com",
+)
+_STATE_TIMEOUT_MS = 15000
+
 
 class CloudflareBlockedError(RuntimeError):
     """raised when cloudflare challenge is detected during scraping."""
@@ -177,10 +218,31 @@ def _dedup_products(products: list[ShopRiteProduct]) -> list[ShopRiteProduct]:
     return result
 
 
+async def launch_browser(playwright, headless: bool = False):
+    """
+    launch chromium the way the scraper needs it.
+
+    cloudflare binds cf_clearance to the TLS/browser fingerprint.
+    headed mode avoids fingerprint mismatch entirely. if switching
+    to headless=True(switch back if you stop scraping after second page) keep the anti-detection args below they
+    suppress automation signals that cloudflare checks.
+    """
+    return await playwright.chromium.launch(
+        headless=headless,
+        args=[
+            "--disable-blink-features=AutomationControlled",
+        ],
+    )
+
+
 async def scrape_store(
     config: StoreConfig,
     session_state: str | Path | None = None,
     headless: bool = False,
+    browser=None,
+    rate_limiter: HostRateLimiter | None = None,
+    fast: bool = False,
+    page_fanout: int = 1,
 ) -> list[ShopRiteProduct]:
     """
     scrape all products for a single shoprite store + category.
@@ -206,8 +268,58 @@ async def scrape_store(
           3. if still blocked, headless needs session cookies from
              save_session.py and the anti-detection args below
 
+    browser: an already running playwright browser (see launch_browser()).
+        the scrape runs in its own context inside it and leaves the browser
+        open, so a scheduler can run many combos on one chromium. if None,
+        a browser is launched for this call and closed afterwards.
+
+    rate_limiter: shared per-host throttle, awaited before every page load.
+
+    fast: block images, fonts, media and third-party analytics, and read the
+        state as soon as __PRELOADED_STATE__ exists instead of waiting for the
+        load event plus a fixed 2000ms. per-page timings and bytes
+        transferred are logged in both modes.
+
+    page_fanout: once page 1 reports totalItems, fetch the remaining pages
+        concurrently in up to this many tabs of the same context. results
+        are merged in page order before dedup. 1 keeps the one-tab walk.
+
     edge case of 0 products but "successful" scrape ->
     raise RuntimeError if zero products are collected.
+
+    this collects stream_store() into one list; use stream_store() directly
+    to process pages as they arrive.
+    """
+    collected = [
+        product
+        async for batch in stream_store(
+            config, session_state, headless, browser, rate_limiter, fast, page_fanout,
+        )
+        for product in batch
+    ]
+    logger.info("scraped %d unique products from store %s", len(collected), config.store_id)
+    return collected
+
+
+async def stream_store(
+    config: StoreConfig,
+    session_state: str | Path | None = None,
+    headless: bool = False,
+    browser=None,
+    rate_limiter: HostRateLimiter | None = None,
+    fast: bool = False,
+    page_fanout: int = 1,
+) -> AsyncIterator[list[ShopRiteProduct]]:
+    """
+    async-generator form of scrape_store(): same arguments, but yields each
+    page's products as soon as that page is parsed, in page order.
+
+    dedup is incremental: a product already yielded on an earlier page is
+    dropped from later batches, and a page with nothing new yields nothing.
+    if a page load fails, every batch before it has already been yielded and
+    the error is raised from the generator.
+
+    raises RuntimeError at the end if no products were yielded at all.
     """
     from playwright.async_api import async_playwright
 
@@ -220,81 +332,289 @@ async def scrape_store(
                 "to create one."
             )
 
-    collected: list[ShopRiteProduct] = []
-
-    async with async_playwright() as p:
-        # cloudflare binds cf_clearance to the TLS/browser fingerprint.
-        # headed mode avoids fingerprint mismatch entirely. if switching
-        # to headless=True(switch back if you stop scraping after second page) keep the anti-detection args below they
-        # suppress automation signals that cloudflare checks.
-        browser = await p.chromium.launch(
-            headless=headless,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-            ],
+    seen: set[str] = set()
+    yielded = 0
+
+    async def unique(pages: AsyncIterator[list[ShopRiteProduct]]) -> AsyncIterator[list[ShopRiteProduct]]:
+        nonlocal yielded
+        async with aclosing(pages):
+            async for page_products in pages:
+                batch = []
+                for product in _dedup_products(page_products):
+                    key = product.upc if product.upc is not None else product.name
+                    if key not in seen:
+                        seen.add(key)
+                        batch.append(product)
+                if batch:
+                    yielded += len(batch)
+                    yield batch
+
+    if browser is None:
+        async with async_playwright() as p:
+            browser = await launch_browser(p, headless=headless)
+            try:
+                async with aclosing(unique(_iter_pages_in_browser(
+                    browser, config, session_state, rate_limiter, fast, page_fanout,
+                ))) as batches:
+                    async for batch in batches:
+                        yield batch
+            finally:
+                await browser.close()
+    else:
+        async with aclosing(unique(_iter_pages_in_browser(
+            browser, config, session_state, rate_limiter, fast, page_fanout,
+        ))) as batches:
+            async for batch in batches:
+                yield batch
+
+    if not yielded:
+        raise RuntimeError(
+            f"scrape completed for store {config.store_id} / "
+            f"{config.browse_url} but no products were collected - "
+            "check browse_url in StoreConfig. if cloudflare is active, "
+            "run scripts/save_session.py to refresh session cookies."
         )
-        context = await browser.new_context(
-            storage_state=str(session_state) if session_state else None,
-            user_agent=USER_AGENT,
+
+
+class _PageTraffic:
+    """request/byte counters for one browser context, reset per page load."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = 0
+        self.total_bytes = 0
+
+    def reset(self) -> None:
+        self.requests = self.bytes = self.blocked = 0
+
+    async def on_request_finished(self, request) -> None:
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        size = sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        self.requests += 1
+        self.bytes += size
+        self.total_bytes += size
+
+
+def _should_block(resource_type: str, url: str) -> bool:
+    if resource_type in _BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(url).netloc
+    return any(fragment in host for fragment in _BLOCKED_HOST_FRAGMENTS)
+
+
+async def _enable_fast_load(context, traffic: _PageTraffic) -> None:
+    """abort images, fonts, media and third-party trackers for every page in context."""
+
+    async def handle(route):
+        request = route.request
+        if _should_block(request.resource_type, request.url):
+            traffic.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
+
+
+def _page_url(config: StoreConfig, page_num: int) -> str:
+    """category url for page_num: &page=N is appended for pages 2+."""
+    url = config.browse_url
+    if page_num > 1:
+        sep = "&" if "?" in url else "?"
+        url = f"{url}{sep}page={page_num}"
+    return url
+
+
+async def _load_page_state(page, url: str, fast: bool) -> dict | None:
+    """
+    navigate to one category page and return its product state, or None if
+    the page has no search state.
+
+    normal mode waits for the full load event plus a fixed 2000ms settle.
+    fast mode returns as soon as __PRELOADED_STATE__.search exists, which
+    is set by an inline script in the ssr html long before "load".
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    await page.goto(url, wait_until="domcontentloaded")
+    if fast:
+        try:
+            await page.wait_for_function(
+                "() => !!(window.__PRELOADED_STATE__ && window.__PRELOADED_STATE__.search)",
+                timeout=_STATE_TIMEOUT_MS,
+            )
+        except PlaywrightTimeoutError:
+            # no state: either a cloudflare challenge or an empty page,
+            # both handled below
+            pass
+    else:
+        await page.wait_for_load_state("load")
+        await page.wait_for_timeout(2000)
+
+    # detect cloudflare challenge page
+    title = await page.title()
+    if "just a moment" in title.lower():
+        raise CloudflareBlockedError(
+            "blocked by cloudflare challenge. session cookies are "
+            "missing or expired."
         )
+
+    # extract product data from the redux preloaded state
+    return await page.evaluate("""() => {
+        const s = window.__PRELOADED_STATE__;
+        if (!s || !s.search) return null;
+        return {
+            products: s.search.productCardDictionary || {},
+            totalItems: (s.search.pagination && s.search.pagination.category)
+                ? s.search.pagination.category.totalItems
+                : 0,
+        };
+    }""")
+
+
+async def _iter_pages_concurrently(
+    context,
+    first_tab,
+    config: StoreConfig,
+    page_nums: list[int],
+    fanout: int,
+    rate_limiter: HostRateLimiter | None,
+    fast: bool,
+) -> AsyncIterator[list[ShopRiteProduct]]:
+    """
+    load page_nums across up to `fanout` tabs of one context (first_tab plus
+    fanout - 1 new ones) and yield each page's products in page order.
+
+    after a page fails no new pages are started; pages before it that are
+    already loading are still yielded, then the error is raised.
+    """
+    results: dict[int, list[ShopRiteProduct]] = {}
+    errors: dict[int, Exception] = {}
+    progress = asyncio.Event()
+    pending = iter(page_nums)
+    extra_tabs = [await context.new_page() for _ in range(min(fanout, len(page_nums)) - 1)]
+
+    async def tab_worker(tab) -> None:
+        # tabs pull the next page number off the shared iterator until it's
+        # empty or another tab has failed
+        try:
+            for page_num in pending:
+                if errors:
+                    return
+                url = _page_url(config, page_num)
+                try:
+                    if rate_limiter is not None:
+                        await rate_limiter.wait(url)
+                    page_start = time.perf_counter()
+                    state = await _load_page_state(tab, url, fast)
+                    products = []
+                    if state and state["products"]:
+                        products = _parse_preloaded_products(state["products"], config)
+                except Exception as e:
+                    errors[page_num] = e
+                    return
+                results[page_num] = products
+                progress.set()
+                logger.info(
+                    "page %d loaded in %.0fms: %d products",
+                    page_num, (time.perf_counter() - page_start) * 1000, len(products),
+                )
+        finally:
+            progress.set()
+
+    tasks = [asyncio.create_task(tab_worker(tab)) for tab in [first_tab, *extra_tabs]]
+    try:
+        for page_num in page_nums:
+            while page_num not in results:
+                if page_num in errors:
+                    raise errors[page_num]
+                if errors and all(task.done() for task in tasks):
+                    # this page was never started because an earlier one failed
+                    raise errors[min(errors)]
+                progress.clear()
+                await progress.wait()
+            yield results.pop(page_num)
+    finally:
+        # also runs when the consumer stops early: stop the other tabs before
+        # the context closes underneath them
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for tab in extra_tabs:
+            await tab.close()
+
+
+async def _iter_pages_in_browser(
+    browser,
+    config: StoreConfig,
+    session_state: Path | None,
+    rate_limiter: HostRateLimiter | None,
+    fast: bool = False,
+    page_fanout: int = 1,
+) -> AsyncIterator[list[ShopRiteProduct]]:
+    """
+    walk every page of one category in a fresh context of `browser`,
+    yielding each page's products as it is parsed.
+    """
+    collected = 0
+    traffic = _PageTraffic()
+    scrape_start = time.perf_counter()
+
+    context = await browser.new_context(
+        storage_state=str(session_state) if session_state else None,
+        user_agent=USER_AGENT,
+    )
+    try:
         # remove navigator.webdriver flag that cloudflare checks.
         # only matters in headless mode but harmless in headed mode.
         await context.add_init_script(
             "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
         )
+        if fast:
+            await _enable_fast_load(context, traffic)
+        context.on("requestfinished", traffic.on_request_finished)
         page = await context.new_page()
 
         page_num = 1
         total_items = None
 
         while True:
-            # build url: append &page=N for pages 2+
-            url = config.browse_url
-            if page_num > 1:
-                sep = "&" if "?" in url else "?"
-                url = f"{url}{sep}page={page_num}"
+            url = _page_url(config, page_num)
 
-            logger.info("loading page %d: %s", page_num, url)
-            await page.goto(url, wait_until="domcontentloaded")
-            await page.wait_for_load_state("load")
-            await page.wait_for_timeout(2000)
-
-            # detect cloudflare challenge page
-            title = await page.title()
-            if "just a moment" in title.lower():
-                raise CloudflareBlockedError(
-                    "blocked by cloudflare challenge. session cookies are "
-                    "missing or expired."
-                )
+            if rate_limiter is not None:
+                await rate_limiter.wait(url)
 
-            # extract product data from the redux preloaded state
-            state = await page.evaluate("""() => {
-                const s = window.__PRELOADED_STATE__;
-                if (!s || !s.search) return null;
-                return {
-                    products: s.search.productCardDictionary || {},
-                    totalItems: (s.search.pagination && s.search.pagination.category)
-                        ? s.search.pagination.category.totalItems
-                        : 0,
-                };
-            }""")
+            logger.info("loading page %d: %s", page_num, url)
+            traffic.reset()
+            page_start = time.perf_counter()
+            state = await _load_page_state(page, url, fast)
+            logger.info(
+                "page %d loaded in %.0fms: %d requests, %.1f KB transferred, %d blocked",
+                page_num, (time.perf_counter() - page_start) * 1000,
+                traffic.requests, traffic.bytes / 1024, traffic.blocked,
+            )
 
             if not state or not state["products"]:
                 logger.info("no products on page %d, stopping", page_num)
                 break
 
             products = _parse_preloaded_products(state["products"], config)
-            collected.extend(products)
+            collected += len(products)
+            yield products
 
             if total_items is None:
                 total_items = state["totalItems"]
             logger.info(
                 "page %d: %d products (collected: %d / %d total)",
-                page_num, len(products), len(collected), total_items,
+                page_num, len(products), collected, total_items,
             )
 
             # check if we've collected everything
-            if total_items and len(collected) >= total_items:
+            if total_items and collected >= total_items:
                 logger.info("collected all %d items", total_items)
                 break
 
@@ -302,19 +622,26 @@ async def scrape_store(
             if not products:
                 break
 
-            page_num += 1
-
-        await browser.close()
-
-    products = _dedup_products(collected)
-
-    if not products:
-        raise RuntimeError(
-            f"scrape completed for store {config.store_id} / category "
-            f"{config.category_id} but no products were collected - "
-            "check browse_url in StoreConfig. if cloudflare is active, "
-            "run scripts/save_session.py to refresh session cookies."
-        )
+            # once page 1 has told us the total, the page count is fixed and
+            # the rest can be fetched side by side in several tabs
+            if page_num == 1 and page_fanout > 1 and total_items:
+                page_count = math.ceil(total_items / max(len(products), 1))
+                remaining = list(range(2, page_count + 1))
+                logger.info("fetching pages 2-%d across %d tabs", page_count, min(page_fanout, len(remaining)))
+                async with aclosing(_iter_pages_concurrently(
+                    context, page, config, remaining, page_fanout, rate_limiter, fast,
+                )) as pages:
+                    async for products in pages:
+                        yield products
+                page_num = page_count
+                break
 
-    logger.info("scraped %d unique products from store %s", len(products), config.store_id)
-    return products
+            page_num += 1
+    finally:
+        await context.close()
+
+    logger.info(
+        "store %s: %d pages in %.1fs, %.1f KB transferred (%s load)",
+        config.store_id, page_num, time.perf_counter() - scrape_start,
+        traffic.total_bytes / 1024, "fast" if fast else "full",
+    )
@@ -0,0 +1,245 @@
+"""
+where to shop for a grocery list: the cheapest single store, and the
+cheapest split of the list across up to k stores.
+
+works on the list detail from grocery_list_service.get_list_detail, whose
+items embed every store's price for their product. the prices become an
+items x stores numpy matrix of costs in cents (quantity x unit price, the
+sale price when it is lower), with _MISSING where a store doesn't carry an
+item. every plan is then a handful of whole-matrix operations:
+
+- single store: column sums.
+- split: a small facility-location problem. solved greedily (add the store
+  that lowers the cost most, up to k times), improved by swapping stores in
+  and out, then checked by a branch and bound over store sets (cheapest
+  stores first, pruned with suffix minima). each step prices every
+  candidate store at once as np.minimum(basket, matrix).sum(axis=0).
+  hundreds of items across dozens of stores solve exactly in a few ms; if
+  the search would touch more than _MAX_CELLS cells it stops and returns
+  the best plan found, marked exact=False.
+
+checked items are already in the cart and are left out unless
+include_checked. custom items and products without prices can't be
+priced and are reported as unpriced.
+
+usage:
+    detail = await grocery_list_service.get_list_detail(list_id, user_id)
+    plan = optimize_basket(detail, max_stores=2)
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# cents charged for an item a store (set) can't supply: outweighs any real
+# basket, so covering more items always beats being cheaper
+_MISSING = 10 ** 12
+
+# matrix cells the exact search may touch before settling for the local
+# search's plan (tens of ms)
+_MAX_CELLS = 50_000_000
+
+
+@dataclass
+class PriceMatrix:
+    item_ids: list[str]
+    store_ids: list[str]
+    stores: dict[str, dict]
+    # costs[i, s]: cost of item i at store s in cents, or _MISSING
+    costs: np.ndarray
+    unpriced: list[str]
+
+
+def build_matrix(items: list[dict], include_checked: bool = False) -> PriceMatrix:
+    """the items x stores cost matrix for a list's grocery_list_items."""
+    item_ids: list[str] = []
+    unpriced: list[str] = []
+    stores: dict[str, dict] = {}
+    store_col: dict[str, int] = {}
+    rows: list[int] = []
+    cols: list[int] = []
+    values: list[int] = []
+
+    for item in items:
+        if item.get("is_checked") and not include_checked:
+            continue
+        quantity = max(1, item.get("quantity") or 1)
+        priced = False
+        for sp in (item.get("products") or {}).get("store_products") or []:
+            store_id = sp.get("store_id")
+            price, sale_price = sp.get("price"), sp.get("sale_price")
+            if sale_price is not None and (price is None or sale_price < price):
+                price = sale_price
+            if store_id is None or price is None or sp.get("in_stock") is False:
+                continue
+            if store_id not in store_col:
+                store_col[store_id] = len(store_col)
+                stores[store_id] = {"id": store_id, **(sp.get("stores") or {})}
+            rows.append(len(item_ids))
+            cols.append(store_col[store_id])
+            values.append(round(price * 100) * quantity)
+            priced = True
+        if priced:
+            item_ids.append(item["id"])
+        else:
+            unpriced.append(item["id"])
+
+    costs = np.full((len(item_ids), len(store_col)), _MISSING, dtype=np.int64)
+    # a product listed twice at one store costs its cheaper price
+    np.minimum.at(
+        costs,
+        (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)),
+        np.array(values, dtype=np.int64),
+    )
+    return PriceMatrix(item_ids, list(store_col), stores, costs, unpriced)
+
+
+def _best_split(costs: np.ndarray, k: int) -> tuple[list[int], bool]:
+    """column indexes of the cheapest set of at most k stores, and whether that is proven optimal."""
+    n_items, n = costs.shape
+    k = min(k, n)
+    totals = costs.sum(axis=0)
+
+    # greedy: add the store that lowers the cost most, while one does
+    chosen = [int(totals.argmin())]
+    basket = costs[:, chosen[0]]
+    best = int(totals[chosen[0]])
+    while len(chosen) < k:
+        trial = np.minimum(basket[:, None], costs).sum(axis=0)
+        j = int(trial.argmin())
+        if trial[j] >= best:
+            # every item is already at its cheapest price anywhere
+            return chosen, True
+        chosen.append(j)
+        basket = np.minimum(basket, costs[:, j])
+        best = int(trial[j])
+
+    # local search: swap a chosen store for another while that helps
+    improved = len(chosen) > 1
+    while improved:
+        improved = False
+        for slot in range(len(chosen)):
+            rest = costs[:, [s for i, s in enumerate(chosen) if i != slot]].min(axis=1)
+            trial = np.minimum(rest[:, None], costs).sum(axis=0)
+            j = int(trial.argmin())
+            if trial[j] < best:
+                chosen[slot] = j
+                best = int(trial[j])
+                improved = True
+    if k == 1:
+        return chosen, True
+
+    # branch and bound over sets, cheapest single stores first; a set is
+    # only extended with stores after its last one in `order`.
+    # suffix[:, p] is each item's cheapest price among order[p:].
+    order = np.argsort(totals, kind="stable")
+    ordered = costs[:, order]
+    suffix = np.minimum.accumulate(ordered[:, ::-1], axis=1)[:, ::-1]
+    state = {"best": best, "best_set": chosen, "cells": 0}
+
+    def expand(picked: list[int], basket: np.ndarray, start: int, left: int) -> bool:
+        """
+        price every extension of `picked` by one store from order[start:]
+        and recurse into those whose floor - their cost with every later
+        store added - is below the best. False once the cell budget is spent.
+        """
+        children = np.minimum(basket[:, None], ordered[:, start:])
+        child_costs = children.sum(axis=0)
+        state["cells"] += children.size
+        if state["cells"] > _MAX_CELLS:
+            return False
+        c = int(child_costs.argmin())
+        if child_costs[c] < state["best"]:
+            state.update(best=int(child_costs[c]), best_set=picked + [int(order[start + c])])
+        if left <= 1 or start + 1 >= n:
+            return True
+        floors = np.minimum(children[:, :-1], suffix[:, start + 1:]).sum(axis=0)
+        for c in np.flatnonzero(floors < state["best"]):
+            if floors[c] >= state["best"]:
+                continue
+            pos = start + int(c)
+            if not expand(picked + [int(order[pos])], children[:, c], pos + 1, left - 1):
+                return False
+        return True
+
+    exact = expand([], np.full(n_items, _MISSING, dtype=np.int64), 0, k)
+    return state["best_set"], exact
+
+
+def _dollars(cents) -> float:
+    return round(int(cents) / 100, 2)
+
+
+def _budget(total_cents, budget_limit: float | None) -> dict:
+    if budget_limit is None:
+        return {"within_budget": None, "over_budget_by": None}
+    over = int(total_cents) - round(budget_limit * 100)
+    return {"within_budget": over <= 0, "over_budget_by": _dollars(max(0, over))}
+
+
+def optimize_basket(detail: dict, max_stores: int = 2, include_checked: bool = False) -> dict:
+    """
+    the shopping plan for a list detail: every store's total for the whole
+    list (cheapest first), the cheapest single store and the cheapest split
+    across up to max_stores stores. totals are in dollars; items a plan's
+    stores don't carry are listed in its missing_items and not counted.
+    """
+    matrix = build_matrix(detail.get("grocery_list_items") or [], include_checked)
+    budget_limit = detail.get("budget_limit")
+    result = {
+        "list_id": detail["id"],
+        "budget_limit": budget_limit,
+        "items_priced": len(matrix.item_ids),
+        "unpriced_items": matrix.unpriced,
+        "stores": [],
+        "single_store": None,
+        "split": None,
+    }
+    if not matrix.store_ids:
+        return result
+
+    costs = matrix.costs
+    carried = costs < _MISSING
+    missing_counts = (~carried).sum(axis=0)
+    totals = np.where(carried, costs, 0).sum(axis=0)
+    # fewest missing items first, then cheapest
+    ranked = np.lexsort((totals, missing_counts))
+    result["stores"] = [
+        {
+            "store": matrix.stores[matrix.store_ids[s]],
+            "total": _dollars(totals[s]),
+            "missing_items": [matrix.item_ids[i] for i in np.flatnonzero(~carried[:, s])],
+        }
+        for s in ranked
+    ]
+    cheapest = int(ranked[0])
+    result["single_store"] = {**result["stores"][0], **_budget(totals[cheapest], budget_limit)}
+
+    picked, exact = _best_split(costs, max(1, max_stores))
+    at_picked = costs[:, picked]
+    slot_of = at_picked.argmin(axis=1)
+    item_cost = at_picked[np.arange(len(matrix.item_ids)), slot_of]
+    covered = item_cost < _MISSING
+    split_total = int(item_cost[covered].sum())
+
+    baskets = []
+    for slot, s in enumerate(picked):
+        mine = np.flatnonzero(covered & (slot_of == slot))
+        if len(mine):
+            baskets.append({
+                "store": matrix.stores[matrix.store_ids[s]],
+                "subtotal": _dollars(item_cost[mine].sum()),
+                "items": [matrix.item_ids[i] for i in mine],
+            })
+    baskets.sort(key=lambda b: -b["subtotal"])
+    split_missing = [matrix.item_ids[i] for i in np.flatnonzero(~covered)]
+    comparable = missing_counts[cheapest] == 0 and not split_missing
+    result["split"] = {
+        "stores": baskets,
+        "total": _dollars(split_total),
+        "savings_vs_single_store": _dollars(totals[cheapest] - split_total) if comparable else None,
+        "missing_items": split_missing,
+        "exact": exact,
+        **_budget(split_total, budget_limit),
+    }
+    return result
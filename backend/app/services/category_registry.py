@@ -0,0 +1,107 @@
+"""
+process-wide registry of product categories.
+
+product_categories is a few dozen rows that only change when a scrape
+meets a new category, so it is kept in memory instead of being queried
+on every request:
+
+- resolve(slug) turns a /products?category= slug into an id without a
+  round-trip (product_service.search_products).
+- rows() / etag serve GET /categories; clients revalidate with
+  If-None-Match and get a 304 while nothing changed.
+
+the registry loads at startup and reloads once CATEGORY_REGISTRY_TTL_SECONDS
+have passed. db_writer.ensure_category_exists adds categories it creates,
+so a scrape shows up at once. a slug that isn't known triggers a reload
+(at most every _MISS_RELOAD_SECONDS), for categories created elsewhere,
+e.g. by scripts/scrape_shoprite.py --db.
+
+usage:
+    category_id = await category_registry.resolve("dairy")
+    rows, etag = await category_registry.snapshot()
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.core.supabase import get_supabase
+
+logger = logging.getLogger(__name__)
+
+_MISS_RELOAD_SECONDS = 10.0
+
+
+class CategoryRegistry:
+    """in-memory product_categories, keyed by slug, with an etag over the listing."""
+
+    def __init__(self) -> None:
+        self._by_slug: dict[str, dict] = {}
+        self._rows: list[dict] = []
+        self._etag = ""
+        self._loaded_at: float | None = None
+        self._flight = SingleFlight("categories")
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _stale(self, max_age: float) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= max_age
+
+    async def load(self) -> None:
+        """(re)read product_categories. concurrent callers share one query."""
+        await self._flight.do("load", self._load)
+
+    async def _load(self) -> None:
+        sb = get_supabase()
+        result = await sb.table("product_categories").select("id, name, slug").execute()
+        self._set(result.data)
+        self._loaded_at = time.monotonic()
+
+    def _set(self, rows: list[dict]) -> None:
+        self._by_slug = {row["slug"]: row for row in rows}
+        self._rows = sorted(self._by_slug.values(), key=lambda row: (row["name"], row["id"]))
+        body = json.dumps(self._rows, sort_keys=True, separators=(",", ":")).encode()
+        self._etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+    def add(self, row: dict) -> None:
+        """record a category just written (row with id, name, slug)."""
+        if self._by_slug.get(row["slug"]) != row:
+            self._set([*(r for r in self._rows if r["slug"] != row["slug"]), row])
+
+    async def _ensure_fresh(self) -> None:
+        if self._stale(settings.CATEGORY_REGISTRY_TTL_SECONDS):
+            await self.load()
+
+    async def resolve(self, slug: str) -> str | None:
+        """category id for slug, or None if there is no such category."""
+        await self._ensure_fresh()
+        row = self._by_slug.get(slug)
+        if row is None and self._stale(_MISS_RELOAD_SECONDS):
+            await self.load()
+            row = self._by_slug.get(slug)
+        return row["id"] if row else None
+
+    async def snapshot(self) -> tuple[list[dict], str]:
+        """all categories sorted by name, and the etag of that listing."""
+        await self._ensure_fresh()
+        return self._rows, self._etag
+
+    def stats(self) -> dict:
+        age = None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1)
+        return {"categories": len(self._rows), "age_seconds": age, "etag": self._etag}
+
+
+category_registry = CategoryRegistry()
+
+
+async def load_categories() -> None:
+    """startup load. a failure is logged; the first request retries."""
+    try:
+        await category_registry.load()
+    except Exception:
+        logger.exception("category registry failed to load; will retry on first use")
@@ -5,11 +5,22 @@ docs:    https://fdc.nal.usda.gov/api-guide/
 openapi: https://fdc.nal.usda.gov/api-spec/fdc_api.html
 
 free key at: https://fdc.nal.usda.gov/api-key-signup/
+
+all calls share one httpx client (http/2, keep-alive) opened by the
+fastapi lifespan in app.main, so requests reuse connections to
+api.nal.usda.gov instead of a fresh tls handshake each. food documents are
+cached by fdc_id + nutrient subset in app.services.fdc_cache, and identical
+concurrent get_food / search_foods calls share one upstream request
+(app.core.singleflight), which keeps bursts inside the fdc rate limit.
 """
 
+import asyncio
+
 import httpx
 
 from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.services.fdc_cache import cache_key, food_cache
 
 FDC_BASE_URL = "https://api.nal.usda.gov/fdc/v1"
 
@@ -26,6 +37,43 @@ NUTRIENT_IDS = {
     2000: "sugar_g",
 }
 
+# the /foods endpoint accepts at most this many fdcIds per request
+_BULK_CHUNK = 20
+
+_client: httpx.AsyncClient | None = None
+_flight = SingleFlight("fdc")
+
+
+def init_fdc_client() -> httpx.AsyncClient:
+    """create the shared fdc client. no-op if already open."""
+    global _client
+
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=FDC_BASE_URL,
+            http2=True,
+            timeout=settings.FDC_HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+def get_fdc_client() -> httpx.AsyncClient:
+    """return the shared fdc client, opening it on first use (e.g. in scripts)."""
+    if _client is None:
+        return init_fdc_client()
+    return _client
+
+
+async def close_fdc_client() -> None:
+    """close the shared client and the disk cache. the next call reopens both."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    food_cache.close()
+
 
 async def search_foods(
     query: str,
@@ -44,6 +92,16 @@ async def search_foods(
     "SR Legacy" - usda standard reference (raw ingredients)
     "Foundation" - foundation foods (detailed research data)
     """
+    key = ("search", query, page_size, page_number, tuple(data_types or ()))
+    return await _flight.do(key, lambda: _search_foods(query, page_size, page_number, data_types))
+
+
+async def _search_foods(
+    query: str,
+    page_size: int,
+    page_number: int,
+    data_types: list[str] | None,
+) -> dict:
     params: dict = {
         "api_key": settings.FDC_API_KEY,
         "query": query,
@@ -53,10 +111,9 @@ async def search_foods(
     if data_types:
         params["dataType"] = ",".join(data_types)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{FDC_BASE_URL}/foods/search", params=params)
-        response.raise_for_status()
-        return response.json()
+    response = await get_fdc_client().get("/foods/search", params=params)
+    response.raise_for_status()
+    return response.json()
 
 
 async def get_food(fdc_id: int, nutrients: list[int] | None = None) -> dict:
@@ -68,30 +125,67 @@ async def get_food(fdc_id: int, nutrients: list[int] | None = None) -> dict:
 
     example - only fetch the nutrients neighborly uses:
     get_food(167512, nutrients=list(NUTRIENT_IDS.keys()))
+
+    responses are cached (see fdc_cache); errors are not.
     """
+    key = cache_key(fdc_id, nutrients)
+    cached = await food_cache.get(key)
+    if cached is not None:
+        return cached
+    return await _flight.do(("food", key), lambda: _fetch_food(fdc_id, nutrients, key))
+
+
+async def _fetch_food(fdc_id: int, nutrients: list[int] | None, key: str) -> dict:
     params: dict = {"api_key": settings.FDC_API_KEY}
     if nutrients:
         params["nutrients"] = ",".join(str(n) for n in nutrients)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{FDC_BASE_URL}/food/{fdc_id}", params=params)
-        response.raise_for_status()
-        return response.json()
+    response = await get_fdc_client().get(f"/food/{fdc_id}", params=params)
+    response.raise_for_status()
+    food = response.json()
+    await food_cache.set(key, food)
+    return food
 
 
-async def get_foods_bulk(fdc_ids: list[int]) -> list[dict]:
+async def get_foods_bulk(fdc_ids: list[int], nutrients: list[int] | None = None) -> list[dict]:
     """
     batch fetch details for multiple foods in one request.
 
     use this when enriching a batch of products (e.g. after scraping a store)
     rather than calling get_food() in a loop.
+
+    any number of ids is fine: duplicates are dropped, cached foods are
+    served from fdc_cache, and the misses are split into _BULK_CHUNK-sized
+    requests that run FDC_BULK_CONCURRENCY at a time. results come back once
+    per id, in the order the ids were first given; ids fdc doesn't know are
+    left out, as with the api itself. if any chunk fails the error is raised,
+    but the chunks that succeeded are already cached.
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{FDC_BASE_URL}/foods",
-            params={"api_key": settings.FDC_API_KEY},
-            json={"fdcIds": fdc_ids},
-        )
+    keys = {fdc_id: cache_key(fdc_id, nutrients) for fdc_id in fdc_ids}
+    cached = await food_cache.get_many(list(keys.values()))
+    foods = {fdc_id: cached[key] for fdc_id, key in keys.items() if key in cached}
+
+    missing = [fdc_id for fdc_id in keys if fdc_id not in foods]
+    semaphore = asyncio.Semaphore(max(1, settings.FDC_BULK_CONCURRENCY))
+
+    async def fetch_chunk(chunk: list[int]) -> None:
+        body: dict = {"fdcIds": chunk}
+        if nutrients:
+            body["nutrients"] = nutrients
+        async with semaphore:
+            response = await get_fdc_client().post(
+                "/foods",
+                params={"api_key": settings.FDC_API_KEY},
+                json=body,
+            )
         response.raise_for_status()
-        return response.json()
+        fetched = {food["fdcId"]: food for food in response.json() if food.get("fdcId") in keys}
+        await food_cache.set_many({keys[fdc_id]: food for fdc_id, food in fetched.items()})
+        foods.update(fetched)
+
+    await asyncio.gather(*(
+        fetch_chunk(missing[i:i + _BULK_CHUNK]) for i in range(0, len(missing), _BULK_CHUNK)
+    ))
+
+    return [foods[fdc_id] for fdc_id in keys if fdc_id in foods]
 
@@ -0,0 +1,209 @@
+"""
+two-tier cache for fdc food responses.
+
+nutrition data for an fdc_id almost never changes, so get_food() and
+get_foods_bulk() responses are kept:
+- in memory: an lru of up to FDC_CACHE_MAX_ENTRIES entries
+- on disk: a sqlite file at FDC_CACHE_PATH, so a restart doesn't refetch
+  everything. set FDC_CACHE_PATH="" to keep the cache in memory only.
+
+both tiers expire entries after FDC_CACHE_TTL_SECONDS. a disk hit is
+promoted back into memory. disk reads and writes run in a worker thread so
+they don't block the event loop.
+
+entries are keyed by fdc_id plus the requested nutrient subset (see
+cache_key), since a food fetched with ?nutrients=... is a smaller document
+than the full one.
+
+hit/miss counters are exposed at GET /fdc/cache/stats.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(fdc_id: int, nutrients: list[int] | None) -> str:
+    """'<fdc_id>:all' or '<fdc_id>:<sorted nutrient ids>'."""
+    subset = ",".join(str(n) for n in sorted(set(nutrients))) if nutrients else "all"
+    return f"{fdc_id}:{subset}"
+
+
+class _DiskTier:
+    """sqlite key -> (expires_at, json body) store. safe to call from worker threads."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "create table if not exists foods ("
+                "key text primary key, expires_at real not null, body text not null)"
+            )
+        return self._conn
+
+    def get_many(self, keys: list[str], now: float) -> dict[str, tuple[float, dict]]:
+        found: dict[str, tuple[float, dict]] = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"select key, expires_at, body from foods where key in ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, expires_at, body in rows:
+                    if expires_at > now:
+                        found[key] = (expires_at, json.loads(body))
+        return found
+
+    def set_many(self, entries: dict[str, tuple[float, dict]]) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "insert or replace into foods (key, expires_at, body) values (?, ?, ?)",
+                    [(key, expires_at, json.dumps(body)) for key, (expires_at, body) in entries.items()],
+                )
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute("delete from foods where expires_at <= ?", (now,)).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("delete from foods")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class FoodCache:
+    """ttl + lru memory cache in front of an optional sqlite tier."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, path: str | Path | None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._disk = _DiskTier(Path(path)) if path else None
+        self.counters: Counter[str] = Counter()
+
+    async def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """cached bodies for whichever of `keys` are present and fresh."""
+        now = time.time()
+        found: dict[str, dict] = {}
+        missing: list[str] = []
+        for key in keys:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                found[key] = entry[1]
+                self.counters["memory_hits"] += 1
+                continue
+            if entry is not None:
+                del self._memory[key]
+                self.counters["expired"] += 1
+            missing.append(key)
+
+        if missing and self._disk is not None:
+            try:
+                from_disk = await asyncio.to_thread(self._disk.get_many, missing, now)
+            except Exception as e:
+                logger.warning("fdc disk cache read failed: %s", e)
+                from_disk = {}
+            for key, (expires_at, body) in from_disk.items():
+                self._remember(key, expires_at, body)
+                found[key] = body
+            self.counters["disk_hits"] += len(from_disk)
+            missing = [key for key in missing if key not in from_disk]
+
+        self.counters["misses"] += len(missing)
+        return found
+
+    async def get(self, key: str) -> dict | None:
+        return (await self.get_many([key])).get(key)
+
+    async def set_many(self, bodies: dict[str, dict]) -> None:
+        if not bodies:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        entries = {key: (expires_at, body) for key, body in bodies.items()}
+        for key, (exp, body) in entries.items():
+            self._remember(key, exp, body)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set_many, entries)
+            except Exception as e:
+                logger.warning("fdc disk cache write failed: %s", e)
+
+    async def set(self, key: str, body: dict) -> None:
+        await self.set_many({key: body})
+
+    async def purge_expired(self) -> int:
+        """drop expired entries from both tiers. returns how many disk rows went."""
+        now = time.time()
+        for key in [k for k, (exp, _) in self._memory.items() if exp <= now]:
+            del self._memory[key]
+        if self._disk is None:
+            return 0
+        return await asyncio.to_thread(self._disk.purge_expired, now)
+
+    async def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.clear)
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+    def stats(self) -> dict:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_path": str(self._disk.path) if self._disk else None,
+            "memory_hits": self.counters["memory_hits"],
+            "disk_hits": self.counters["disk_hits"],
+            "misses": self.counters["misses"],
+            "expired": self.counters["expired"],
+            "evictions": self.counters["evictions"],
+            "hit_ratio": round(hits / lookups, 3) if lookups else None,
+        }
+
+    def _remember(self, key: str, expires_at: float, body: dict) -> None:
+        self._memory[key] = (expires_at, body)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+
+food_cache = FoodCache(
+    max_entries=settings.FDC_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.FDC_CACHE_TTL_SECONDS,
+    path=settings.FDC_CACHE_PATH or None,
+)
@@ -1,15 +1,19 @@
 """grocery list CRUD operations against supabase."""
 
+import asyncio
+import logging
 from datetime import datetime, timezone
 
 from app.core.supabase import get_supabase
 
+logger = logging.getLogger(__name__)
+
 
 async def get_user_lists(user_id: str) -> list[dict]:
     """get all grocery lists for a user."""
     sb = get_supabase()
 
-    result = sb.table("grocery_lists").select(
+    result = await sb.table("grocery_lists").select(
         "id, name, status, budget_limit, created_at, updated_at"
     ).eq("user_id", user_id).order("created_at", desc=True).execute()
 
@@ -28,7 +32,7 @@ async def create_list(user_id: str, name: str, budget_limit: float | None = None
     if budget_limit is not None:
         data["budget_limit"] = budget_limit
 
-    result = sb.table("grocery_lists").insert(data).execute()
+    result = await sb.table("grocery_lists").insert(data).execute()
     return result.data[0]
 
 
@@ -36,12 +40,12 @@ async def get_list_detail(list_id: str, user_id: str) -> dict | None:
     """get a grocery list with all its items and product details."""
     sb = get_supabase()
 
-    result = sb.table("grocery_lists").select(
+    result = await sb.table("grocery_lists").select(
         "id, name, status, budget_limit, created_at, updated_at, "
         "grocery_list_items("
         "  id, quantity, is_checked, custom_item_name, "
         "  products(id, name, brand, image_url, unit_size, upc, "
-        "    store_products(price, sale_price, stores(name, chain)))"
+        "    store_products(price, sale_price, in_stock, store_id, stores(name, chain)))"
         ")"
     ).eq("id", list_id).eq("user_id", user_id).execute()
 
@@ -50,13 +54,70 @@ async def get_list_detail(list_id: str, user_id: str) -> dict | None:
     return result.data[0]
 
 
+async def get_list_totals(list_id: str, user_id: str) -> dict | None:
+    """
+    what a grocery list costs at each store, without the product tree.
+
+    reads grocery_list_store_totals, which triggers keep current as items
+    and store prices change (migrations/0006). the triggers apply deltas, so
+    an item added while a scrape changes its price can land on the old one;
+    the scraper reconciles after each write (db_writer.reconcile_list_totals)
+    and refresh_list_store_totals(list_id) rebuilds a list by hand.
+
+    stores are sorted by fewest missing lines, then cheapest; a line is
+    missing at a store that doesn't price its product. custom items are
+    never priced and aren't counted.
+    """
+    sb = get_supabase()
+
+    result = await sb.table("grocery_lists").select(
+        "id, name, budget_limit, "
+        "grocery_list_items(count), "
+        "grocery_list_store_totals(store_id, total, items_priced, updated_at, "
+        "  stores(name, chain, store_number))"
+    ).eq("id", list_id).eq("user_id", user_id).not_.is_(
+        "grocery_list_items.product_id", "null"
+    ).execute()
+
+    if not result.data:
+        return None
+    row = result.data[0]
+    counts = row.get("grocery_list_items") or [{}]
+    lines = counts[0].get("count") or 0
+    budget_limit = row.get("budget_limit")
+
+    stores = []
+    for t in row.get("grocery_list_store_totals") or []:
+        if not t["items_priced"]:
+            continue
+        total = round(float(t["total"]), 2)
+        stores.append({
+            "store_id": t["store_id"],
+            **(t.get("stores") or {}),
+            "total": total,
+            "items_priced": t["items_priced"],
+            "missing_items": max(0, lines - t["items_priced"]),
+            "within_budget": None if budget_limit is None else total <= budget_limit,
+            "updated_at": t["updated_at"],
+        })
+    stores.sort(key=lambda s: (s["missing_items"], s["total"]))
+
+    return {
+        "list_id": row["id"],
+        "name": row["name"],
+        "budget_limit": budget_limit,
+        "product_lines": lines,
+        "stores": stores,
+    }
+
+
 async def update_list(list_id: str, user_id: str, **updates) -> dict | None:
     """update a grocery list (name, budget_limit, status)."""
     sb = get_supabase()
 
     updates["updated_at"] = datetime.now(timezone.utc).isoformat()
 
-    result = sb.table("grocery_lists").update(updates).eq(
+    result = await sb.table("grocery_lists").update(updates).eq(
         "id", list_id
     ).eq("user_id", user_id).execute()
 
@@ -69,7 +130,7 @@ async def delete_list(list_id: str, user_id: str) -> bool:
     """delete a grocery list. returns True if deleted."""
     sb = get_supabase()
 
-    result = sb.table("grocery_lists").delete().eq(
+    result = await sb.table("grocery_lists").delete().eq(
         "id", list_id
     ).eq("user_id", user_id).execute()
 
@@ -94,7 +155,7 @@ async def add_item(
     if custom_item_name:
         data["custom_item_name"] = custom_item_name
 
-    result = sb.table("grocery_list_items").insert(data).execute()
+    result = await sb.table("grocery_list_items").insert(data).execute()
     return result.data[0]
 
 
@@ -104,7 +165,7 @@ async def update_item(item_id: str, **updates) -> dict | None:
 
     updates["updated_at"] = datetime.now(timezone.utc).isoformat()
 
-    result = sb.table("grocery_list_items").update(updates).eq("id", item_id).execute()
+    result = await sb.table("grocery_list_items").update(updates).eq("id", item_id).execute()
 
     if not result.data:
         return None
@@ -115,5 +176,161 @@ async def delete_item(item_id: str) -> bool:
     """remove an item from a grocery list."""
     sb = get_supabase()
 
-    result = sb.table("grocery_list_items").delete().eq("id", item_id).execute()
+    result = await sb.table("grocery_list_items").delete().eq("id", item_id).execute()
     return len(result.data) > 0
+
+
+async def _insert_items(sb, rows: list[dict]) -> list[dict | Exception]:
+    """
+    insert item rows in one call; if that fails, row by row so one bad row
+    (an unknown product_id, say) only fails itself. returns, per row, the
+    inserted row or the error.
+    """
+    try:
+        result = await sb.table("grocery_list_items").insert(rows).execute()
+        return list(result.data)
+    except Exception as e:
+        if len(rows) == 1:
+            logger.warning("insert of list item %s failed: %s", rows[0], e)
+            return [e]
+        logger.warning("bulk insert of %d list items failed, retrying row by row: %s", len(rows), e)
+    out: list[dict | Exception] = []
+    for row in rows:
+        try:
+            result = await sb.table("grocery_list_items").insert(row).execute()
+            out.append(result.data[0])
+        except Exception as e:
+            logger.warning("insert of list item %s failed: %s", row, e)
+            out.append(e)
+    return out
+
+
+async def apply_item_ops(list_id: str, user_id: str, ops: list[dict]) -> list[dict] | None:
+    """
+    apply a batch of item operations to one of the user's lists and return
+    a result per op, in order. None if the list isn't the user's.
+
+    ops are dicts with "op" and its fields:
+        {"op": "add", "product_id" | "custom_item_name", "quantity"}
+        {"op": "update", "item_id", "quantity" and/or "is_checked"}
+        {"op": "check" | "uncheck", "item_id"}
+        {"op": "delete", "item_id"}
+
+    instead of a round trip per op this is: one ownership check, one insert
+    for all adds, one update per distinct change (checking off 30 items is
+    a single update) and one delete, the last three run concurrently. an
+    item may appear in only one op per batch, so they never conflict.
+
+    the batch is not a transaction: each result says what happened to its
+    op - status 201 added, 200 updated, 204 deleted, 404 item not in this
+    list, 400 invalid op (or a rejected add), 500 its bulk call failed -
+    with the written row as "item". database errors are logged; the
+    client only gets a generic message.
+    """
+    sb = get_supabase()
+
+    owned = await sb.table("grocery_lists").select("id").eq(
+        "id", list_id
+    ).eq("user_id", user_id).execute()
+    if not owned.data:
+        return None
+
+    now = datetime.now(timezone.utc).isoformat()
+    results: list[dict] = [
+        {"index": i, "op": op.get("op"), "status": 400, "item": None, "error": None}
+        for i, op in enumerate(ops)
+    ]
+
+    adds: list[int] = []
+    deletes: dict[str, int] = {}
+    # the change to apply -> {item_id: op index}
+    updates: dict[tuple, dict[str, int]] = {}
+    claimed: set[str] = set()
+
+    for i, op in enumerate(ops):
+        kind = op.get("op")
+        if kind == "add":
+            if not (op.get("product_id") or op.get("custom_item_name")):
+                results[i]["error"] = "product_id or custom_item_name is required"
+                continue
+            adds.append(i)
+            continue
+
+        item_id = op.get("item_id")
+        if not item_id:
+            results[i]["error"] = "item_id is required"
+            continue
+        if item_id in claimed:
+            results[i]["error"] = "item appears in more than one op"
+            continue
+
+        if kind == "delete":
+            deletes[item_id] = i
+        else:
+            if kind in ("check", "uncheck"):
+                change = {"is_checked": kind == "check"}
+            else:
+                change = {
+                    k: op[k] for k in ("quantity", "is_checked") if op.get(k) is not None
+                }
+                if not change:
+                    results[i]["error"] = "no fields to update"
+                    continue
+            updates.setdefault(tuple(sorted(change.items())), {})[item_id] = i
+        claimed.add(item_id)
+
+    def settle(targets: dict[str, int], written: list[dict] | Exception, status: int) -> None:
+        if isinstance(written, Exception):
+            logger.error("bulk list item write for %d ops failed: %s", len(targets), written)
+            for i in targets.values():
+                results[i].update(status=500, error="could not apply the change")
+            return
+        by_id = {row["id"]: row for row in written}
+        for item_id, i in targets.items():
+            row = by_id.get(item_id)
+            if row is None:
+                results[i].update(status=404, error="item not found")
+            else:
+                results[i].update(status=status, item=None if status == 204 else row)
+
+    async def run_adds() -> None:
+        rows = []
+        for i in adds:
+            row = {"grocery_list_id": list_id, "quantity": ops[i].get("quantity") or 1}
+            if ops[i].get("product_id"):
+                row["product_id"] = ops[i]["product_id"]
+            if ops[i].get("custom_item_name"):
+                row["custom_item_name"] = ops[i]["custom_item_name"]
+            rows.append(row)
+        for i, written in zip(adds, await _insert_items(sb, rows)):
+            if isinstance(written, Exception):
+                results[i]["error"] = "could not add the item"
+            else:
+                results[i].update(status=201, item=written)
+
+    async def run_update(change: tuple, targets: dict[str, int]) -> None:
+        try:
+            result = await sb.table("grocery_list_items").update(
+                {**dict(change), "updated_at": now}
+            ).eq("grocery_list_id", list_id).in_("id", list(targets)).execute()
+            settle(targets, result.data, 200)
+        except Exception as e:
+            settle(targets, e, 200)
+
+    async def run_deletes() -> None:
+        try:
+            result = await sb.table("grocery_list_items").delete().eq(
+                "grocery_list_id", list_id
+            ).in_("id", list(deletes)).execute()
+            settle(deletes, result.data, 204)
+        except Exception as e:
+            settle(deletes, e, 204)
+
+    calls = [run_update(change, targets) for change, targets in updates.items()]
+    if adds:
+        calls.append(run_adds())
+    if deletes:
+        calls.append(run_deletes())
+    await asyncio.gather(*calls)
+
+    return results
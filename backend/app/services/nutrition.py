@@ -0,0 +1,193 @@
+"""
+batch nutrition enrichment: usda fdc -> product_nutrition table.
+
+matches scraped products to fdc foods by upc, fetches their details in bulk
+and stores the NUTRIENT_IDS values as flat columns in product_nutrition
+(migrations/0003_product_nutrition.sql). product endpoints embed that table,
+so serving nutrition takes no upstream calls.
+
+the run is incremental: a product whose row is newer than max_age is
+skipped. products with no fdc match get a row too (fdc_id null), so they
+aren't searched again on every run. each product costs one fdc search, so
+a run takes at most NUTRITION_MAX_SEARCHES_PER_RUN products and the rest
+wait for the next run, keeping a backfill inside the fdc hourly quota.
+
+runs after every scrape job (app.scraper.jobs), or on its own:
+    PYTHONPATH=. uv run python scripts/enrich_nutrition.py
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.core.supabase import get_supabase
+from app.services import fdc
+from app.services.fdc_cache import cache_key, food_cache
+from app.services.search_index import forget_rows
+
+logger = logging.getLogger(__name__)
+
+# stale products read per page, and rows per product_nutrition upsert
+_PAGE = 1000
+_WRITE_CHUNK = 500
+
+DEFAULT_MAX_AGE = timedelta(days=settings.NUTRITION_MAX_AGE_DAYS)
+
+
+def _normalize_upc(upc: str | None) -> str:
+    """digits only, without leading zeros, so 012345 and 12345 compare equal."""
+    return "".join(c for c in (upc or "") if c.isdigit()).lstrip("0")
+
+
+def flatten_nutrients(food: dict) -> dict:
+    """
+    NUTRIENT_IDS columns from an fdc food document. handles both the full
+    format ({"nutrient": {"id"}, "amount"}) and the abridged / search format
+    ({"nutrientId", "value"}). nutrients the food doesn't list are None.
+    """
+    values: dict = dict.fromkeys(fdc.NUTRIENT_IDS.values())
+    for entry in food.get("foodNutrients", []):
+        nutrient = entry.get("nutrient") or {}
+        nutrient_id = nutrient.get("id", entry.get("nutrientId"))
+        column = fdc.NUTRIENT_IDS.get(nutrient_id)
+        if column is not None:
+            values[column] = entry.get("amount", entry.get("value"))
+    return values
+
+
+async def _stale_products(limit: int | None, max_age: timedelta) -> list[dict]:
+    """
+    products with a upc whose nutrition row is missing or older than max_age,
+    by id. filtered in the database (migrations/0007), a keyset page at a time.
+    """
+    sb = get_supabase()
+    cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+    stale: list[dict] = []
+    after = None
+    while limit is None or len(stale) < limit:
+        page = _PAGE if limit is None else min(_PAGE, limit - len(stale))
+        result = await sb.rpc(
+            "stale_nutrition_products", {"p_cutoff": cutoff, "p_after": after, "p_limit": page},
+        ).execute()
+        stale += result.data
+        if len(result.data) < page:
+            break
+        after = result.data[-1]["id"]
+    return stale
+
+
+async def _match_upc(upc: str, semaphore: asyncio.Semaphore) -> int | None:
+    """fdc_id of the branded food whose gtinUpc matches upc, if any."""
+    target = _normalize_upc(upc)
+    if not target:
+        return None
+    async with semaphore:
+        result = await fdc.search_foods(upc, page_size=10, data_types=["Branded"])
+    for food in result.get("foods", []):
+        if _normalize_upc(food.get("gtinUpc")) == target:
+            return food["fdcId"]
+    return None
+
+
+async def enrich_products(
+    limit: int | None = None,
+    max_age: timedelta = DEFAULT_MAX_AGE,
+) -> dict:
+    """
+    enrich up to `limit` stale products. None means
+    NUTRITION_MAX_SEARCHES_PER_RUN, and 0 (either way) means all of them.
+
+    returns {"candidates", "matched", "unmatched", "search_errors",
+    "fetch_errors", "written"}. a failed upc search is logged and retried on
+    the next run; the rest of the batch still goes through. so is a failed
+    food fetch: products whose foods came back are still written, the others
+    (fetch_errors) are left stale for the next run.
+    """
+    sb = get_supabase()
+    if limit is None:
+        limit = settings.NUTRITION_MAX_SEARCHES_PER_RUN
+    products = await _stale_products(limit or None, max_age)
+    summary = {
+        "candidates": len(products), "matched": 0, "unmatched": 0,
+        "search_errors": 0, "fetch_errors": 0, "written": 0,
+    }
+    if not products:
+        return summary
+
+    semaphore = asyncio.Semaphore(max(1, settings.NUTRITION_SEARCH_CONCURRENCY))
+    matches = await asyncio.gather(
+        *(_match_upc(p["upc"], semaphore) for p in products),
+        return_exceptions=True,
+    )
+
+    fdc_ids: dict[str, int | None] = {}
+    for product, match in zip(products, matches):
+        if isinstance(match, Exception):
+            logger.warning("fdc search failed for upc %s: %s", product["upc"], match)
+            summary["search_errors"] += 1
+            continue
+        fdc_ids[product["id"]] = match
+
+    matched_ids = [fdc_id for fdc_id in fdc_ids.values() if fdc_id is not None]
+    nutrients = list(fdc.NUTRIENT_IDS)
+    fetch_failed = False
+    try:
+        fetched = await fdc.get_foods_bulk(matched_ids, nutrients=nutrients)
+    except Exception as e:
+        # one 429 fails the whole call, but the chunks that came back are
+        # cached: keep those rather than lose this run's searches
+        logger.warning("fdc bulk fetch of %d foods failed: %s", len(matched_ids), e)
+        fetch_failed = True
+        cached = await food_cache.get_many([cache_key(fdc_id, nutrients) for fdc_id in matched_ids])
+        fetched = list(cached.values())
+    foods = {food["fdcId"]: food for food in fetched}
+
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for product_id, fdc_id in fdc_ids.items():
+        food = foods.get(fdc_id) if fdc_id is not None else None
+        if food is None and fdc_id is not None and fetch_failed:
+            # not "unmatched": the fetch may have failed for it
+            summary["fetch_errors"] += 1
+            continue
+        if food is None:
+            summary["unmatched"] += 1
+            rows.append({
+                "product_id": product_id,
+                "fdc_id": None,
+                "fdc_description": None,
+                **dict.fromkeys(fdc.NUTRIENT_IDS.values()),
+                "enriched_at": now,
+            })
+            continue
+        summary["matched"] += 1
+        rows.append({
+            "product_id": product_id,
+            "fdc_id": fdc_id,
+            "fdc_description": food.get("description"),
+            **flatten_nutrients(food),
+            "enriched_at": now,
+        })
+
+    written: list[str] = []
+    for i in range(0, len(rows), _WRITE_CHUNK):
+        result = await sb.table("product_nutrition").upsert(
+            rows[i:i + _WRITE_CHUNK], on_conflict="product_id"
+        ).execute()
+        written += [row["product_id"] for row in result.data]
+    summary["written"] = len(written)
+
+    # product responses and search rows embed product_nutrition: drop the
+    # ones cached (often just refilled by the scrape) before enrichment
+    if written:
+        forget_rows(written)
+        await response_cache.invalidate(["products", *(f"product:{product_id}" for product_id in written)])
+
+    logger.info(
+        "nutrition enrichment: %d candidates, %d matched, %d unmatched, %d search errors, %d fetch errors",
+        summary["candidates"], summary["matched"], summary["unmatched"], summary["search_errors"],
+        summary["fetch_errors"],
+    )
+    return summary
@@ -3,9 +3,49 @@ product queries against supabase.
 
 all functions return plain dicts (supabase response data).
 the route layer handles serialization to pydantic response models.
+
+text search goes through the search_product_ids() rpc
+(migrations/0004_product_search.sql): indexed prefix full-text + trigram
+matching on name and brand, ranked best match first.
+
+with SEARCH_INDEX_ENABLED, text search is answered from the in-process
+index in app.services.search_index instead, once it has loaded.
+
+nutrition comes from the product_nutrition table filled by
+app.services.nutrition, embedded in the same query - no fdc calls here.
+
+category slugs resolve in memory through app.services.category_registry.
+
+listing counts use the requested count mode (exact / planned / estimated)
+and are cached per category for a short ttl (see app.core.counts), so a
+client paging through a category pays for the count once.
+
+get_product() is single-flight: concurrent lookups of the same product
+share one query (see app.core.singleflight).
 """
 
+from app.core.counts import count_cache
+from app.core.pagination import (
+    InvalidCursorError, after_filter, cursor_page, decode_cursor, encode_cursor, offset_has_more,
+)
+from app.core.singleflight import SingleFlight
 from app.core.supabase import get_supabase
+from app.services.category_registry import category_registry
+from app.services.search_index import product_index
+
+_flight = SingleFlight("products")
+
+_NUTRITION = (
+    "product_nutrition(fdc_id, calories_kcal, protein_g, fat_g, carbs_g, "
+    "fiber_g, sodium_mg, cholesterol_mg, sugar_g)"
+)
+
+_LIST_COLUMNS = (
+    "id, name, brand, image_url, unit_size, upc, "
+    "product_categories(id, name, slug), "
+    "store_products(price, sale_price, in_stock, store_id, stores(name, chain, store_number)), "
+    f"{_NUTRITION}"
+)
 
 
 async def search_products(
@@ -14,48 +54,125 @@ async def search_products(
     store_id: str | None = None,
     page: int = 1,
     page_size: int = 50,
+    cursor: str | None = None,
+    with_count: bool = False,
+    count_mode: str = "exact",
 ) -> dict:
     """
     search products with optional filters.
 
-    returns {"data": [...products...], "count": total_matching}
+    returns {"data": [...products...], "count": total_matching, "next_cursor": str | None}
+
+    browsing (no query) supports keyset pagination: pass cursor="" for the
+    first page, then each response's next_cursor. pages are ordered by
+    (name, id) and cost the same at any depth; the total count is skipped
+    unless with_count is set. without a cursor, `page` is an offset as
+    before and the count is always included. a text query pages by offset
+    only.
+
+    count_mode picks how browse counts are taken: "exact" (COUNT(*)),
+    "planned" (planner estimate) or "estimated" (exact when small). counts
+    are served from count_cache when fresh, in which case the page query
+    skips counting altogether. text search totals come from the rpc/index.
+
+    with a query, results are ranked by relevance: prefix matches on any word
+    of the name or brand ("whole mi" finds "Whole Milk"), tolerant of small
+    typos. without one they are sorted by name.
 
     when store_id is provided, joins store_products to include price at that store.
     """
     sb = get_supabase()
     offset = (page - 1) * page_size
 
-    q = sb.table("products").select(
-        "id, name, brand, image_url, unit_size, upc, "
-        "product_categories(id, name, slug), "
-        "store_products(price, sale_price, in_stock, store_id, stores(name, chain, store_number))",
-        count="exact",
-    )
-
-    if query:
-        q = q.ilike("name", f"%{query}%")
-
-    if category_slug:
-        cat_result = sb.table("product_categories").select("id").eq("slug", category_slug).execute()
-        if cat_result.data:
-            q = q.eq("category_id", cat_result.data[0]["id"])
-
-    q = q.range(offset, offset + page_size - 1).order("name")
-    result = q.execute()
-
-    return {"data": result.data, "count": result.count}
+    category_id = await category_registry.resolve(category_slug) if category_slug else None
+
+    if query and query.strip():
+        if cursor is not None:
+            raise InvalidCursorError("cursor pagination isn't supported with a text query")
+        if product_index.ready:
+            ids, total = product_index.search(query, category_id, offset, page_size)
+            return {"data": await _hydrate(sb, ids), "count": total, "next_cursor": None}
+        return await _search_ranked(sb, query, category_id, offset, page_size)
+
+    count_key = ("products", category_id)
+
+    if cursor is not None:
+        strategy, cached = count_cache.strategy_for(count_key, count_mode) if with_count else (None, None)
+        q = sb.table("products").select(_LIST_COLUMNS, count=strategy)
+        if category_id:
+            q = q.eq("category_id", category_id)
+        if cursor:
+            name, last_id = decode_cursor(cursor, 2)
+            q = q.or_(after_filter("name", name, last_id))
+        result = await q.order("name").order("id").limit(page_size + 1).execute()
+        data, next_cursor = cursor_page(result.data, page_size, lambda row: [row["name"], row["id"]])
+        count = count_cache.resolve(count_key, count_mode, result.count, cached) if with_count else None
+        return {"data": data, "count": count, "next_cursor": next_cursor}
+
+    strategy, cached = count_cache.strategy_for(count_key, count_mode)
+    q = sb.table("products").select(_LIST_COLUMNS, count=strategy)
+    if category_id:
+        q = q.eq("category_id", category_id)
+
+    q = q.range(offset, offset + page_size - 1).order("name").order("id")
+    result = await q.execute()
+    count = count_cache.resolve(count_key, count_mode, result.count, cached)
+
+    # lets an offset client switch to cursors from here on
+    next_cursor = None
+    if result.data and offset_has_more(offset, len(result.data), page_size, count, count_mode):
+        last = result.data[-1]
+        next_cursor = encode_cursor([last["name"], last["id"]])
+    return {"data": result.data, "count": count, "next_cursor": next_cursor}
+
+
+async def _search_ranked(sb, query: str, category_id: str | None, offset: int, page_size: int) -> dict:
+    """
+    one page of text search results: ids and the total come from the
+    search_product_ids rpc (index-backed), then the page is loaded by id and
+    put back in rank order.
+    """
+    params = {"q": query, "category": category_id, "lim": page_size, "off": offset}
+    ranked = (await sb.rpc("search_product_ids", params).execute()).data
+    if not ranked:
+        # past the last page: the rpc returns no rows, so no total either
+        if offset == 0:
+            return {"data": [], "count": 0, "next_cursor": None}
+        first = (await sb.rpc("search_product_ids", {**params, "lim": 1, "off": 0}).execute()).data
+        return {"data": [], "count": first[0]["total"] if first else 0, "next_cursor": None}
+
+    ids = [row["id"] for row in ranked]
+    result = await sb.table("products").select(_LIST_COLUMNS).in_("id", ids).execute()
+    by_id = {row["id"]: row for row in result.data}
+    return {"data": [by_id[i] for i in ids if i in by_id], "count": ranked[0]["total"], "next_cursor": None}
+
+
+async def _hydrate(sb, ids: list[str]) -> list[dict]:
+    """list rows for ids, in order: from the index's row cache, one query for the rest."""
+    rows = product_index.cached_rows(ids)
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        result = await sb.table("products").select(_LIST_COLUMNS).in_("id", missing).execute()
+        product_index.cache_rows(result.data)
+        rows.update({row["id"]: row for row in result.data})
+    return [rows[i] for i in ids if i in rows]
 
 
 async def get_product(product_id: str) -> dict | None:
     """get a single product with all store prices."""
+    return await _flight.do(product_id, lambda: _get_product(product_id))
+
+
+async def _get_product(product_id: str) -> dict | None:
     sb = get_supabase()
 
     try:
-        result = sb.table("products").select(
+        result = await sb.table("products").select(
             "id, name, brand, image_url, unit_size, upc, "
             "product_categories(id, name, slug), "
             "store_products(price, sale_price, in_stock, store_id, "
-            "stores(id, name, chain, store_number, zip_code))"
+            "stores(id, name, chain, store_number, zip_code)), "
+            f"{_NUTRITION}"
         ).eq("id", product_id).execute()
 
         if not result.data:
@@ -70,7 +187,7 @@ async def get_product_prices(product_id: str) -> list[dict]:
     sb = get_supabase()
 
     try:
-        result = sb.table("store_products").select(
+        result = await sb.table("store_products").select(
             "price, sale_price, in_stock, updated_at, "
             "stores(id, name, chain, store_number, zip_code)"
         ).eq("product_id", product_id).order("price").execute()
@@ -0,0 +1,298 @@
+"""
+optional in-process typeahead index over product name and brand.
+
+the catalog is small and only changes when a scrape writes products, so
+/products?q= can be answered from memory instead of a postgres round-trip:
+
+- every name/brand word goes into a sorted token list; each token points to
+  a compact array('I') posting list of document numbers. a query word
+  matches every token it is a prefix of (a bisect plus a short scan), and
+  the words of a query are and-ed, like the search_product_ids rpc.
+- matches are ranked in tiers (see search()) and the page of ids is hydrated from a small ttl cache of
+  product rows, falling back to one `in` query for misses.
+- the index is loaded at startup (SEARCH_INDEX_ENABLED) and kept current by
+  db_writer.upsert_products, which calls refresh_products() with the rows it
+  wrote. a changed product gets a new document number and the old one is
+  tombstoned; tombstones are compacted away once they pile up.
+
+until the first load finishes (or when disabled) product_service uses the
+rpc as before.
+"""
+
+import asyncio
+import heapq
+import logging
+import re
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PAGE = 1000
+_WORD = re.compile(r"[^\W_]+")
+
+# compact once this many documents (and at least this share of all) are dead
+_COMPACT_MIN_DEAD = 1000
+_COMPACT_DEAD_SHARE = 0.25
+
+
+def _words(text: str | None) -> list[str]:
+    return _WORD.findall((text or "").lower())
+
+
+class ProductSearchIndex:
+    """prefix index over product name + brand, with tombstoned updates."""
+
+    def __init__(self) -> None:
+        self.ready = False
+        self._reset()
+        self._loading: list[dict] | None = None
+        self._rows: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def _reset(self) -> None:
+        self._ids: list[str] = []
+        self._names: list[str] = []
+        self._names_lower: list[str] = []
+        self._brands: list[str | None] = []
+        self._categories: list[str | None] = []
+        self._dead: set[int] = set()
+        self._doc_of: dict[str, int] = {}
+        # every name/brand word (matching), name words and first name word
+        # (ranking). _tokens is the sorted key list of _postings, a superset
+        # of the other two.
+        self._tokens: list[str] = []
+        self._postings: dict[str, array] = {}
+        self._name_postings: dict[str, array] = {}
+        self._first_postings: dict[str, array] = {}
+        self._category_postings: dict[str | None, array] = {}
+
+    # -- building ---------------------------------------------------------
+
+    async def load(self, sb) -> None:
+        """(re)build from the products table. writes that land meanwhile are replayed."""
+        start = time.perf_counter()
+        self._loading = []
+        rows: list[dict] = []
+        offset = 0
+        try:
+            while True:
+                result = await sb.table("products").select(
+                    "id, name, brand, category_id"
+                ).order("id").range(offset, offset + _PAGE - 1).execute()
+                rows.extend(result.data)
+                if len(result.data) < _PAGE:
+                    break
+                offset += _PAGE
+
+            pending, self._loading = self._loading, None
+            self._build(rows)
+            self.ready = True
+            self.upsert(pending)
+        finally:
+            self._loading = None
+        logger.info(
+            "product search index: %d products, %d tokens in %.2fs",
+            len(self._doc_of), len(self._tokens), time.perf_counter() - start,
+        )
+
+    def _build(self, rows: list[dict]) -> None:
+        self._reset()
+        for row in rows:
+            self._index(row)
+        self._tokens = sorted(self._postings)
+
+    def _index(self, row: dict, incremental: bool = False) -> None:
+        """
+        append row as a new document and add it to the posting lists.
+        incremental keeps _tokens sorted as new words show up; a full build
+        sorts once at the end instead.
+        """
+        doc = len(self._ids)
+        name = row.get("name") or ""
+        self._ids.append(row["id"])
+        self._names.append(name)
+        self._names_lower.append(name.lower())
+        self._brands.append(row.get("brand"))
+        self._categories.append(row.get("category_id"))
+        self._doc_of[row["id"]] = doc
+        self._category_postings.setdefault(row.get("category_id"), array("I")).append(doc)
+
+        name_words = _words(name)
+        for postings, words in (
+            (self._postings, set(name_words) | set(_words(row.get("brand")))),
+            (self._name_postings, set(name_words)),
+            (self._first_postings, name_words[:1]),
+        ):
+            for word in words:
+                docs = postings.get(word)
+                if docs is None:
+                    docs = postings[word] = array("I")
+                    if incremental and postings is self._postings:
+                        insort(self._tokens, word)
+                docs.append(doc)
+
+    def upsert(self, rows: list[dict]) -> None:
+        """add or replace products (rows with id, name, brand, category_id)."""
+        if self._loading is not None:
+            self._loading.extend(rows)
+        for row in rows:
+            self._rows.pop(row["id"], None)
+        if not self.ready:
+            return
+
+        for row in rows:
+            old = self._doc_of.get(row["id"])
+            if old is not None:
+                self._dead.add(old)
+            self._index(row, incremental=True)
+
+        if len(self._dead) >= _COMPACT_MIN_DEAD and len(self._dead) >= _COMPACT_DEAD_SHARE * len(self._ids):
+            self._compact()
+
+    def _compact(self) -> None:
+        self._build([
+            {
+                "id": self._ids[doc],
+                "name": self._names[doc],
+                "brand": self._brands[doc],
+                "category_id": self._categories[doc],
+            }
+            for doc in range(len(self._ids)) if doc not in self._dead
+        ])
+
+    # -- querying ---------------------------------------------------------
+
+    def _prefixed(self, postings: dict[str, array], term: str) -> set[int]:
+        """documents with a word in `postings` that starts with term."""
+        docs: set[int] = set()
+        i = bisect_left(self._tokens, term)
+        while i < len(self._tokens) and self._tokens[i].startswith(term):
+            found = postings.get(self._tokens[i])
+            if found is not None:
+                docs.update(found)
+            i += 1
+        return docs
+
+    def search(
+        self,
+        query: str,
+        category_id: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> tuple[list[str], int]:
+        """
+        ranked product ids for one page, and the total number of matches.
+
+        every query word must prefix a name or brand word. matches are ranked
+        in tiers, then by name:
+          1. the name's first word starts with the first query word
+          2. every query word is a whole name word
+          3. every query word prefixes a name word
+          4. the rest (some words only match the brand)
+        tiers are set operations over posting lists, so ranking costs no
+        per-document python beyond the page that is returned.
+        """
+        terms = list(dict.fromkeys(_words(query)))
+        if not terms:
+            return [], 0
+
+        hits: set[int] | None = None
+        for term in sorted(terms, key=len, reverse=True):
+            docs = self._prefixed(self._postings, term)
+            hits = docs if hits is None else hits & docs
+            if not hits:
+                return [], 0
+
+        hits -= self._dead
+        if category_id is not None:
+            hits &= set(self._category_postings.get(category_id, ()))
+
+        whole = set(hits)
+        prefixed = set(hits)
+        for term in terms:
+            whole &= set(self._name_postings.get(term, ()))
+            prefixed &= self._prefixed(self._name_postings, term)
+        leading = hits & self._prefixed(self._first_postings, terms[0])
+
+        page: list[int] = []
+        wanted = offset + limit
+        seen: set[int] = set()
+        for tier in (leading, whole, prefixed, hits):
+            tier = tier - seen
+            if not tier:
+                continue
+            page += heapq.nsmallest(wanted - len(page), tier, key=self._names_lower.__getitem__)
+            if len(page) >= wanted:
+                break
+            seen |= tier
+        return [self._ids[doc] for doc in page[offset:wanted]], len(hits)
+
+    # -- hydration cache --------------------------------------------------
+
+    def cached_rows(self, ids: list[str]) -> dict[str, dict]:
+        now = time.monotonic()
+        found = {}
+        for product_id in ids:
+            entry = self._rows.get(product_id)
+            if entry is not None and entry[0] > now:
+                self._rows.move_to_end(product_id)
+                found[product_id] = entry[1]
+        return found
+
+    def cache_rows(self, rows: list[dict]) -> None:
+        expires_at = time.monotonic() + settings.SEARCH_INDEX_ROW_TTL_SECONDS
+        for row in rows:
+            self._rows[row["id"]] = (expires_at, row)
+            self._rows.move_to_end(row["id"])
+        while len(self._rows) > settings.SEARCH_INDEX_ROW_CACHE_SIZE:
+            self._rows.popitem(last=False)
+
+    def drop_rows(self, ids: list[str]) -> None:
+        for product_id in ids:
+            self._rows.pop(product_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "products": len(self._doc_of),
+            "tokens": len(self._tokens),
+            "dead_documents": len(self._dead),
+            "cached_rows": len(self._rows),
+        }
+
+
+product_index = ProductSearchIndex()
+
+
+def refresh_products(rows: list[dict]) -> None:
+    """called by db_writer after products are written: update the index and drop stale cached rows."""
+    product_index.upsert([
+        {"id": r["id"], "name": r.get("name"), "brand": r.get("brand"), "category_id": r.get("category_id")}
+        for r in rows
+    ])
+
+
+def forget_rows(product_ids: list[str]) -> None:
+    """
+    called when something embedded in product rows changes but not the
+    indexed name/brand/category (nutrition enrichment): drop the cached rows.
+    """
+    product_index.drop_rows(product_ids)
+
+
+def start_index_load(sb) -> asyncio.Task | None:
+    """start the initial load if SEARCH_INDEX_ENABLED. the app serves rpc search meanwhile."""
+    if not settings.SEARCH_INDEX_ENABLED:
+        return None
+
+    async def run() -> None:
+        try:
+            await product_index.load(sb)
+        except Exception:
+            logger.exception("product search index failed to load; using the search rpc")
+
+    return asyncio.create_task(run())
@@ -1,5 +1,7 @@
 """store queries against supabase."""
 
+from app.core.counts import count_cache
+from app.core.pagination import after_filter, cursor_page, decode_cursor, encode_cursor, offset_has_more
 from app.core.supabase import get_supabase
 
 
@@ -17,7 +19,7 @@ async def list_stores(
     if zip_code:
         q = q.eq("zip_code", zip_code)
 
-    result = q.order("name").execute()
+    result = await q.order("name").execute()
     return result.data
 
 
@@ -26,19 +28,51 @@ async def get_store_products(
     category_slug: str | None = None,
     page: int = 1,
     page_size: int = 50,
+    cursor: str | None = None,
+    with_count: bool = False,
+    count_mode: str = "exact",
 ) -> dict:
-    """get products available at a specific store with prices."""
+    """
+    get products available at a specific store with prices, cheapest first.
+
+    returns {"data": [...], "count": int | None, "next_cursor": str | None}.
+    pass cursor="" and then each next_cursor for keyset pagination on
+    (price, id): flat latency at any depth, count only with with_count.
+    without a cursor, `page` is an offset and the count is included.
+
+    count_mode is "exact", "planned" or "estimated"; the store's count is
+    cached (app.core.counts) until the ttl runs out or a scrape writes to
+    the store.
+    """
     sb = get_supabase()
     offset = (page - 1) * page_size
+    keyset = cursor is not None
+    count_key = ("store_products", store_id)
+    counted = with_count or not keyset
+    strategy, cached = count_cache.strategy_for(count_key, count_mode) if counted else (None, None)
 
     q = sb.table("store_products").select(
-        "price, sale_price, in_stock, "
+        "id, price, sale_price, in_stock, "
         "products(id, name, brand, image_url, unit_size, upc, "
         "product_categories(name, slug))",
-        count="exact",
+        count=strategy,
     ).eq("store_id", store_id)
 
-    q = q.range(offset, offset + page_size - 1).order("price")
-    result = q.execute()
+    if keyset:
+        if cursor:
+            price, last_id = decode_cursor(cursor, 2)
+            q = q.or_(after_filter("price", price, last_id))
+        result = await q.order("price").order("id").limit(page_size + 1).execute()
+        data, next_cursor = cursor_page(result.data, page_size, lambda row: [row["price"], row["id"]])
+        count = count_cache.resolve(count_key, count_mode, result.count, cached) if counted else None
+        return {"data": data, "count": count, "next_cursor": next_cursor}
+
+    q = q.range(offset, offset + page_size - 1).order("price").order("id")
+    result = await q.execute()
+    count = count_cache.resolve(count_key, count_mode, result.count, cached)
 
-    return {"data": result.data, "count": result.count}
+    next_cursor = None
+    if result.data and offset_has_more(offset, len(result.data), page_size, count, count_mode):
+        last = result.data[-1]
+        next_cursor = encode_cursor([last["price"], last["id"]])
+    return {"data": result.data, "count": count, "next_cursor": next_cursor}
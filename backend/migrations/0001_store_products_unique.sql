@@ -0,0 +1,13 @@
+-- one current-price row per (store, product).
+-- db_writer.upsert_products bulk-upserts store_products with
+-- on_conflict=store_id,product_id, which needs this unique index.
+
+-- drop duplicates left by the old select-then-insert writer, keeping the newest
+delete from store_products a
+using store_products b
+where a.store_id = b.store_id
+  and a.product_id = b.product_id
+  and (a.updated_at, a.id) < (b.updated_at, b.id);
+
+create unique index if not exists store_products_store_id_product_id_key
+  on store_products (store_id, product_id);
@@ -0,0 +1,7 @@
+-- when a store_products row last got a store_product_price_history row.
+-- db_writer.upsert_products only writes history on a price change, plus a
+-- heartbeat row once this is older than HISTORY_HEARTBEAT. rows start out
+-- null, which counts as due, so each gets one heartbeat on the next scrape.
+
+alter table store_products
+  add column if not exists last_history_at timestamptz;
@@ -0,0 +1,24 @@
+-- per-product nutrition, flattened from usda fdc by
+-- app/services/nutrition.enrich_products (run after each scrape job, or
+-- scripts/enrich_nutrition.py). one row per product that has been looked
+-- up: fdc_id is null when no fdc food matched the product's upc, so the
+-- product isn't searched again until the row is older than the
+-- enrichment max age. columns match fdc.NUTRIENT_IDS.
+
+create table if not exists product_nutrition (
+  product_id     uuid primary key references products(id) on delete cascade,
+  fdc_id         integer,
+  fdc_description text,
+  calories_kcal  numeric,
+  protein_g      numeric,
+  fat_g          numeric,
+  carbs_g        numeric,
+  fiber_g        numeric,
+  sodium_mg      numeric,
+  cholesterol_mg numeric,
+  sugar_g        numeric,
+  enriched_at    timestamptz not null default now()
+);
+
+create index if not exists product_nutrition_enriched_at_idx
+  on product_nutrition (enriched_at);
@@ -0,0 +1,69 @@
+-- indexed product search for product_service.search_products, replacing
+-- `name ilike '%q%'` (a sequential scan of products on every keystroke).
+--
+-- - search_vector: name (weight A) + brand (weight B), 'simple' config so
+--   brand names and short words aren't stemmed away. gin-indexed.
+-- - search_text: lower(name + brand) with a trigram index, for typos and
+--   mid-word matches ("orgnic", "oat milk" vs "oatmilk").
+-- - search_product_ids(): prefix full-text match ("whole mi" -> whole:* & mi:*)
+--   or trigram similarity, ranked, with the total match count on every row.
+--   the api fetches the page of products by id afterwards.
+
+create extension if not exists pg_trgm;
+
+alter table products
+  add column if not exists search_vector tsvector
+    generated always as (
+      setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+      setweight(to_tsvector('simple', coalesce(brand, '')), 'B')
+    ) stored,
+  add column if not exists search_text text
+    generated always as (lower(coalesce(name, '') || ' ' || coalesce(brand, ''))) stored;
+
+create index if not exists products_search_vector_idx
+  on products using gin (search_vector);
+
+create index if not exists products_search_text_trgm_idx
+  on products using gin (search_text gin_trgm_ops);
+
+create or replace function search_product_ids(
+  q text,
+  category uuid default null,
+  lim integer default 50,
+  off integer default 0
+)
+returns table (id uuid, rank real, total bigint)
+language sql
+stable
+as $$
+  with input as (
+    select
+      lower(trim(q)) as text,
+      -- every word becomes a prefix term: "whole mi" -> 'whole:* & mi:*'
+      (
+        select to_tsquery('simple', string_agg(word || ':*', ' & '))
+        from regexp_split_to_table(
+          trim(regexp_replace(lower(q), '[^[:alnum:]]+', ' ', 'g')), ' '
+        ) as word
+        where word <> ''
+      ) as tsq
+  ),
+  matches as (
+    select
+      p.id,
+      p.name,
+      (
+        coalesce(ts_rank(p.search_vector, i.tsq), 0)
+        + similarity(p.search_text, i.text)
+        -- names that start with the query float to the top of typeahead
+        + case when lower(p.name) like i.text || '%' then 1 else 0 end
+      )::real as rank
+    from products p, input i
+    where ((i.tsq is not null and p.search_vector @@ i.tsq) or p.search_text % i.text)
+      and (category is null or p.category_id = category)
+  )
+  select m.id, m.rank, count(*) over () as total
+  from matches m
+  order by m.rank desc, m.name
+  limit lim offset off
+$$;
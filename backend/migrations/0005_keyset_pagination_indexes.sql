@@ -0,0 +1,14 @@
+-- indexes for keyset pagination (app/core/pagination.py). each matches a
+-- listing's filter + (sort key, id) order, so "rows after the cursor" is an
+-- index range scan no matter how deep the page is.
+
+-- GET /products (browse, optionally by category), ordered by name, id
+create index if not exists products_name_id_idx
+  on products (name, id);
+
+create index if not exists products_category_name_id_idx
+  on products (category_id, name, id);
+
+-- GET /stores/{id}/products, ordered by price, id
+create index if not exists store_products_store_price_id_idx
+  on store_products (store_id, price, id);
@@ -0,0 +1,202 @@
+-- running per-list, per-store totals for GET /grocery-lists/{id}/totals, so
+-- the list screen doesn't need the whole nested product tree to show what
+-- the list costs at each store.
+--
+-- one row per (list, store) that prices at least one line of the list:
+-- total is sum(quantity x unit price) over the lines the store prices (the
+-- sale price when lower, in-stock only) and items_priced how many lines
+-- that is. lines with a product the store doesn't carry are "missing" at
+-- that store (the api reports lines - items_priced).
+--
+-- kept current by triggers, as deltas rather than recomputes:
+-- - grocery_list_items insert/update/delete (add_item, update_item,
+--   delete_item, the batch endpoint): the old line's cost is taken out of
+--   every store that prices its product and the new line's put in.
+-- - store_products insert/delete and price/sale_price/in_stock changes
+--   (scraper upserts): the old price is taken out of every list holding the
+--   product and the new one put in. rewrites of an unchanged price (most of
+--   a scrape) don't fire.
+--
+-- each delta is computed from its own transaction's snapshot, so an item
+-- written while a scrape changes that product's price can leave a total on
+-- the old price. the scraper reconciles: after writing it calls
+-- refresh_list_store_totals_for_products() for the products whose price it
+-- changed, which recomputes every list holding them from scratch
+-- (refresh_list_store_totals(list_id) does one list).
+
+create table if not exists grocery_list_store_totals (
+  list_id      uuid not null references grocery_lists(id) on delete cascade,
+  store_id     uuid not null references stores(id) on delete cascade,
+  total        numeric not null default 0,
+  items_priced integer not null default 0,
+  updated_at   timestamptz not null default now(),
+  primary key (list_id, store_id)
+);
+
+-- per-user data: no policies, so only the service key (the backend) reads
+-- or writes it, never the anon key the web app ships
+alter table grocery_list_store_totals enable row level security;
+
+create or replace function _unit_price(price numeric, sale_price numeric)
+returns numeric
+language sql
+immutable
+as $$
+  select least(price, coalesce(sale_price, price))
+$$;
+
+-- add (sign = 1) or take out (sign = -1) one line's cost at every store
+-- that prices its product. skipped while the list itself is being deleted.
+create or replace function _apply_list_line(p_list uuid, p_product uuid, p_quantity integer, p_sign integer)
+returns void
+language sql
+as $$
+  insert into grocery_list_store_totals as t (list_id, store_id, total, items_priced)
+  select p_list, sp.store_id, p_sign * p_quantity * _unit_price(sp.price, sp.sale_price), p_sign
+  from store_products sp
+  where sp.product_id = p_product
+    and sp.price is not null
+    and sp.in_stock is not false
+    and exists (select 1 from grocery_lists l where l.id = p_list)
+  on conflict (list_id, store_id) do update
+    set total = t.total + excluded.total,
+        items_priced = t.items_priced + excluded.items_priced,
+        updated_at = now()
+$$;
+
+create or replace function _grocery_list_items_totals()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') and old.product_id is not null then
+    perform _apply_list_line(old.grocery_list_id, old.product_id, old.quantity, -1);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') and new.product_id is not null then
+    perform _apply_list_line(new.grocery_list_id, new.product_id, new.quantity, 1);
+  end if;
+  return null;
+end
+$$;
+
+drop trigger if exists grocery_list_items_totals on grocery_list_items;
+create trigger grocery_list_items_totals
+  after insert or delete on grocery_list_items
+  for each row execute function _grocery_list_items_totals();
+
+-- checking an item off (is_checked) doesn't change what the list costs
+drop trigger if exists grocery_list_items_totals_update on grocery_list_items;
+create trigger grocery_list_items_totals_update
+  after update of product_id, quantity, grocery_list_id on grocery_list_items
+  for each row
+  when (
+    old.product_id is distinct from new.product_id
+    or old.quantity is distinct from new.quantity
+    or old.grocery_list_id is distinct from new.grocery_list_id
+  )
+  execute function _grocery_list_items_totals();
+
+-- add (sign = 1) or take out (sign = -1) one store price in every list
+-- holding the product
+create or replace function _apply_store_price(
+  p_product uuid, p_store uuid, p_price numeric, p_sale_price numeric, p_in_stock boolean, p_sign integer
+)
+returns void
+language sql
+as $$
+  insert into grocery_list_store_totals as t (list_id, store_id, total, items_priced)
+  select i.grocery_list_id, p_store,
+         p_sign * sum(i.quantity) * _unit_price(p_price, p_sale_price), p_sign * count(*)
+  from grocery_list_items i
+  where i.product_id = p_product
+    and p_price is not null
+    and p_in_stock is not false
+  group by i.grocery_list_id
+  on conflict (list_id, store_id) do update
+    set total = t.total + excluded.total,
+        items_priced = t.items_priced + excluded.items_priced,
+        updated_at = now()
+$$;
+
+create or replace function _store_products_list_totals()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    perform _apply_store_price(old.product_id, old.store_id, old.price, old.sale_price, old.in_stock, -1);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform _apply_store_price(new.product_id, new.store_id, new.price, new.sale_price, new.in_stock, 1);
+  end if;
+  return null;
+end
+$$;
+
+drop trigger if exists store_products_list_totals on store_products;
+create trigger store_products_list_totals
+  after insert or delete on store_products
+  for each row execute function _store_products_list_totals();
+
+drop trigger if exists store_products_list_totals_update on store_products;
+create trigger store_products_list_totals_update
+  after update of price, sale_price, in_stock, product_id, store_id on store_products
+  for each row
+  when (
+    old.price is distinct from new.price
+    or old.sale_price is distinct from new.sale_price
+    or old.in_stock is distinct from new.in_stock
+    or old.product_id is distinct from new.product_id
+    or old.store_id is distinct from new.store_id
+  )
+  execute function _store_products_list_totals();
+
+-- recompute one list's totals from scratch (repairs, and the backfill below)
+create or replace function refresh_list_store_totals(p_list uuid)
+returns void
+language sql
+as $$
+  delete from grocery_list_store_totals where list_id = p_list;
+  insert into grocery_list_store_totals (list_id, store_id, total, items_priced)
+  select i.grocery_list_id, sp.store_id,
+         sum(i.quantity * _unit_price(sp.price, sp.sale_price)), count(*)
+  from grocery_list_items i
+  join store_products sp on sp.product_id = i.product_id
+  where i.grocery_list_id = p_list
+    and sp.price is not null
+    and sp.in_stock is not false
+  group by i.grocery_list_id, sp.store_id;
+$$;
+
+-- recompute every list holding any of these products; returns how many
+-- lists. called by the scraper for the products whose price it changed.
+create or replace function refresh_list_store_totals_for_products(p_products uuid[])
+returns integer
+language plpgsql
+as $$
+declare
+  l uuid;
+  n integer := 0;
+begin
+  for l in
+    select distinct grocery_list_id from grocery_list_items where product_id = any(p_products)
+  loop
+    perform refresh_list_store_totals(l);
+    n := n + 1;
+  end loop;
+  return n;
+end
+$$;
+
+-- backend only (the service key), not through the api with the anon key
+revoke execute on function refresh_list_store_totals(uuid) from public, anon, authenticated;
+revoke execute on function refresh_list_store_totals_for_products(uuid[]) from public, anon, authenticated;
+grant execute on function refresh_list_store_totals(uuid) to service_role;
+grant execute on function refresh_list_store_totals_for_products(uuid[]) to service_role;
+
+-- backfill existing lists
+select refresh_list_store_totals(id) from grocery_lists;
+
+-- "every list holding this product" for the store_products trigger
+create index if not exists grocery_list_items_product_idx
+  on grocery_list_items (product_id);
@@ -0,0 +1,28 @@
+-- products due for nutrition enrichment, for
+-- app/services/nutrition.enrich_products: products with a upc and no
+-- product_nutrition row, or one older than p_cutoff.
+--
+-- the freshness filter runs here instead of in python, so a run reads only
+-- the stale products rather than the whole catalog. pages are keyset on id
+-- (pass the last id of the previous page as p_after, null for the first):
+-- each page is an index range scan on the products primary key, however
+-- far into the table it is.
+
+create or replace function stale_nutrition_products(p_cutoff timestamptz, p_after uuid, p_limit integer)
+returns table (id uuid, upc text)
+language sql
+stable
+as $$
+  select p.id, p.upc
+  from products p
+  left join product_nutrition n on n.product_id = p.id
+  where p.upc is not null
+    and (n.product_id is null or n.enriched_at < p_cutoff)
+    and (p_after is null or p.id > p_after)
+  order by p.id
+  limit p_limit
+$$;
+
+-- backend only (the service key), not through the api with the anon key
+revoke execute on function stale_nutrition_products(timestamptz, uuid, integer) from public, anon, authenticated;
+grant execute on function stale_nutrition_products(timestamptz, uuid, integer) to service_role;
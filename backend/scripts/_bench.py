@@ -0,0 +1,59 @@
+"""small helpers shared by the scripts/bench_*.py benchmarks."""
+
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """nearest-rank percentile of samples (pct in 0..100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(label: str, samples: list[float]) -> dict:
+    """latency summary in milliseconds for a list of per-call durations (seconds)."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "label": label,
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+def print_table(rows: list[dict]) -> None:
+    """print summary dicts as an aligned table."""
+    if not rows:
+        return
+    cols = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    print("  ".join("-" * widths[c] for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in cols))
+
+
+def time_sync(fn: Callable[[], object], iterations: int) -> list[float]:
+    """call fn() iterations times and return per-call durations."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def time_async(fn: Callable[[], Awaitable[object]], iterations: int) -> list[float]:
+    """await fn() iterations times and return per-call durations."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
@@ -0,0 +1,77 @@
+"""
+benchmark: require_auth overhead per request.
+
+measures the dependency on its own (no http server):
+- local verify: a fresh HS256 token each call, so every call checks the
+  signature, expiry and audience in-process (cache miss)
+- cached: the same token every call (token-hash lru hit)
+- remote: auth.get_user() against the configured supabase project. only runs
+  when a real access token is passed with --token.
+
+the local cases mint tokens with a throwaway secret, so they need no network.
+
+usage (from the backend/ directory):
+    PYTHONPATH=. uv run python scripts/bench_auth.py
+    PYTHONPATH=. uv run python scripts/bench_auth.py --token "$ACCESS_TOKEN" -n 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import jwt
+
+from app.auth.deps import require_auth
+from app.auth.tokens import token_cache
+from app.core.config import settings
+from scripts._bench import summarize, print_table, time_async
+
+_BENCH_SECRET = "bench-secret-not-used-anywhere-else-0123456789"
+
+
+def _mint_token() -> str:
+    now = int(time.time())
+    return jwt.encode(
+        {
+            "sub": str(uuid.uuid4()),
+            "aud": settings.SUPABASE_JWT_AUDIENCE,
+            "role": "authenticated",
+            "iat": now,
+            "exp": now + 3600,
+        },
+        _BENCH_SECRET,
+        algorithm="HS256",
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="measure require_auth overhead")
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    parser.add_argument("--token", help="real supabase access token for the remote case")
+    args = parser.parse_args()
+
+    settings.AUTH_MODE = "local"
+    settings.SUPABASE_JWT_SECRET = _BENCH_SECRET
+
+    tokens = iter([_mint_token() for _ in range(args.iterations)])
+    local = await time_async(lambda: require_auth(f"Bearer {next(tokens)}"), args.iterations)
+
+    token_cache.clear()
+    token = _mint_token()
+    cached = await time_async(lambda: require_auth(f"Bearer {token}"), args.iterations)
+
+    rows = [summarize("local verify (cache miss)", local), summarize("cached", cached)]
+
+    if args.token:
+        settings.AUTH_MODE = "remote"
+        remote_n = min(args.iterations, 50)
+        remote = await time_async(lambda: require_auth(f"Bearer {args.token}"), remote_n)
+        rows.append(summarize("remote auth.get_user()", remote))
+
+    print(f"\nrequire_auth overhead, {args.iterations} calls per local case\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+benchmark: db_writer.upsert_products rows/sec and round-trips per category.
+
+writes a synthetic category of N products for a throwaway "bench" store
+twice: the first pass inserts everything, the second updates the same rows
+(the steady state for daily scrapes). each pass reports rows/sec and the
+number of http requests sent to postgrest.
+
+run it against a local supabase stack, never a shared project:
+    supabase start   # postgres + postgrest on 127.0.0.1:54321
+    psql "$LOCAL_DB_URL" -f migrations/0001_store_products_unique.sql
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_KEY=<local service key> \\
+        PYTHONPATH=. uv run python scripts/bench_db_writer.py -n 300
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from app.core import supabase as supabase_core
+from app.scraper.config import StoreInfo, CategoryConfig
+from app.scraper.db_writer import ensure_store_exists, ensure_category_exists, upsert_products
+from app.scraper.shoprite import ShopRiteProduct
+from scripts._bench import print_table
+
+BENCH_STORE = StoreInfo(store_id="bench-0", zip_code="00000", name="Bench Store", chain="bench")
+BENCH_CATEGORY = CategoryConfig(
+    name="Bench", category_id="0", url_path="bench", breadcrumb="bench", slug="bench",
+)
+
+
+def _synthetic_products(n: int, price_bump: float = 0.0) -> list[ShopRiteProduct]:
+    scraped_at = datetime.now(timezone.utc).isoformat()
+    return [
+        ShopRiteProduct(
+            name=f"Bench Product {i:05d}",
+            price=round(1.99 + (i % 50) * 0.1 + price_bump, 2),
+            unit_size="16 oz",
+            upc=f"9{i:011d}",
+            store_id=BENCH_STORE.store_id,
+            store_zip=BENCH_STORE.zip_code,
+            scraped_at=scraped_at,
+            brand="Bench Brand",
+        )
+        for i in range(n)
+    ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="measure upsert_products throughput")
+    parser.add_argument("-n", "--rows", type=int, default=300)
+    args = parser.parse_args()
+
+    sb = supabase_core.get_supabase()
+    requests = 0
+
+    async def count_request(request):
+        nonlocal requests
+        requests += 1
+
+    supabase_core._http_client.event_hooks["request"].append(count_request)
+
+    store_uuid = await ensure_store_exists(BENCH_STORE)
+    cat_uuid = await ensure_category_exists(BENCH_CATEGORY)
+
+    rows = []
+    for label, bump in (("first scrape (inserts)", 0.0), ("re-scrape (updates)", 0.5)):
+        products = _synthetic_products(args.rows, price_bump=bump)
+        requests = 0
+        start = time.perf_counter()
+        result = await upsert_products(products, store_uuid, cat_uuid)
+        elapsed = time.perf_counter() - start
+        rows.append({
+            "pass": label,
+            "rows": args.rows,
+            "seconds": round(elapsed, 2),
+            "rows_per_s": round(args.rows / elapsed, 1),
+            "http_requests": requests,
+            "history_rows": result["history_inserted"],
+            "failed": len(result["failed"]),
+        })
+
+    await supabase_core.close_supabase()
+    print(f"\nupsert_products, {args.rows} synthetic products, {sb.supabase_url}\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+benchmark: GET /products page latency by depth, offset vs keyset cursor.
+
+seeds N synthetic products into the throwaway "bench-search" category
+(same data as bench_search.py) and times product_service.search_products
+for the same page at increasing depths, once by offset (page=N, exact
+count) and once by cursor (keyset on name, id, no count). offset latency
+grows with depth; cursor latency should stay flat. bench products are
+deleted at the end unless --keep is passed.
+
+run it against a local supabase stack, never a shared project:
+    supabase start
+    psql "$LOCAL_DB_URL" -f migrations/0005_keyset_pagination_indexes.sql
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_KEY=<local service key> \\
+        PYTHONPATH=. uv run python scripts/bench_pagination.py --rows 100000
+"""
+
+import argparse
+import asyncio
+
+from app.core import supabase as supabase_core
+from app.core.pagination import encode_cursor
+from app.scraper.db_writer import ensure_category_exists
+from app.services import product_service
+from scripts._bench import print_table, summarize, time_async
+from scripts.bench_search import BENCH_CATEGORY, _seed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="page latency by depth, offset vs cursor")
+    parser.add_argument("--rows", type=int, default=100_000, help="bench products to seed")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 10, 100, 1000, 1999],
+                        help="page numbers to time")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="leave the bench products in place")
+    args = parser.parse_args()
+
+    sb = supabase_core.get_supabase()
+    category_uuid = await ensure_category_exists(BENCH_CATEGORY)
+    existing = (await sb.table("products").select("id", count="exact", head=True)
+                .eq("category_id", category_uuid).execute()).count or 0
+    await _seed(sb, existing, args.rows, category_uuid)
+
+    rows = []
+    try:
+        for depth in args.depths:
+            offset = (depth - 1) * args.page_size
+            if offset >= args.rows:
+                continue
+
+            # the cursor a client would hold after walking to this page
+            cursor = ""
+            if offset:
+                last = (await sb.table("products").select("name, id").eq("category_id", category_uuid)
+                        .order("name").order("id").range(offset - 1, offset - 1).execute()).data[0]
+                cursor = encode_cursor([last["name"], last["id"]])
+
+            offset_samples = await time_async(
+                lambda: product_service.search_products(
+                    category_slug=BENCH_CATEGORY.slug, page=depth, page_size=args.page_size,
+                ),
+                args.iterations,
+            )
+            cursor_samples = await time_async(
+                lambda: product_service.search_products(
+                    category_slug=BENCH_CATEGORY.slug, page_size=args.page_size, cursor=cursor,
+                ),
+                args.iterations,
+            )
+            rows.append({"page": depth, **summarize("offset", offset_samples)})
+            rows.append({"page": depth, **summarize("cursor", cursor_samples)})
+    finally:
+        if not args.keep:
+            await sb.table("products").delete().eq("category_id", category_uuid).execute()
+        await supabase_core.close_supabase()
+
+    print(f"\nGET /products page latency, {args.rows} products, page_size {args.page_size}, {sb.supabase_url}\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+benchmark: product search latency, old `name ilike '%q%'` vs the indexed
+search_product_ids rpc (migrations/0004_product_search.sql).
+
+seeds synthetic products into a throwaway "bench-search" category in
+steps (10k, 100k, 1M by default), and at each size times a fixed set of
+grocery-list style queries (typeahead prefixes, two-word prefixes, a brand,
+a typo) through both paths. reports p50/p95 per path and size. the bench
+products are deleted at the end unless --keep is passed.
+
+run it against a local supabase stack, never a shared project:
+    supabase start   # postgres + postgrest on 127.0.0.1:54321
+    psql "$LOCAL_DB_URL" -f migrations/0004_product_search.sql
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_KEY=<local service key> \\
+        PYTHONPATH=. uv run python scripts/bench_search.py --sizes 10000 100000 1000000
+
+seeding 1M rows through postgrest takes a few minutes.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+
+from app.core import supabase as supabase_core
+from app.scraper.config import CategoryConfig
+from app.scraper.db_writer import ensure_category_exists
+from app.services import product_service
+from scripts._bench import print_table, summarize, time_async
+
+BENCH_CATEGORY = CategoryConfig(
+    name="Bench Search", category_id="0", url_path="bench-search",
+    breadcrumb="bench-search", slug="bench-search",
+)
+
+QUERIES = ["mil", "whole mi", "chobani", "greek yog", "orgnic", "peanut butter", "eggs"]
+
+_BRANDS = ["Bowl & Basket", "Chobani", "Horizon", "Tropicana", "Jif", "Barilla", "Cabot", "Kellogg's"]
+_ADJECTIVES = ["Organic", "Whole", "Low Fat", "Greek", "Creamy", "Crunchy", "Unsweetened", "Large"]
+_NOUNS = ["Milk", "Yogurt", "Eggs", "Peanut Butter", "Orange Juice", "Spaghetti", "Cheddar", "Cereal"]
+_SEED_CHUNK = 5000
+
+
+def _synthetic_rows(start: int, end: int, category_uuid: str) -> list[dict]:
+    rng = random.Random(start)
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "name": f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {i}",
+            "brand": rng.choice(_BRANDS),
+            "unit_size": "16 oz",
+            "category_id": category_uuid,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(start, end)
+    ]
+
+
+async def _seed(sb, have: int, want: int, category_uuid: str) -> None:
+    for start in range(have, want, _SEED_CHUNK):
+        end = min(start + _SEED_CHUNK, want)
+        await sb.table("products").insert(_synthetic_rows(start, end, category_uuid)).execute()
+
+
+async def _legacy_search(sb, query: str) -> None:
+    """the pre-0004 query: substring ilike on name, exact count."""
+    await sb.table("products").select(
+        "id, name, brand, image_url, unit_size, upc, product_categories(id, name, slug)",
+        count="exact",
+    ).ilike("name", f"%{query}%").range(0, 49).order("name").execute()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="product search latency at several table sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--keep", action="store_true", help="leave the bench products in place")
+    args = parser.parse_args()
+
+    sb = supabase_core.get_supabase()
+    category_uuid = await ensure_category_exists(BENCH_CATEGORY)
+
+    rows = []
+    seeded = 0
+    try:
+        for size in sorted(args.sizes):
+            seed_start = time.perf_counter()
+            await _seed(sb, seeded, size, category_uuid)
+            seeded = size
+            print(f"seeded {size} bench products ({time.perf_counter() - seed_start:.0f}s)")
+
+            for label, search in (
+                ("ilike", lambda q: _legacy_search(sb, q)),
+                ("search_product_ids", lambda q: product_service.search_products(query=q)),
+            ):
+                samples: list[float] = []
+                for query in QUERIES:
+                    await search(query)  # warm up
+                    samples += await time_async(lambda: search(query), args.iterations)
+                rows.append({"products": size, **summarize(label, samples)})
+    finally:
+        if not args.keep:
+            await sb.table("products").delete().eq("category_id", category_uuid).execute()
+        await supabase_core.close_supabase()
+
+    print(f"\nproduct search, {len(QUERIES)} queries x {args.iterations} runs, {sb.supabase_url}\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
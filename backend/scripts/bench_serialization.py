@@ -0,0 +1,137 @@
+"""
+benchmark: json encoding time per route for realistic payload sizes.
+
+builds synthetic payloads shaped like each route's supabase rows (no
+database needed) and times:
+- stdlib:     jsonable_encoder + json.dumps, what fastapi does for a route
+              that returns a plain dict with no response model
+- validated:  encode_json(data, Model) - validate against app.schemas and
+              dump with pydantic's rust core (what the routes do now)
+- unvalidated: encode_json(data) - rust core dump, no model
+- orjson:     orjson.dumps, for reference, if orjson is installed
+
+"stores" is how many store prices each product embeds; a catalog with
+all shoprite stores scraped has 8+.
+
+usage (from the backend/ directory):
+    PYTHONPATH=. uv run python scripts/bench_serialization.py
+    PYTHONPATH=. uv run python scripts/bench_serialization.py --page-sizes 50 200 --stores 2 8 --iterations 200
+"""
+
+import argparse
+import json
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.response_cache import encode_json
+from app.schemas import GroceryListDetail, ProductPage, StorePrice, StoreProductPage
+from scripts._bench import print_table, summarize, time_sync
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _id(i: int) -> str:
+    return str(uuid.UUID(int=i + 1))
+
+
+def _store_price(s: int, with_updated_at: bool = False) -> dict:
+    row = {
+        "price": round(2.99 + s * 0.25, 2),
+        "sale_price": 2.49 if s % 3 == 0 else None,
+        "in_stock": True,
+        "store_id": _id(s),
+        "stores": {"name": f"ShopRite of Store {s}", "chain": "shoprite", "store_number": str(200 + s)},
+    }
+    if with_updated_at:
+        row["updated_at"] = "2026-10-01T12:00:00.000000+00:00"
+    return row
+
+
+def _product(i: int, stores: int) -> dict:
+    return {
+        "id": _id(i),
+        "name": f"Bowl & Basket Organic Whole Milk, 64 fl oz {i}",
+        "brand": "Bowl & Basket",
+        "image_url": f"https://images.example.com/products/{i:08d}.jpg",
+        "unit_size": "64 fl oz",
+        "upc": f"{i:012d}",
+        "product_categories": {"id": _id(0), "name": "Milk", "slug": "milk"},
+        "store_products": [_store_price(s) for s in range(stores)],
+        "product_nutrition": {
+            "fdc_id": 2_000_000 + i, "calories_kcal": 150.0, "protein_g": 8.0, "fat_g": 8.0,
+            "carbs_g": 12.0, "fiber_g": None, "sodium_mg": 125.0, "cholesterol_mg": 35.0, "sugar_g": 12.0,
+        },
+    }
+
+
+def _payloads(page_size: int, stores: int) -> dict[str, tuple[object, object]]:
+    """route -> (payload, response model)."""
+    products = [_product(i, stores) for i in range(page_size)]
+    store_products = [
+        {
+            "id": _id(i), "price": 3.49, "sale_price": None, "in_stock": True,
+            "products": {k: v for k, v in p.items() if k not in ("store_products", "product_nutrition")},
+        }
+        for i, p in enumerate(products)
+    ]
+    grocery_list = {
+        "id": _id(0), "name": "weekly", "status": "active", "budget_limit": 120.0,
+        "created_at": "2026-10-01T12:00:00+00:00", "updated_at": "2026-10-02T12:00:00+00:00",
+        "grocery_list_items": [
+            {"id": _id(i), "quantity": 2, "is_checked": False, "custom_item_name": None,
+             "products": {k: v for k, v in p.items() if k != "product_nutrition"}}
+            for i, p in enumerate(products[:min(page_size, 40)])
+        ],
+    }
+    return {
+        "GET /products": ({"data": products, "count": 5000, "next_cursor": "eyJ4Ijox"}, ProductPage),
+        "GET /stores/{id}/products": ({"data": store_products, "count": 5000, "next_cursor": None}, StoreProductPage),
+        "GET /products/{id}/prices": ([_store_price(s, True) for s in range(stores)], list[StorePrice]),
+        "GET /grocery-lists/{id}": (grocery_list, GroceryListDetail),
+    }
+
+
+def _stdlib(data: object) -> bytes:
+    return json.dumps(
+        jsonable_encoder(data), ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+    ).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="json encoding time per route and payload size")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--stores", type=int, nargs="+", default=[2, 8], help="store prices per product")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    encoders = {
+        "stdlib": _stdlib,
+        "validated": None,  # needs the model, see below
+        "unvalidated": encode_json,
+    }
+    if orjson is not None:
+        encoders["orjson"] = orjson.dumps
+
+    rows = []
+    for page_size in args.page_sizes:
+        for stores in args.stores:
+            for route, (payload, model) in _payloads(page_size, stores).items():
+                size_kb = round(len(encode_json(payload)) / 1024, 1)
+                for label, encode in encoders.items():
+                    fn = (lambda: encode_json(payload, model)) if encode is None else (lambda: encode(payload))
+                    fn()  # warm up (builds the TypeAdapter once)
+                    rows.append({
+                        "route": route, "page": page_size, "stores": stores, "kb": size_kb,
+                        **summarize(label, time_sync(fn, args.iterations)),
+                    })
+
+    print(f"\njson encoding per response, {args.iterations} runs each\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
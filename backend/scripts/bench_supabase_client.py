@@ -0,0 +1,52 @@
+"""
+benchmark: per-request supabase latency with a fresh client vs the shared pool.
+
+"fresh" reproduces the old get_supabase() behaviour: a new client on every
+call, so each query opens a new connection and does a tls handshake.
+"pooled" uses the process-wide client from app.core.supabase, which keeps
+connections alive between calls.
+
+usage (from the backend/ directory, with SUPABASE_URL/SUPABASE_SERVICE_KEY set):
+    PYTHONPATH=. uv run python scripts/bench_supabase_client.py
+    PYTHONPATH=. uv run python scripts/bench_supabase_client.py -n 200 --table stores
+"""
+
+import argparse
+import asyncio
+
+from supabase import acreate_client
+
+from app.core.config import settings
+from app.core.supabase import get_supabase, close_supabase
+from scripts._bench import summarize, print_table, time_async
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="compare fresh vs pooled supabase clients")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--table", default="product_categories", help="table to select from")
+    args = parser.parse_args()
+
+    async def fresh_call():
+        sb = await acreate_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+        await sb.table(args.table).select("id").limit(1).execute()
+        await sb.postgrest.aclose()
+
+    async def pooled_call():
+        await get_supabase().table(args.table).select("id").limit(1).execute()
+
+    # warm up dns and the pool so the first handshake isn't counted against it
+    await pooled_call()
+
+    rows = [
+        summarize("fresh client per call", await time_async(fresh_call, args.iterations)),
+        summarize("shared pooled client", await time_async(pooled_call, args.iterations)),
+    ]
+    await close_supabase()
+
+    print(f"\nselect id from {args.table} limit 1, {args.iterations} calls each\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
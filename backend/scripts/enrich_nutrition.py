@@ -0,0 +1,57 @@
+"""
+match products to usda fdc foods by upc and store their nutrition in
+product_nutrition. scrape jobs already do this when they finish; run it by
+hand to backfill or to refresh older rows.
+
+needs migrations/0003_product_nutrition.sql and FDC_API_KEY.
+
+usage (from the backend/ directory):
+    # up to NUTRITION_MAX_SEARCHES_PER_RUN products missing or older than
+    # NUTRITION_MAX_AGE_DAYS:
+    PYTHONPATH=. uv run python scripts/enrich_nutrition.py
+
+    # a small batch, re-enriching anything older than a week:
+    PYTHONPATH=. uv run python scripts/enrich_nutrition.py --limit 200 --max-age-days 7
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import timedelta
+
+from app.core.supabase import close_supabase
+from app.services.fdc import close_fdc_client
+from app.services.nutrition import DEFAULT_MAX_AGE, enrich_products
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Enrich products with FDC nutrition data")
+    parser.add_argument(
+        "--limit", type=int, default=None,
+        help="enrich at most this many products (default NUTRITION_MAX_SEARCHES_PER_RUN, 0 for all)",
+    )
+    parser.add_argument(
+        "--max-age-days", type=float, default=DEFAULT_MAX_AGE.days,
+        help=f"re-enrich rows older than this (default {DEFAULT_MAX_AGE.days})",
+    )
+    args = parser.parse_args()
+
+    try:
+        summary = await enrich_products(limit=args.limit, max_age=timedelta(days=args.max_age_days))
+    finally:
+        await close_fdc_client()
+        await close_supabase()
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,125 @@
+"""
+load test: requests/sec against the api at 1, 10 and 100 concurrent clients.
+
+by default this starts two local processes - scripts/postgrest_stub.py as a
+stand-in for supabase, and the api itself pointed at it - then hammers one
+endpoint with N concurrent keep-alive clients for a fixed duration per
+level. because the stub answers after a fixed delay, a blocking service
+layer shows up as flat requests/sec no matter how many clients there are,
+while a non-blocking one scales with concurrency.
+
+usage (from the backend/ directory):
+    PYTHONPATH=. uv run python scripts/load_test.py
+    PYTHONPATH=. uv run python scripts/load_test.py --path "/stores" --levels 1 10 100 --duration 10
+
+    # against an api you already started yourself:
+    PYTHONPATH=. uv run python scripts/load_test.py --no-spawn --base-url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from scripts._bench import percentile, print_table
+
+STUB_PORT = 54321
+API_PORT = 8765
+
+
+def _spawn(module: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", module, "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env},
+    )
+
+
+async def _wait_ready(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def _run_level(base_url: str, path: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.monotonic() - start
+
+    return {
+        "clients": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="requests/sec at increasing concurrency")
+    parser.add_argument("--path", default="/products?q=milk", help="endpoint to hit")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    parser.add_argument("--no-spawn", action="store_true", help="use an already running api")
+    parser.add_argument("--base-url", default=f"http://127.0.0.1:{API_PORT}")
+    args = parser.parse_args()
+
+    procs: list[subprocess.Popen] = []
+    try:
+        if not args.no_spawn:
+            procs.append(_spawn(
+                "scripts.postgrest_stub:app", STUB_PORT,
+                {"STUB_LATENCY_MS": str(args.stub_latency_ms)},
+            ))
+            await _wait_ready(f"http://127.0.0.1:{STUB_PORT}/docs")
+            procs.append(_spawn("app.main:app", API_PORT, {
+                "SUPABASE_URL": f"http://127.0.0.1:{STUB_PORT}",
+                "SUPABASE_SERVICE_KEY": "stub-service-key",
+            }))
+            await _wait_ready(f"{args.base_url}/health")
+
+        rows = [
+            await _run_level(args.base_url, args.path, level, args.duration)
+            for level in args.levels
+        ]
+        print(f"\nGET {args.path}, {args.duration}s per level, "
+              f"upstream latency {args.stub_latency_ms}ms\n")
+        print_table(rows)
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+local stand-in for supabase's postgrest + auth endpoints, for load tests.
+
+answers every /rest/v1/<table> request (and the search_product_ids rpc)
+with canned rows after a fixed
+delay that plays the part of a database round-trip, so benchmarks can
+measure how well the api overlaps upstream calls without touching a real
+project. the delay is an asyncio.sleep, so the stub itself never becomes
+the bottleneck.
+
+usage (from the backend/ directory):
+    STUB_LATENCY_MS=20 PYTHONPATH=. uv run uvicorn scripts.postgrest_stub:app --port 54321
+
+then point the api at it with SUPABASE_URL=http://127.0.0.1:54321
+(any non-empty SUPABASE_SERVICE_KEY works).
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from functools import lru_cache
+
+from fastapi import FastAPI, Request, Response
+
+LATENCY_S = float(os.environ.get("STUB_LATENCY_MS", "20")) / 1000
+TOTAL_ROWS = int(os.environ.get("STUB_TOTAL_ROWS", "5000"))
+
+app = FastAPI(title="postgrest stub")
+
+
+def _fake_row(table: str, i: int) -> dict:
+    if table == "products":
+        return {
+            "id": str(uuid.UUID(int=i + 1)),
+            "name": f"Product {i:05d}",
+            "brand": "Bowl & Basket" if i % 3 else None,
+            "image_url": None,
+            "unit_size": "16 oz",
+            "upc": f"{i:012d}",
+            "product_categories": {"id": str(uuid.UUID(int=1)), "name": "Milk", "slug": "milk"},
+            "store_products": [
+                {
+                    "price": 3.49 + (i % 7) * 0.1,
+                    "sale_price": None,
+                    "in_stock": True,
+                    "store_id": str(uuid.UUID(int=s + 1)),
+                    "stores": {"name": f"ShopRite {s}", "chain": "shoprite", "store_number": str(200 + s)},
+                }
+                for s in range(2)
+            ],
+        }
+    if table == "store_products":
+        return {
+            "id": str(uuid.UUID(int=i + 1)),
+            "price": round(0.99 + i * 0.01, 2),
+            "sale_price": None,
+            "in_stock": True,
+            "products": {"id": str(uuid.UUID(int=i + 1)), "name": f"Product {i:05d}", "brand": None},
+        }
+    if table == "product_categories":
+        return {"id": str(uuid.UUID(int=i + 1)), "name": f"Category {i:02d}", "slug": f"category-{i:02d}"}
+    return {"id": str(uuid.UUID(int=i + 1)), "name": f"{table} {i}"}
+
+
+@lru_cache(maxsize=256)
+def _page_body(table: str, start: int, end: int) -> bytes:
+    return json.dumps([_fake_row(table, i) for i in range(start, end + 1)]).encode()
+
+
+@app.api_route("/rest/v1/{table}", methods=["GET", "HEAD", "POST", "PATCH", "DELETE"])
+async def table(table: str, request: Request) -> Response:
+    await asyncio.sleep(LATENCY_S)
+
+    start, end = 0, 49
+    if "range" in request.headers:
+        lo, _, hi = request.headers["range"].partition("-")
+        start, end = int(lo), int(hi)
+    elif "offset" in request.query_params or "limit" in request.query_params:
+        start = int(request.query_params.get("offset", 0))
+        end = start + int(request.query_params.get("limit", 50)) - 1
+    end = min(end, TOTAL_ROWS - 1)
+
+    return Response(
+        content=_page_body(table, start, end),
+        media_type="application/json",
+        headers={"content-range": f"{start}-{end}/{TOTAL_ROWS}"},
+    )
+
+
+@app.post("/rest/v1/rpc/search_product_ids")
+async def search_product_ids(request: Request) -> list[dict]:
+    await asyncio.sleep(LATENCY_S)
+    params = await request.json()
+    start = params.get("off", 0)
+    end = min(start + params.get("lim", 50), TOTAL_ROWS)
+    return [{"id": str(uuid.UUID(int=i + 1)), "rank": 1.0, "total": TOTAL_ROWS} for i in range(start, end)]
+
+
+@app.get("/auth/v1/user")
+async def user() -> dict:
+    await asyncio.sleep(LATENCY_S)
+    return {"id": str(uuid.UUID(int=42)), "aud": "authenticated", "role": "authenticated"}
@@ -13,8 +13,22 @@ usage (from the backend/ directory):
     # write to supabase (default writes to JSON files):
     PYTHONPATH=. uv run python scripts/scrape_shoprite.py --db
 
+    # run 4 store/category combos at once on one browser:
+    PYTHONPATH=. uv run python scripts/scrape_shoprite.py --concurrency 4
+
+    # fast-load mode: skip images/fonts/trackers, no fixed settle delay.
+    # compare the per-page "loaded in ... KB transferred" log lines with
+    # and without it:
+    PYTHONPATH=. uv run python scripts/scrape_shoprite.py --category milk --fast
+
+    # write each page to supabase as soon as it is scraped:
+    PYTHONPATH=. uv run python scripts/scrape_shoprite.py --db --stream
+
+    # fetch pages 2..N of each category in 3 tabs once page 1 gives the total:
+    PYTHONPATH=. uv run python scripts/scrape_shoprite.py --category milk --page-fanout 3
+
 output:
-    - stdout: summary per store/category
+    - stdout: summary per store/category, with scrape/write timing
     - file:   data/shoprite_<store_id>_<category>_<timestamp>.json (unless --db)
     - or:     supabase upserts (with --db flag)
 """
@@ -25,11 +39,20 @@ import json
 import logging
 import sys
 import time
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
 from pathlib import Path
 
-from app.scraper.shoprite import StoreConfig, scrape_store, CloudflareBlockedError, USER_AGENT
-from app.scraper.config import STORES, CATEGORIES, build_browse_url, StoreInfo, CategoryConfig
+from app.core.config import settings
+from app.core.response_cache import close_response_cache, init_response_cache
+from app.scraper.shoprite import ShopRiteProduct, USER_AGENT
+from app.scraper.config import STORES, CATEGORIES, StoreInfo, CategoryConfig
+from app.scraper.scheduler import (
+    run_scrapes,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_ATTEMPTS,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -81,64 +104,66 @@ async def refresh_session() -> None:
         await browser.close()
 
 
-async def scrape_category(
+async def save_category(
     store: StoreInfo,
     category: CategoryConfig,
+    products: list[ShopRiteProduct],
     write_db: bool = False,
 ) -> dict:
     """
-    scrape one store + category combination.
-    returns summary dict with product count and timing.
+    write one scraped store + category to supabase or a JSON file.
+    returns a summary dict for the run results.
     """
-    config = StoreConfig(
-        store_id=store.store_id,
-        zip_code=store.zip_code,
-        browse_url=build_browse_url(store, category),
-    )
-
-    start = time.monotonic()
-
-    # headed mode (headless=False) avoids cloudflare blocking on pagination.
-    # to switch to headless, pass headless=True - but cloudflare may block
-    # page 2+ requests. see scrape_store() docstring for details.
-    products = await scrape_store(
-        config,
-        session_state=SESSION_PATH if SESSION_PATH.exists() else None,
-        headless=False,
-    )
-
-    elapsed = time.monotonic() - start
-
     if write_db:
-        from app.scraper.db_writer import (
-            ensure_store_exists,
-            ensure_category_exists,
-            upsert_products,
-        )
-        store_uuid = await ensure_store_exists(store)
-        cat_uuid = await ensure_category_exists(category)
-        db_result = await upsert_products(products, store_uuid, cat_uuid)
+        from app.scraper.db_writer import write_category
+
+        db_result = await write_category(store, category, products)
         logger.info(
-            "DB: %d products upserted, %d prices upserted for %s/%s",
+            "DB: %d products upserted, %d prices upserted, %d history rows "
+            "(%d unchanged skipped), %d failed for %s/%s",
             db_result["products_upserted"],
             db_result["prices_upserted"],
+            db_result["history_inserted"],
+            db_result["history_skipped"],
+            len(db_result["failed"]),
             store.name,
             category.name,
         )
-    else:
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-        output_path = OUTPUT_DIR / f"shoprite_{store.store_id}_{category.slug}_{timestamp}.json"
-        output_path.write_text(
-            json.dumps([p.to_dict() for p in products], indent=2),
-            encoding="utf-8",
-        )
-        logger.info("wrote %d products to %s", len(products), output_path)
+        return {"failed_rows": len(db_result["failed"])}
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output_path = OUTPUT_DIR / f"shoprite_{store.store_id}_{category.slug}_{timestamp}.json"
+    output_path.write_text(
+        json.dumps([p.to_dict() for p in products], indent=2),
+        encoding="utf-8",
+    )
+    logger.info("wrote %d products to %s", len(products), output_path)
+    return {"output": str(output_path)}
 
+
+async def stream_category(
+    store: StoreInfo,
+    category: CategoryConfig,
+    batches: AsyncIterator[list[ShopRiteProduct]],
+) -> dict:
+    """write one store + category to supabase page by page (--db --stream)."""
+    from app.scraper.db_writer import write_category_stream
+
+    db_result = await write_category_stream(store, category, batches)
+    logger.info(
+        "DB: %d products in %d batches (%.1fs writing), %d history rows, %d failed for %s/%s",
+        db_result["products_scraped"],
+        db_result["batches"],
+        db_result["write_seconds"],
+        db_result["history_inserted"],
+        len(db_result["failed"]),
+        store.name,
+        category.name,
+    )
     return {
-        "store": store.name,
-        "category": category.name,
-        "products": len(products),
-        "duration": round(elapsed, 1),
+        "products_scraped": db_result["products_scraped"],
+        "write_seconds": db_result["write_seconds"],
+        "failed_rows": len(db_result["failed"]),
     }
 
 
@@ -147,6 +172,30 @@ async def main() -> int:
     parser.add_argument("--store", type=str, help="scrape only this store_id (e.g. 218)")
     parser.add_argument("--category", type=str, help="scrape only this category slug (e.g. milk)")
     parser.add_argument("--db", action="store_true", help="write to supabase instead of JSON files")
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help=f"store/category combos scraped at once (default {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--min-interval", type=float, default=DEFAULT_MIN_INTERVAL,
+        help=f"minimum seconds between page loads per host (default {DEFAULT_MIN_INTERVAL})",
+    )
+    parser.add_argument(
+        "--attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+        help=f"attempts per combo before giving up (default {DEFAULT_MAX_ATTEMPTS})",
+    )
+    parser.add_argument(
+        "--fast", action="store_true",
+        help="block images/fonts/trackers and read state as soon as it is present",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="with --db, write each page as it is scraped instead of once per category",
+    )
+    parser.add_argument(
+        "--page-fanout", type=int, default=1,
+        help="tabs used to fetch the remaining pages of a category concurrently (default 1)",
+    )
     args = parser.parse_args()
 
     OUTPUT_DIR.mkdir(exist_ok=True)
@@ -174,41 +223,37 @@ async def main() -> int:
             logger.error("unknown category slug: %s", args.category)
             return 1
 
+    if args.stream and not args.db:
+        logger.error("--stream needs --db")
+        return 1
+
+    # with a shared (redis) response cache, these writes invalidate what the
+    # api serves right away. a per-process memory cache here would be moot.
+    if args.db and settings.RESPONSE_CACHE_BACKEND == "redis":
+        init_response_cache()
+
     total_start = time.monotonic()
-    results = []
-
-    for store in stores:
-        for category in categories:
-            logger.info("scraping %s / %s ...", store.name, category.name)
-            try:
-                result = await scrape_category(store, category, write_db=args.db)
-                results.append(result)
-            except CloudflareBlockedError:
-                # session expired - refresh and retry this category
-                logger.warning("cloudflare blocked %s / %s - refreshing session...", store.name, category.name)
-                try:
-                    await refresh_session()
-                    # retry the same category with the new session
-                    result = await scrape_category(store, category, write_db=args.db)
-                    results.append(result)
-                except Exception as retry_err:
-                    logger.error("retry FAILED %s / %s: %s", store.name, category.name, retry_err)
-                    results.append({
-                        "store": store.name,
-                        "category": category.name,
-                        "products": 0,
-                        "duration": 0,
-                        "error": str(retry_err),
-                    })
-            except Exception as e:
-                logger.error("FAILED %s / %s: %s", store.name, category.name, e)
-                results.append({
-                    "store": store.name,
-                    "category": category.name,
-                    "products": 0,
-                    "duration": 0,
-                    "error": str(e),
-                })
+
+    # headed mode (headless=False) avoids cloudflare blocking on pagination.
+    # to switch to headless, pass headless=True - but cloudflare may block
+    # page 2+ requests. see scrape_store() docstring for details.
+    combo_results = await run_scrapes(
+        combos=[(store, category) for store in stores for category in categories],
+        handle=lambda store, category, products: save_category(
+            store, category, products, write_db=args.db,
+        ),
+        handle_stream=stream_category if args.stream else None,
+        session_path=SESSION_PATH,
+        concurrency=args.concurrency,
+        min_interval=args.min_interval,
+        max_attempts=args.attempts,
+        headless=False,
+        fast=args.fast,
+        page_fanout=args.page_fanout,
+        on_blocked=refresh_session,
+    )
+    results = [r.to_dict() for r in combo_results]
+    await close_response_cache()
 
     total_elapsed = time.monotonic() - total_start
 
@@ -218,7 +263,11 @@ async def main() -> int:
     print(f"{'=' * 60}")
     total_products = 0
     for r in results:
-        status = f"{r['products']} products in {r['duration']}s"
+        status = (
+            f"{r['products']} products in {r['duration']}s "
+            f"(scrape {r['scrape_seconds']}s, write {r['handle_seconds']}s, "
+            f"{r['attempts']} attempt(s))"
+        )
         if "error" in r:
             status = f"FAILED: {r['error']}"
         print(f"  {r['store']:30s} | {r['category']:25s} | {status}")
@@ -0,0 +1,131 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from app.services.basket_optimizer import _MISSING, _best_split, build_matrix, optimize_basket
+
+
+def _cost(costs: np.ndarray, stores) -> int:
+    return int(costs[:, list(stores)].min(axis=1).sum())
+
+
+def _brute_force(costs: np.ndarray, k: int) -> int:
+    n = costs.shape[1]
+    return min(
+        _cost(costs, stores)
+        for size in range(1, min(k, n) + 1)
+        for stores in itertools.combinations(range(n), size)
+    )
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_best_split_matches_brute_force(seed):
+    rng = random.Random(seed)
+    n_items, n_stores = rng.randint(1, 12), rng.randint(1, 7)
+    costs = np.array(
+        [
+            [_MISSING if rng.random() < 0.25 else rng.randint(50, 1500) for _ in range(n_stores)]
+            for _ in range(n_items)
+        ],
+        dtype=np.int64,
+    )
+    k = rng.randint(1, 4)
+
+    picked, exact = _best_split(costs, k)
+
+    assert exact
+    assert len(set(picked)) == len(picked) <= k
+    assert _cost(costs, picked) == _brute_force(costs, k)
+
+
+def _item(item_id, prices, quantity=1, is_checked=False):
+    """a grocery_list_items row; prices are (store_id, price, sale_price, in_stock)."""
+    return {
+        "id": item_id,
+        "quantity": quantity,
+        "is_checked": is_checked,
+        "products": {
+            "store_products": [
+                {"store_id": s, "price": p, "sale_price": sale, "in_stock": stock, "stores": {"name": s}}
+                for s, p, sale, stock in prices
+            ],
+        },
+    }
+
+
+def test_build_matrix_uses_lower_sale_price_and_quantity():
+    matrix = build_matrix([
+        _item("milk", [("a", 4.00, 3.25, True), ("b", 3.50, 3.75, True)], quantity=2),
+    ])
+
+    assert matrix.item_ids == ["milk"]
+    assert matrix.costs.tolist() == [[650, 700]]
+
+
+def test_build_matrix_skips_out_of_stock_and_unpriced():
+    matrix = build_matrix([
+        _item("eggs", [("a", 2.00, None, False), ("b", 2.50, None, True)]),
+        _item("bread", [("a", 3.00, None, False)]),
+        {"id": "custom", "quantity": 1, "is_checked": False, "custom_item_name": "birthday candles", "products": None},
+    ])
+
+    assert matrix.item_ids == ["eggs"]
+    assert matrix.store_ids == ["b"]
+    assert matrix.unpriced == ["bread", "custom"]
+
+
+def test_build_matrix_leaves_out_checked_items():
+    items = [_item("milk", [("a", 3.00, None, True)], is_checked=True)]
+
+    assert build_matrix(items).item_ids == []
+    assert build_matrix(items, include_checked=True).item_ids == ["milk"]
+
+
+def test_optimize_basket_reports_missing_items():
+    detail = {
+        "id": "list",
+        "budget_limit": 10.0,
+        "grocery_list_items": [
+            _item("milk", [("a", 3.00, None, True), ("b", 4.00, None, True)]),
+            _item("eggs", [("b", 2.00, None, True)]),
+            _item("bread", [("a", 5.00, None, True), ("b", 2.50, None, True)]),
+        ],
+    }
+
+    plan = optimize_basket(detail, max_stores=2)
+
+    # b carries everything, so it ranks ahead of the store missing eggs
+    assert [s["store"]["id"] for s in plan["stores"]] == ["b", "a"]
+    assert plan["stores"][1]["missing_items"] == ["eggs"]
+    assert plan["single_store"]["total"] == 8.50
+    assert plan["single_store"]["within_budget"] is True
+
+    split = plan["split"]
+    assert split["total"] == 7.50
+    assert split["missing_items"] == []
+    assert split["savings_vs_single_store"] == 1.00
+    assert split["exact"] is True
+
+
+def test_optimize_basket_split_reports_items_its_stores_miss():
+    detail = {
+        "id": "list",
+        "budget_limit": None,
+        "grocery_list_items": [
+            _item("milk", [("a", 3.00, None, True)]),
+            _item("eggs", [("b", 2.00, None, True)]),
+            _item("bread", [("b", 9.00, None, False)]),
+        ],
+    }
+
+    plan = optimize_basket(detail, max_stores=1)
+
+    # out of stock everywhere: can't be priced at all
+    assert plan["unpriced_items"] == ["bread"]
+    split = plan["split"]
+    assert [b["store"]["id"] for b in split["stores"]] == ["b"]
+    assert split["missing_items"] == ["milk"]
+    assert split["savings_vs_single_store"] is None
+    assert split["within_budget"] is None
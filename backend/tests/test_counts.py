@@ -0,0 +1,25 @@
+from app.core.counts import CountCache
+
+
+def test_cached_count_survives_invalidation_mid_request():
+    cache = CountCache()
+    key = ("products", "dairy")
+    cache.set(key, "exact", 42)
+
+    strategy, cached = cache.strategy_for(key, "exact")
+    # a scraper write lands while the page query (sent without count=) runs
+    cache.invalidate(category_id="dairy")
+
+    assert strategy is None
+    assert cache.resolve(key, "exact", None, cached) == 42
+
+
+def test_fetched_count_is_cached():
+    cache = CountCache()
+    key = ("store_products", "store-1")
+
+    strategy, cached = cache.strategy_for(key, "planned")
+    assert (strategy, cached) == ("planned", None)
+    assert cache.resolve(key, "planned", 7, cached) == 7
+
+    assert cache.strategy_for(key, "planned") == (None, 7)
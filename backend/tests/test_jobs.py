@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.scraper import jobs
+from app.scraper.jobs import CANCELLED, QUEUED, RUNNING, JobQueue
+
+
+@pytest.fixture
+def never_finishes(monkeypatch):
+    async def run_scrapes(**kwargs):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(jobs, "run_scrapes", run_scrapes)
+
+
+@pytest.mark.asyncio
+async def test_cancel_before_the_task_first_runs(never_finishes):
+    queue = JobQueue()
+    queue.start()
+    try:
+        job = queue.submit(combos=[])
+        # let the worker pick the job up and create its task, but not run it
+        while job.task is None:
+            await asyncio.sleep(0)
+        assert job.status == QUEUED
+
+        assert queue.cancel(job.id)
+        assert await queue.wait_stopped(job.id, timeout=1)
+
+        assert job.status == CANCELLED
+        assert job.finished_at is not None
+        assert not queue.cancel(job.id)
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_job(never_finishes):
+    queue = JobQueue()
+    queue.start()
+    try:
+        job = queue.submit(combos=[])
+        while job.status != RUNNING:
+            await asyncio.sleep(0)
+
+        assert queue.cancel(job.id)
+        assert await queue.wait_stopped(job.id, timeout=1)
+        assert job.status == CANCELLED
+    finally:
+        await queue.stop()
@@ -0,0 +1,50 @@
+import asyncio
+import gc
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_error_after_every_caller_is_cancelled_is_retrieved():
+    flight = SingleFlight("test-orphaned-error")
+    loop = asyncio.get_running_loop()
+    unhandled = []
+    loop.set_exception_handler(lambda loop, context: unhandled.append(context))
+    release = asyncio.Event()
+
+    async def fails():
+        await release.wait()
+        raise RuntimeError("upstream down")
+
+    caller = asyncio.create_task(flight.do("key", fails))
+    await asyncio.sleep(0)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    release.set()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    gc.collect()
+
+    assert unhandled == []
+    assert flight.stats()["errors"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_callers_share_the_error():
+    flight = SingleFlight("test-shared-error")
+
+    async def fails():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        flight.do("key", fails), flight.do("key", fails), return_exceptions=True,
+    )
+
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert flight.stats()["calls"] == 1